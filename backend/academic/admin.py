@@ -1,11 +1,15 @@
 from django.contrib import admin
-from .models import ExamType, Exam, Mark, AcademicYear, ClassSubject
+from .models import ExamType, Exam, Mark, AcademicYear, ClassSubject, GradeScale
 
 @admin.register(ExamType)
 class ExamTypeAdmin(admin.ModelAdmin):
     list_display = ['name', 'weightage', 'description']
     search_fields = ['name']
 
+@admin.register(GradeScale)
+class GradeScaleAdmin(admin.ModelAdmin):
+    list_display = ['grade', 'min_percentage']
+
 @admin.register(Exam)
 class ExamAdmin(admin.ModelAdmin):
     list_display = ['exam_type', 'subject', 'class_assigned', 'section', 'date', 'max_marks']
@@ -0,0 +1,102 @@
+"""Grade book for a section and academic year.
+
+Marks are aggregated in the database per (student, subject, exam type):
+several exams of the same type (e.g. weekly quizzes) are pooled by summing
+marks obtained and max marks. The result is returned in a columnar layout:
+dimension tables for students, subjects and exam types, and the cells as
+parallel arrays of indices into those tables, which keeps a 1,000-student
+grade book compact and cheap to build.
+
+A student's weighted percentage for a subject is the weightage-weighted
+mean of their exam-type percentages, over the exam types they have marks
+for. Cells whose exams carry no max marks have no percentage and are left
+out of that mean.
+"""
+from django.db.models import Case, ExpressionWrapper, F, FloatField, Sum, Value, When
+from django.db.models.functions import Round
+
+from core.models import StudentProfile, Subject
+from .models import ExamType, Mark
+
+
+def grade_book(section_id, academic_year):
+    marks = Mark.objects.filter(
+        exam__section_id=section_id,
+        exam__date__range=(academic_year.start_date, academic_year.end_date),
+        student__section_id=section_id,
+    )
+    cells = list(
+        marks.values('student_id', 'exam__subject_id', 'exam__exam_type_id')
+        .annotate(
+            obtained=Sum('marks_obtained'),
+            max_marks=Sum('exam__max_marks'),
+        )
+        .annotate(percentage=Case(
+            When(max_marks=0, then=Value(None)),
+            default=Round(
+                ExpressionWrapper(F('obtained') * 100.0 / F('max_marks'), output_field=FloatField()), 2
+            ),
+            output_field=FloatField(),
+        ))
+        .order_by('student_id', 'exam__subject_id', 'exam__exam_type_id')
+        .values_list('student_id', 'exam__subject_id', 'exam__exam_type_id', 'obtained', 'max_marks', 'percentage')
+    )
+
+    students = list(
+        StudentProfile.objects.filter(section_id=section_id)
+        .order_by('roll_number', 'id')
+        .values_list('id', 'roll_number', 'user__first_name', 'user__last_name')
+    )
+    subject_ids = sorted({row[1] for row in cells})
+    exam_type_ids = sorted({row[2] for row in cells})
+    subjects = list(Subject.objects.filter(id__in=subject_ids).order_by('id').values_list('id', 'name'))
+    exam_types = list(
+        ExamType.objects.filter(id__in=exam_type_ids).order_by('id').values_list('id', 'name', 'weightage')
+    )
+
+    student_index = {row[0]: i for i, row in enumerate(students)}
+    subject_index = {row[0]: i for i, row in enumerate(subjects)}
+    exam_type_index = {row[0]: i for i, row in enumerate(exam_types)}
+    weightage = {row[0]: float(row[2]) for row in exam_types}
+
+    columns = {name: [] for name in ('student', 'subject', 'exam_type', 'marks_obtained', 'max_marks', 'percentage')}
+    weighted = {}
+    for student_id, subject_id, exam_type_id, obtained, max_marks, percentage in cells:
+        columns['student'].append(student_index[student_id])
+        columns['subject'].append(subject_index[subject_id])
+        columns['exam_type'].append(exam_type_index[exam_type_id])
+        columns['marks_obtained'].append(float(obtained))
+        columns['max_marks'].append(max_marks)
+        columns['percentage'].append(percentage)
+
+        total = weighted.setdefault((student_id, subject_id), [0.0, 0.0])
+        if percentage is not None:
+            total[0] += percentage * weightage[exam_type_id]
+            total[1] += weightage[exam_type_id]
+
+    totals = {'student': [], 'subject': [], 'weighted_percentage': []}
+    for (student_id, subject_id), (score, weight) in weighted.items():
+        totals['student'].append(student_index[student_id])
+        totals['subject'].append(subject_index[subject_id])
+        totals['weighted_percentage'].append(round(score / weight, 2) if weight else None)
+
+    return {
+        'section': section_id,
+        'academic_year': academic_year.id,
+        'students': {
+            'id': [row[0] for row in students],
+            'roll_number': [row[1] for row in students],
+            'name': [f"{row[2]} {row[3]}".strip() for row in students],
+        },
+        'subjects': {
+            'id': [row[0] for row in subjects],
+            'name': [row[1] for row in subjects],
+        },
+        'exam_types': {
+            'id': [row[0] for row in exam_types],
+            'name': [row[1] for row in exam_types],
+            'weightage': [float(row[2]) for row in exam_types],
+        },
+        'cells': columns,
+        'totals': totals,
+    }
@@ -0,0 +1,51 @@
+"""Grade scale lookups shared by Mark and MarkQuerySet.with_grade()
+
+The scale is kept per process for GRADE_SCALE_CACHE_TTL seconds, so edits
+made by other processes are picked up; edits made in this process clear it
+through a GradeScale signal.
+"""
+import time
+from decimal import Decimal
+
+from django.apps import apps
+from django.conf import settings
+
+# Used until GradeScale has rows (and to seed it)
+DEFAULT_SCALE = [
+    (Decimal('90'), 'A+'),
+    (Decimal('80'), 'A'),
+    (Decimal('70'), 'B+'),
+    (Decimal('60'), 'B'),
+    (Decimal('50'), 'C'),
+    (Decimal('40'), 'D'),
+    (Decimal('0'), 'F'),
+]
+
+_scale = None
+_loaded_at = 0.0
+
+
+def grade_scale():
+    """(min_percentage, grade) pairs, highest band first"""
+    global _scale, _loaded_at
+    ttl = getattr(settings, 'GRADE_SCALE_CACHE_TTL', 30)
+    if _scale is None or time.monotonic() - _loaded_at > ttl:
+        GradeScale = apps.get_model('academic', 'GradeScale')
+        rows = list(GradeScale.objects.order_by('-min_percentage').values_list('min_percentage', 'grade'))
+        _scale = rows or DEFAULT_SCALE
+        _loaded_at = time.monotonic()
+    return _scale
+
+
+def clear_grade_scale():
+    global _scale
+    _scale = None
+
+
+def grade_for(percentage):
+    if percentage is None:
+        return None
+    for min_percentage, grade in grade_scale():
+        if percentage >= min_percentage:
+            return grade
+    return None
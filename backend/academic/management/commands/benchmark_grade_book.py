@@ -0,0 +1,71 @@
+import datetime
+import random
+
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.benchmark import build_section, measure, rolled_back
+from core.models import User, Subject
+from academic.models import AcademicYear, Exam, ExamType, Mark
+from academic.views import MarkViewSet
+
+
+class Command(BaseCommand):
+    help = 'Measure queries, latency and payload size of the grade book endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', nargs='+', type=int, default=[100, 1000])
+        parser.add_argument('--subjects', type=int, default=6)
+        parser.add_argument('--exams-per-type', type=int, default=2)
+
+    def handle(self, *args, **options):
+        view = MarkViewSet.as_view({'get': 'grade_book'})
+        factory = APIRequestFactory()
+        rng = random.Random(0)
+
+        self.stdout.write(f"{'students':>8} {'marks':>8} {'queries':>8} {'ms':>9} {'cells':>8}")
+        for size in options['students']:
+            with rolled_back():
+                fixture = build_section(size)
+                principal = User.objects.create(username=f"bench-p-{fixture['subject'].code}", role='PRINCIPAL')
+                year = AcademicYear.objects.create(
+                    year='2099-2100', start_date=datetime.date(2099, 4, 1), end_date=datetime.date(2100, 3, 31)
+                )
+                exam_types = [
+                    ExamType.objects.create(name=name, weightage=weight)
+                    for name, weight in (('Quiz', 20), ('Mid-term', 30), ('Final', 50))
+                ]
+                subjects = [fixture['subject']] + [
+                    Subject.objects.create(name=f'Bench {i}', code=f"{fixture['subject'].code[:6]}-{i}")
+                    for i in range(1, options['subjects'])
+                ]
+                exams = [
+                    Exam(
+                        exam_type=exam_type, subject=subject, class_assigned=fixture['class'],
+                        section=fixture['section'], date=datetime.date(2099, 6, 1 + n),
+                        start_time=datetime.time(9), end_time=datetime.time(11),
+                        max_marks=100, passing_marks=40, created_by=fixture['teacher_user'],
+                    )
+                    for subject in subjects
+                    for exam_type in exam_types
+                    for n in range(options['exams_per_type'])
+                ]
+                Exam.objects.bulk_create(exams)
+                exams = list(Exam.objects.filter(section=fixture['section']))
+                Mark.objects.bulk_create([
+                    Mark(student=student, exam=exam, teacher=fixture['teacher'],
+                         marks_obtained=rng.randint(20, 100))
+                    for exam in exams
+                    for student in fixture['students']
+                ], batch_size=2000)
+
+                request = factory.get('/api/academic/marks/grade_book/', {
+                    'section_id': fixture['section'].id, 'academic_year_id': year.id,
+                })
+                force_authenticate(request, user=principal)
+                with measure() as stats:
+                    response = view(request)
+                self.stdout.write(
+                    f"{size:>8} {len(exams) * size:>8} {stats['queries']:>8} {stats['ms']:>9.1f} "
+                    f"{len(response.data['cells']['student']):>8}"
+                )
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:53
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+# The thresholds previously hard-coded in Mark.grade
+DEFAULT_SCALE = [
+    ('A+', Decimal('90')),
+    ('A', Decimal('80')),
+    ('B+', Decimal('70')),
+    ('B', Decimal('60')),
+    ('C', Decimal('50')),
+    ('D', Decimal('40')),
+    ('F', Decimal('0')),
+]
+
+
+def seed_grade_scale(apps, schema_editor):
+    GradeScale = apps.get_model('academic', 'GradeScale')
+    GradeScale.objects.bulk_create([
+        GradeScale(grade=grade, min_percentage=min_percentage)
+        for grade, min_percentage in DEFAULT_SCALE
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academic', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradeScale',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grade', models.CharField(max_length=5, unique=True)),
+                ('min_percentage', models.DecimalField(decimal_places=2, max_digits=5, unique=True)),
+            ],
+            options={
+                'ordering': ['-min_percentage'],
+            },
+        ),
+        migrations.RunPython(seed_grade_scale, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,8 @@
 
 from django.db import models
+from django.db.models import Case, ExpressionWrapper, F, FloatField, Value, When
 from core.models import User, StudentProfile, TeacherProfile, Subject, Section, Class
+from . import grading
 
 class ExamType(models.Model):
     name = models.CharField(max_length=50)  # e.g., "Mid-term", "Final", "Quiz"
@@ -26,6 +28,36 @@ class Exam(models.Model):
     def __str__(self):
         return f"{self.exam_type.name} - {self.subject.name} - {self.class_assigned.name}-{self.section.name}"
 
+class GradeScale(models.Model):
+    """A grade band: marks at or above min_percentage get this grade"""
+    grade = models.CharField(max_length=5, unique=True)
+    min_percentage = models.DecimalField(max_digits=5, decimal_places=2, unique=True)
+
+    class Meta:
+        ordering = ['-min_percentage']
+
+    def __str__(self):
+        return f"{self.grade} (>= {self.min_percentage}%)"
+
+class MarkQuerySet(models.QuerySet):
+    def with_percentage(self):
+        return self.annotate(percentage=Case(
+            When(exam__max_marks=0, then=Value(None)),
+            default=ExpressionWrapper(F('marks_obtained') * 100.0 / F('exam__max_marks'), output_field=FloatField()),
+            output_field=FloatField()
+        ))
+
+    def with_grade(self):
+        """Annotate percentage and the grade band from GradeScale"""
+        queryset = self if 'percentage' in self.query.annotations else self.with_percentage()
+        bands = [
+            When(percentage__gte=float(min_percentage), then=Value(grade))
+            for min_percentage, grade in grading.grade_scale()
+        ]
+        if not bands:
+            return queryset.annotate(grade=Value(None, output_field=models.CharField()))
+        return queryset.annotate(grade=Case(*bands, default=Value(None), output_field=models.CharField()))
+
 class Mark(models.Model):
     student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE)
     exam = models.ForeignKey(Exam, on_delete=models.CASCADE)
@@ -35,30 +67,33 @@ class Mark(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = MarkQuerySet.as_manager()
+
     class Meta:
         unique_together = ['student', 'exam']
 
+    # percentage and grade come from the with_percentage()/with_grade()
+    # annotations when present and are computed here otherwise
+
     @property
     def percentage(self):
+        if '_percentage' in self.__dict__:
+            return self._percentage
         return (self.marks_obtained / self.exam.max_marks) * 100
 
+    @percentage.setter
+    def percentage(self, value):
+        self._percentage = value
+
     @property
     def grade(self):
-        percentage = self.percentage
-        if percentage >= 90:
-            return 'A+'
-        elif percentage >= 80:
-            return 'A'
-        elif percentage >= 70:
-            return 'B+'
-        elif percentage >= 60:
-            return 'B'
-        elif percentage >= 50:
-            return 'C'
-        elif percentage >= 40:
-            return 'D'
-        else:
-            return 'F'
+        if '_grade' in self.__dict__:
+            return self._grade
+        return grading.grade_for(self.percentage)
+
+    @grade.setter
+    def grade(self, value):
+        self._grade = value
 
     def __str__(self):
         return f"{self.student.full_name} - {self.exam.subject.name} - {self.marks_obtained}/{self.exam.max_marks}"
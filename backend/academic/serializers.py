@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import ExamType, Exam, Mark, AcademicYear, ClassSubject, Class, Section, Subject
+from .models import ExamType, Exam, Mark, AcademicYear, ClassSubject, GradeScale, Class, Section, Subject
 from core.models import StudentProfile, TeacherProfile
 
 class StudentProfileSerializer(serializers.ModelSerializer):
@@ -40,6 +40,11 @@ class ExamTypeSerializer(serializers.ModelSerializer):
         model = ExamType
         fields = ['id', 'name', 'description', 'weightage']
 
+class GradeScaleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = GradeScale
+        fields = ['id', 'grade', 'min_percentage']
+
 class ExamSerializer(serializers.ModelSerializer):
     exam_type_name = serializers.CharField(source='exam_type.name', read_only=True)
     subject_name = serializers.CharField(source='subject.name', read_only=True)
@@ -0,0 +1,8 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import GradeScale
+from . import grading
+
+@receiver([post_save, post_delete], sender=GradeScale)
+def reset_grade_scale(sender, **kwargs):
+    grading.clear_grade_scale()
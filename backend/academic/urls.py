@@ -1,12 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
-    ExamTypeViewSet, ExamViewSet, MarkViewSet, AcademicYearViewSet, ClassSubjectViewSet,
+    ExamTypeViewSet, ExamViewSet, MarkViewSet, AcademicYearViewSet, ClassSubjectViewSet, GradeScaleViewSet,
     ClassViewSet, SectionViewSet, SubjectViewSet
 )
 
 router = DefaultRouter()
 router.register(r'exam-types', ExamTypeViewSet)
+router.register(r'grade-scales', GradeScaleViewSet)
 router.register(r'exams', ExamViewSet)
 router.register(r'marks', MarkViewSet)
 router.register(r'academic-years', AcademicYearViewSet)
@@ -1,15 +1,18 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q, Avg
-from .models import ExamType, Exam, Mark, AcademicYear, ClassSubject
+from django.db.models import Q, Avg, Count
+from .models import ExamType, Exam, Mark, AcademicYear, ClassSubject, GradeScale
 from core.models import Class, Section, StudentProfile, Subject
 from .serializers import (
     ExamTypeSerializer, ExamSerializer, MarkSerializer, AcademicYearSerializer, 
     ClassSubjectSerializer, ClassSerializer, SectionSerializer, SubjectSerializer,
-    StudentProfileSerializer
+    StudentProfileSerializer, GradeScaleSerializer
 )
 from core.permissions import IsDeveloper, IsPrincipal, IsTeacher, IsStudent, IsParent
+from core.scope import get_scope
+from .gradebook import grade_book
+from . import grading
 
 class SubjectViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Subject.objects.all()
@@ -38,6 +41,19 @@ class ExamTypeViewSet(viewsets.ModelViewSet):
             permission_classes = [permissions.IsAuthenticated]
         return [permission() for permission in permission_classes]
 
+class GradeScaleViewSet(viewsets.ModelViewSet):
+    queryset = GradeScale.objects.all()
+    serializer_class = GradeScaleSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
+
+    def get_permissions(self):
+        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+            permission_classes = [IsDeveloper | IsPrincipal]
+        else:
+            permission_classes = [permissions.IsAuthenticated]
+        return [permission() for permission in permission_classes]
+
 class ExamViewSet(viewsets.ModelViewSet):
     queryset = Exam.objects.all()
     serializer_class = ExamSerializer
@@ -53,24 +69,17 @@ class ExamViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         queryset = super().get_queryset()
         user = self.request.user
+        scope = get_scope(self.request)
         
-        if user.is_student:
-            student_profile = user.studentprofile
+        if user.is_student or user.is_parent:
             queryset = queryset.filter(
-                class_assigned=student_profile.class_assigned,
-                section=student_profile.section
+                class_assigned_id__in=scope.class_ids,
+                section_id__in=scope.section_ids
             )
         elif user.is_teacher:
-            teacher_profile = user.teacherprofile
-            queryset = queryset.filter(
-                Q(subject__in=teacher_profile.subjects.all()) |
-                Q(class_assigned__sections__in=teacher_profile.sections.all())
-            )
-        elif user.is_parent:
-            children = user.parentprofile.children.all()
             queryset = queryset.filter(
-                class_assigned__in=[child.class_assigned for child in children],
-                section__in=[child.section for child in children]
+                Q(subject_id__in=scope.subject_ids) |
+                Q(class_assigned_id__in=scope.class_ids)
             )
         
         return queryset
@@ -86,25 +95,48 @@ class MarkViewSet(viewsets.ModelViewSet):
     def get_permissions(self):
         if self.action in ['create', 'update', 'partial_update', 'destroy']:
             permission_classes = [IsTeacher | IsPrincipal]
+        elif self.action == 'grade_book':
+            permission_classes = [IsDeveloper | IsPrincipal | IsTeacher]
         else:
             permission_classes = [permissions.IsAuthenticated]
         return [permission() for permission in permission_classes]
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        # percentage and grade are annotated in SQL, so they can be filtered on
+        queryset = super().get_queryset().with_grade().select_related(
+            'student__user', 'exam__exam_type', 'exam__subject', 'teacher__user'
+        )
         user = self.request.user
+        scope = get_scope(self.request)
         
-        if user.is_student:
-            queryset = queryset.filter(student=user.studentprofile)
+        if user.is_student or user.is_parent:
+            queryset = queryset.filter(student_id__in=scope.children_ids)
         elif user.is_teacher:
-            teacher_profile = user.teacherprofile
-            queryset = queryset.filter(teacher=teacher_profile)
-        elif user.is_parent:
-            children = user.parentprofile.children.all()
-            queryset = queryset.filter(student__in=children)
+            queryset = queryset.filter(teacher_id=scope.profile_id)
+
+        params = self.request.query_params
+        if params.get('grade'):
+            queryset = queryset.filter(grade=params['grade'])
+        if params.get('subject_id'):
+            queryset = queryset.filter(exam__subject_id=params['subject_id'])
+        if params.get('exam_id'):
+            queryset = queryset.filter(exam_id=params['exam_id'])
+        if params.get('section_id'):
+            queryset = queryset.filter(exam__section_id=params['section_id'])
         
         return queryset
 
+    @action(detail=False, methods=['get'])
+    def grade_distribution(self, request):
+        """Number of marks per grade, filtered like the list"""
+        counts = dict(
+            self.get_queryset().order_by().values_list('grade').annotate(count=Count('id'))
+        )
+        return Response([
+            {'grade': grade, 'count': counts.get(grade, 0)}
+            for _, grade in grading.grade_scale()
+        ])
+
     @action(detail=False, methods=['get'])
     def student_performance(self, request):
         """Get performance statistics for students"""
@@ -112,7 +144,7 @@ class MarkViewSet(viewsets.ModelViewSet):
         if not student_id:
             return Response({'error': 'student_id is required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        marks = self.get_queryset().filter(student_id=student_id)
+        marks = self.get_queryset().filter(student_id=student_id).select_related('exam__subject', 'exam__exam_type')
         
         performance_data = {
             'total_exams': marks.count(),
@@ -134,6 +166,31 @@ class MarkViewSet(viewsets.ModelViewSet):
         
         return Response(performance_data)
 
+    @action(detail=False, methods=['get'])
+    def grade_book(self, request):
+        """Student x subject x exam-type marks for a section and academic year"""
+        try:
+            section_id = int(request.query_params['section_id'])
+            year_id = request.query_params.get('academic_year_id')
+            year_id = int(year_id) if year_id else None
+        except (KeyError, ValueError):
+            return Response(
+                {'error': 'section_id is required; section_id and academic_year_id must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if request.user.is_teacher and section_id not in get_scope(request).section_ids:
+            return Response({'error': 'Not assigned to this section'}, status=status.HTTP_403_FORBIDDEN)
+
+        if year_id is not None:
+            academic_year = AcademicYear.objects.filter(id=year_id).first()
+        else:
+            academic_year = AcademicYear.objects.filter(is_current=True).first()
+        if academic_year is None:
+            return Response({'error': 'Academic year not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response(grade_book(section_id, academic_year))
+
 class AcademicYearViewSet(viewsets.ModelViewSet):
     queryset = AcademicYear.objects.all()
     serializer_class = AcademicYearSerializer
@@ -161,15 +218,14 @@ class ClassSubjectViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         queryset = super().get_queryset()
         user = self.request.user
+        scope = get_scope(self.request)
         
         if user.is_teacher:
-            teacher_profile = user.teacherprofile
-            queryset = queryset.filter(teacher=teacher_profile)
+            queryset = queryset.filter(teacher_id=scope.profile_id)
         elif user.is_student:
-            student_profile = user.studentprofile
             queryset = queryset.filter(
-                class_assigned=student_profile.class_assigned,
-                section=student_profile.section
+                class_assigned_id__in=scope.class_ids,
+                section_id__in=scope.section_ids
             )
         
         return queryset
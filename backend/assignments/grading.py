@@ -0,0 +1,119 @@
+"""Bulk grading of assignment submissions.
+
+Grades arrive as rows of submission_id, marks_obtained and feedback, from a
+JSON list or streamed from a CSV upload. Rows are handled in batches: each
+batch loads its submissions with their assignment's max_marks in one query,
+validates every row against them, and writes the valid ones with a single
+bulk_update. Invalid rows are reported and do not stop the rest. The
+submission counters are recounted once per batch, since bulk_update
+bypasses the signals that normally keep them current.
+"""
+import csv
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import AssignmentSubmission
+from .stats import refresh_counters
+
+BATCH_SIZE = 500
+
+GRADED_FIELDS = ['marks_obtained', 'feedback', 'graded_by', 'graded_at', 'status', 'updated_at']
+
+
+def parse_marks(value, max_marks):
+    """Marks as a Decimal within 0..max_marks; raises ValueError"""
+    try:
+        marks = Decimal(str(value).strip())
+    except (InvalidOperation, TypeError):
+        raise ValueError('Invalid marks value')
+    if not marks.is_finite() or marks < 0 or marks > max_marks:
+        raise ValueError(f'Marks must be between 0 and {max_marks}')
+    return marks.quantize(Decimal('0.01'))
+
+
+def _grade_batch(batch, submissions, grader_id):
+    """Validate and write one batch of (line, row) pairs. Returns per-row results."""
+    ids = {}
+    results = []
+    for line, row in batch:
+        try:
+            ids[line] = int(row.get('submission_id'))
+        except (TypeError, ValueError):
+            results.append({'line': line, 'submission_id': row.get('submission_id'),
+                            'status': 'error', 'error': 'Invalid submission_id'})
+
+    found = {
+        submission.pk: submission
+        for submission in submissions.filter(pk__in=set(ids.values())).order_by()
+        .select_related(None).select_related('assignment').only('id', 'assignment', 'assignment__max_marks')
+    }
+    now = timezone.now()
+    graded = {}
+    for line, row in batch:
+        if line not in ids:
+            continue
+        submission_id = ids[line]
+        result = {'line': line, 'submission_id': submission_id}
+        submission = found.get(submission_id)
+        try:
+            if submission is None:
+                raise ValueError('Submission not found')
+            if submission_id in graded:
+                raise ValueError('Submission is graded twice in this batch')
+            submission.marks_obtained = parse_marks(row.get('marks_obtained'), submission.assignment.max_marks)
+        except ValueError as exc:
+            results.append({**result, 'status': 'error', 'error': str(exc)})
+            continue
+        submission.feedback = row.get('feedback') or ''
+        submission.graded_by_id = grader_id
+        submission.graded_at = now
+        submission.updated_at = now
+        submission.status = 'graded'
+        graded[submission_id] = submission
+        results.append({**result, 'status': 'graded', 'marks_obtained': submission.marks_obtained})
+
+    if graded:
+        with transaction.atomic():
+            AssignmentSubmission.objects.bulk_update(graded.values(), GRADED_FIELDS)
+            refresh_counters({submission.assignment_id for submission in graded.values()})
+    results.sort(key=lambda result: result['line'])
+    return results
+
+
+def grade(rows, submissions, grader_id=None, batch_size=BATCH_SIZE):
+    """
+    Grade rows (dicts with submission_id, marks_obtained and feedback)
+    against the submissions queryset the grader may change. Yields one
+    result per row, in order, with its 1-based position as 'line'.
+    """
+    batch = []
+    for line, row in enumerate(rows, start=1):
+        batch.append((line, row))
+        if len(batch) == batch_size:
+            yield from _grade_batch(batch, submissions, grader_id)
+            batch = []
+    if batch:
+        yield from _grade_batch(batch, submissions, grader_id)
+
+
+def grade_csv(lines, submissions, grader_id=None, batch_size=BATCH_SIZE):
+    """
+    Grade from an iterable of CSV lines with submission_id, marks_obtained
+    and (optionally) feedback columns. Returns totals and the failed rows,
+    numbered by file line.
+    """
+    reader = csv.DictReader(lines)
+    missing = {'submission_id', 'marks_obtained'} - set(reader.fieldnames or [])
+    if missing:
+        raise ValueError(f"Missing CSV columns: {', '.join(sorted(missing))}")
+    summary = {'rows': 0, 'graded': 0, 'errors': []}
+    for result in grade(reader, submissions, grader_id, batch_size):
+        summary['rows'] += 1
+        if result['status'] == 'graded':
+            summary['graded'] += 1
+        else:
+            # Line 1 is the header
+            summary['errors'].append({**result, 'line': result['line'] + 1})
+    return summary
@@ -0,0 +1,122 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from assignments import stats
+from assignments.models import Assignment, AssignmentSubmission
+from assignments.views import AssignmentViewSet
+from core.benchmark import build_section, measure, rolled_back
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure assignment statistics and the teacher and student assignment lists as '
+        'submissions grow, and check the denormalized counters against the aggregate'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[40, 200, 1000])
+        parser.add_argument('--assignments', type=int, default=20)
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        list_view = AssignmentViewSet.as_view({'get': 'list'})
+        stats_view = AssignmentViewSet.as_view({'get': 'statistics'})
+
+        self.stdout.write(f"{'students':>8} {'endpoint':>12} {'queries':>8} {'ms':>9}")
+        for size in options['sizes']:
+            with rolled_back():
+                fixture = build_section(size)
+                now = timezone.now()
+                assignments = [
+                    Assignment.objects.create(
+                        title=f'Bench {n}', description='', subject=fixture['subject'],
+                        class_assigned=fixture['class'], section=fixture['section'],
+                        teacher=fixture['teacher'], due_date=now, max_marks=100, status='assigned'
+                    )
+                    for n in range(options['assignments'])
+                ]
+                # Every assignment gets submissions from 90% of the students;
+                # a third of them late and half of them graded
+                for assignment in assignments:
+                    AssignmentSubmission.objects.bulk_create([
+                        AssignmentSubmission(
+                            assignment=assignment, student=student,
+                            marks_obtained=50 if i % 2 else None
+                        )
+                        for i, student in enumerate(fixture['students']) if i % 10
+                    ])
+                AssignmentSubmission.objects.filter(assignment__in=assignments).update(
+                    submitted_at=now - datetime.timedelta(hours=1)
+                )
+                AssignmentSubmission.objects.filter(
+                    assignment__in=assignments, student__in=fixture['students'][::3]
+                ).update(submitted_at=now + datetime.timedelta(hours=1))
+                with measure() as refreshed:
+                    stats.refresh_counters([a.pk for a in assignments])
+
+                request = factory.get('/api/assignments/assignments/')
+                force_authenticate(request, user=fixture['teacher_user'])
+                with measure() as listed:
+                    response = list_view(request)
+                    response.render()
+                self.stdout.write(f"{size:>8} {'list':>12} {listed['queries']:>8} {listed['ms']:>9.1f}")
+
+                # Students only see assignments that are out of draft
+                Assignment.objects.filter(pk=assignments[-1].pk).update(status='draft')
+                request = factory.get('/api/assignments/assignments/')
+                force_authenticate(request, user=fixture['students'][0].user)
+                with measure() as student_listed:
+                    student_response = list_view(request)
+                    student_response.render()
+                self.stdout.write(
+                    f"{size:>8} {'student list':>12} {student_listed['queries']:>8} {student_listed['ms']:>9.1f}"
+                )
+
+                request = factory.get('/')
+                force_authenticate(request, user=fixture['teacher_user'])
+                with measure() as counted:
+                    statistics = stats_view(request, pk=assignments[0].pk).data
+                self.stdout.write(f"{size:>8} {'statistics':>12} {counted['queries']:>8} {counted['ms']:>9.1f}")
+                self.stdout.write(
+                    f"{size:>8} {'refresh':>12} {refreshed['queries']:>8} {refreshed['ms']:>9.1f}"
+                    f"  ({len(assignments)} assignments)"
+                )
+
+                # Grading one submission goes through the signal
+                submission = AssignmentSubmission.objects.filter(
+                    assignment=assignments[0], marks_obtained__isnull=True
+                ).first()
+                submission.marks_obtained = 70
+                with measure() as graded:
+                    submission.save()
+                self.stdout.write(f"{size:>8} {'grade one':>12} {graded['queries']:>8} {graded['ms']:>9.1f}")
+
+                rows = {row['id']: row for row in response.data['results']} \
+                    if isinstance(response.data, dict) else {row['id']: row for row in response.data}
+                first = rows[assignments[0].pk]
+                late = len([i for i in range(0, size, 3) if i % 10])
+                expected = {
+                    'submitted_count': size - len(range(0, size, 10)),
+                    'late_submissions': late,
+                }
+                problems = []
+                if student_response.status_code != 200:
+                    problems.append(f'student list answered {student_response.status_code}')
+                else:
+                    data = student_response.data
+                    seen = len(data['results'] if isinstance(data, dict) else data)
+                    if seen != len(assignments) - 1:
+                        problems.append(f'student list shows {seen} of {len(assignments) - 1} assignments')
+                if statistics['submitted_count'] != expected['submitted_count'] or \
+                        statistics['late_submissions'] != expected['late_submissions']:
+                    problems.append(f'statistics {statistics} != {expected}')
+                if first['submission_count'] != statistics['submitted_count'] or first['late_count'] != late:
+                    problems.append(f"counters {first['submission_count']}/{first['late_count']} disagree")
+                assignments[0].refresh_from_db()
+                if assignments[0].graded_count != statistics['graded_count'] + 1:
+                    problems.append('grading did not update graded_count')
+                if problems:
+                    raise CommandError('; '.join(problems))
@@ -0,0 +1,87 @@
+import io
+import random
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from assignments.models import Assignment, AssignmentSubmission
+from assignments.views import SubmissionViewSet
+from core.benchmark import build_section, measure, rolled_back
+
+
+class Command(BaseCommand):
+    help = (
+        'Grade every submission of an assignment one request at a time, in one bulk '
+        'request and from a CSV upload, and compare queries and latency'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[40, 120, 1000])
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        # The router passes each action's own kwargs (parser_classes) to as_view
+        views = {
+            name: SubmissionViewSet.as_view({'post': name}, **getattr(SubmissionViewSet, name).kwargs)
+            for name in ['grade', 'bulk_grade', 'import_grades']
+        }
+
+        self.stdout.write(f"{'submissions':>11} {'method':>14} {'requests':>9} {'queries':>8} {'ms':>9}")
+        for size in options['sizes']:
+            with rolled_back():
+                fixture = build_section(size)
+                assignment = Assignment.objects.create(
+                    title='Bench', description='', subject=fixture['subject'],
+                    class_assigned=fixture['class'], section=fixture['section'],
+                    teacher=fixture['teacher'], due_date=timezone.now(), max_marks=100, status='assigned'
+                )
+                AssignmentSubmission.objects.bulk_create([
+                    AssignmentSubmission(assignment=assignment, student=student)
+                    for student in fixture['students']
+                ])
+                ids = list(AssignmentSubmission.objects.filter(assignment=assignment).values_list('pk', flat=True))
+                marks = {pk: random.randint(0, 100) for pk in ids}
+
+                def post(name, data, fmt, **kwargs):
+                    request = factory.post('/', data, format=fmt)
+                    force_authenticate(request, user=fixture['teacher_user'])
+                    response = views[name](request, **kwargs)
+                    if response.status_code != 200:
+                        raise CommandError(f'{name}: {response.status_code} {response.data}')
+                    return response.data
+
+                with measure() as single:
+                    for pk in ids:
+                        post('grade', {'marks_obtained': marks[pk], 'feedback': 'ok'}, 'multipart', pk=pk)
+                self.report(size, 'one by one', len(ids), single)
+
+                with measure() as bulk:
+                    data = post('bulk_grade', {'grades': [
+                        {'submission_id': pk, 'marks_obtained': marks[pk], 'feedback': 'Good work'} for pk in ids
+                    ] + [{'submission_id': 0, 'marks_obtained': 1}, {'submission_id': ids[0], 'marks_obtained': 101}]},
+                        'json')
+                self.report(size, 'bulk', 1, bulk)
+                if data['graded'] != len(ids) or data['failed'] != 2:
+                    raise CommandError(f"bulk graded {data['graded']}, failed {data['failed']}")
+
+                csv_file = io.StringIO()
+                csv_file.write('submission_id,marks_obtained,feedback\n')
+                for pk in ids:
+                    csv_file.write(f'{pk},{marks[pk]},"Well done, see notes"\n')
+                upload = SimpleUploadedFile('grades.csv', csv_file.getvalue().encode(), content_type='text/csv')
+                with measure() as imported:
+                    data = post('import_grades', {'file': upload}, 'multipart')
+                self.report(size, 'csv import', 1, imported)
+                if data['graded'] != len(ids) or data['errors']:
+                    raise CommandError(f"csv graded {data['graded']} with errors {data['errors'][:3]}")
+
+                assignment.refresh_from_db()
+                stored = dict(AssignmentSubmission.objects.filter(assignment=assignment)
+                              .values_list('pk', 'marks_obtained'))
+                if assignment.graded_count != len(ids) or any(stored[pk] != marks[pk] for pk in ids):
+                    raise CommandError('grades or graded_count not stored as sent')
+
+    def report(self, size, label, requests, stats):
+        self.stdout.write(f"{size:>11} {label:>14} {requests:>9} {stats['queries']:>8} {stats['ms']:>9.1f}")
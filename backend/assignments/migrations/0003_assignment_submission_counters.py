@@ -0,0 +1,49 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:19
+
+from django.db import migrations, models
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_submissions(apps, schema_editor):
+    Assignment = apps.get_model('assignments', 'Assignment')
+    AssignmentSubmission = apps.get_model('assignments', 'AssignmentSubmission')
+
+    def counted(condition=Q()):
+        return Coalesce(Subquery(
+            AssignmentSubmission.objects.filter(condition, assignment=OuterRef('pk')).order_by()
+            .values('assignment').annotate(n=Count('pk')).values('n')[:1],
+            output_field=IntegerField()
+        ), 0)
+
+    Assignment.objects.update(
+        submitted_count=counted(),
+        graded_count=counted(Q(marks_obtained__isnull=False)),
+        late_count=counted(Q(submitted_at__gt=F('assignment__due_date'))),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignments', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assignment',
+            name='graded_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='assignment',
+            name='late_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='assignment',
+            name='submitted_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_submissions, migrations.RunPython.noop),
+    ]
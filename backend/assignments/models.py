@@ -28,6 +28,10 @@ class Assignment(models.Model):
     )
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
     allow_late_submission = models.BooleanField(default=False)
+    # Submission counters for list views, kept current by assignments.stats.refresh_counters
+    submitted_count = models.PositiveIntegerField(default=0, editable=False)
+    graded_count = models.PositiveIntegerField(default=0, editable=False)
+    late_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -14,7 +14,7 @@ class AssignmentSerializer(serializers.ModelSerializer):
     class_name = serializers.CharField(source='class_assigned.name', read_only=True)
     section_name = serializers.CharField(source='section.name', read_only=True)
     resources = AssignmentResourceSerializer(many=True, read_only=True)
-    submission_count = serializers.SerializerMethodField()
+    submission_count = serializers.IntegerField(source='submitted_count', read_only=True)
     total_students = serializers.SerializerMethodField()
 
     class Meta:
@@ -23,16 +23,15 @@ class AssignmentSerializer(serializers.ModelSerializer):
             'id', 'title', 'description', 'teacher', 'teacher_name',
             'subject', 'subject_name', 'class_assigned', 'class_name',
             'section', 'section_name', 'due_date', 'max_marks',
-            'instructions', 'is_active', 'resources', 'submission_count',
-            'total_students', 'created_at', 'updated_at'
+            'instructions', 'status', 'resources', 'submission_count',
+            'graded_count', 'late_count', 'total_students', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['teacher', 'created_at', 'updated_at']
-
-    def get_submission_count(self, obj):
-        return obj.submissions.count()
+        read_only_fields = ['teacher', 'graded_count', 'late_count', 'created_at', 'updated_at']
 
     def get_total_students(self, obj):
-        return obj.section.studentprofile_set.count()
+        # Annotated by AssignmentViewSet.get_queryset
+        count = getattr(obj, 'total_students', None)
+        return obj.section.studentprofile_set.count() if count is None else count
 
 class SubmissionSerializer(serializers.ModelSerializer):
     student_name = serializers.CharField(source='student.full_name', read_only=True)
@@ -44,7 +43,7 @@ class SubmissionSerializer(serializers.ModelSerializer):
         model = AssignmentSubmission
         fields = [
             'id', 'assignment', 'assignment_title', 'student', 'student_name',
-            'student_roll', 'file', 'text_submission', 'submitted_at',
+            'student_roll', 'attachment', 'submission_text', 'submitted_at',
             'marks_obtained', 'feedback', 'graded_by', 'graded_by_name',
             'graded_at', 'is_late'
         ]
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Assignment, AssignmentSubmission
+from . import stats
+
+COUNTERS = {'submitted_count', 'graded_count', 'late_count'}
+
+@receiver([post_save, post_delete], sender=AssignmentSubmission)
+def refresh_submission_counters(sender, instance, **kwargs):
+    stats.refresh_counters([instance.assignment_id])
+
+@receiver(post_save, sender=Assignment)
+def refresh_assignment_counters(sender, instance, created, update_fields=None, **kwargs):
+    # A full save writes back the counters as loaded, and due_date decides lateness
+    if created or (update_fields is not None and not ({'due_date'} | COUNTERS) & set(update_fields)):
+        return
+    stats.refresh_counters([instance.pk])
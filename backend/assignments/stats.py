@@ -0,0 +1,69 @@
+"""Assignment submission statistics.
+
+A submission is late when submitted_at is past the assignment's due_date,
+and graded once it has marks; both are evaluated in SQL, so statistics()
+counts everything in a single conditional aggregate.
+
+Assignment.submitted_count, graded_count and late_count hold the same
+counts for list views. refresh_counters() recomputes them with one UPDATE
+of correlated subqueries; the submission signals call it for single saves
+and deletes, the assignment signal after saves that may have written stale
+counters or moved due_date, and bulk writers (which bypass signals) call it
+themselves.
+Recounting instead of incrementing keeps the counters exact when
+submissions are edited concurrently.
+"""
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from core.models import StudentProfile
+from core.querysets import related_count
+from .models import Assignment, AssignmentSubmission
+
+LATE = Q(submitted_at__gt=F('assignment__due_date'))
+GRADED = Q(marks_obtained__isnull=False)
+
+
+def section_size():
+    """Correlated count of the students in the outer assignment's section"""
+    return Coalesce(
+        Subquery(
+            StudentProfile.objects.filter(section=OuterRef('section')).order_by()
+            .values('section').annotate(n=Count('pk')).values('n')[:1],
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def statistics(assignment):
+    """Submission statistics of an assignment, counted in one aggregate"""
+    counts = AssignmentSubmission.objects.filter(assignment=assignment).aggregate(
+        submitted=Count('pk'),
+        graded=Count('pk', filter=GRADED),
+        late=Count('pk', filter=LATE),
+    )
+    # Annotated by AssignmentViewSet.get_queryset
+    total = getattr(assignment, 'total_students', None)
+    if total is None:
+        total = assignment.section.studentprofile_set.count()
+    submitted, graded = counts['submitted'], counts['graded']
+    return {
+        'total_students': total,
+        'submitted_count': submitted,
+        'pending_submissions': max(total - submitted, 0),
+        'graded_count': graded,
+        'pending_grading': submitted - graded,
+        'late_submissions': counts['late'],
+        'submission_rate': (submitted / total * 100) if total > 0 else 0,
+    }
+
+
+def refresh_counters(assignment_ids):
+    """Recount the denormalized submission counters of the given assignments"""
+    submissions = AssignmentSubmission.objects.all()
+    return Assignment.objects.filter(pk__in=list(assignment_ids)).update(
+        submitted_count=related_count(submissions, 'assignment'),
+        graded_count=related_count(submissions.filter(GRADED), 'assignment'),
+        late_count=related_count(submissions.filter(LATE), 'assignment'),
+    )
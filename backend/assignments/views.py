@@ -1,12 +1,16 @@
+import io
+
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
 from django.db.models import Q, Count
 from django.utils import timezone
 from .models import Assignment, AssignmentSubmission, AssignmentResource
 from .serializers import AssignmentSerializer, SubmissionSerializer, AssignmentResourceSerializer
+from . import grading, stats
 from core.permissions import IsDeveloper, IsPrincipal, IsTeacher, IsStudent, IsParent
+from core.scope import get_scope
 
 class AssignmentViewSet(viewsets.ModelViewSet):
     queryset = Assignment.objects.all()
@@ -22,26 +26,19 @@ class AssignmentViewSet(viewsets.ModelViewSet):
         return [permission() for permission in permission_classes]
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().select_related(
+            'teacher__user', 'subject', 'class_assigned', 'section'
+        ).prefetch_related('resources').annotate(total_students=stats.section_size())
         user = self.request.user
+        scope = get_scope(self.request)
 
-        if user.is_student:
-            student_profile = user.studentprofile
+        if user.is_student or user.is_parent:
             queryset = queryset.filter(
-                class_assigned=student_profile.class_assigned,
-                section=student_profile.section,
-                is_active=True
-            )
+                class_assigned_id__in=scope.class_ids,
+                section_id__in=scope.section_ids,
+            ).exclude(status__in=['draft', 'cancelled'])
         elif user.is_teacher:
-            teacher_profile = user.teacherprofile
-            queryset = queryset.filter(teacher=teacher_profile)
-        elif user.is_parent:
-            children = user.parentprofile.children.all()
-            queryset = queryset.filter(
-                class_assigned__in=[child.class_assigned for child in children],
-                section__in=[child.section for child in children],
-                is_active=True
-            )
+            queryset = queryset.filter(teacher_id=scope.profile_id)
 
         return queryset.order_by('-created_at')
 
@@ -71,7 +68,7 @@ class AssignmentViewSet(viewsets.ModelViewSet):
     def submissions(self, request, pk=None):
         """Get all submissions for an assignment"""
         assignment = self.get_object()
-        submissions = assignment.submissions.all()
+        submissions = assignment.submissions.select_related('student__user', 'assignment', 'graded_by__user')
         serializer = SubmissionSerializer(submissions, many=True)
         return Response(serializer.data)
 
@@ -79,23 +76,7 @@ class AssignmentViewSet(viewsets.ModelViewSet):
     def statistics(self, request, pk=None):
         """Get statistics for an assignment"""
         assignment = self.get_object()
-
-        total_students = assignment.section.studentprofile_set.count()
-        submitted_count = assignment.submissions.count()
-        graded_count = assignment.submissions.filter(marks_obtained__isnull=False).count()
-        late_submissions = assignment.submissions.filter(is_late=True).count()
-
-        stats = {
-            'total_students': total_students,
-            'submitted_count': submitted_count,
-            'pending_submissions': total_students - submitted_count,
-            'graded_count': graded_count,
-            'pending_grading': submitted_count - graded_count,
-            'late_submissions': late_submissions,
-            'submission_rate': (submitted_count / total_students * 100) if total_students > 0 else 0
-        }
-
-        return Response(stats)
+        return Response(stats.statistics(assignment))
 
 class SubmissionViewSet(viewsets.ModelViewSet):
     queryset = AssignmentSubmission.objects.all()
@@ -104,24 +85,21 @@ class SubmissionViewSet(viewsets.ModelViewSet):
     parser_classes = [MultiPartParser, FormParser]
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().select_related('student__user', 'assignment', 'graded_by__user')
         user = self.request.user
+        scope = get_scope(self.request)
 
-        if user.is_student:
-            queryset = queryset.filter(student=user.studentprofile)
+        if user.is_student or user.is_parent:
+            queryset = queryset.filter(student_id__in=scope.children_ids)
         elif user.is_teacher:
-            teacher_profile = user.teacherprofile
-            queryset = queryset.filter(assignment__teacher=teacher_profile)
-        elif user.is_parent:
-            children = user.parentprofile.children.all()
-            queryset = queryset.filter(student__in=children)
+            queryset = queryset.filter(assignment__teacher_id=scope.profile_id)
 
         return queryset.order_by('-submitted_at')
 
     def get_permissions(self):
         if self.action == 'create':
             permission_classes = [IsStudent]
-        elif self.action in ['update', 'partial_update']:
+        elif self.action in ['update', 'partial_update', 'bulk_grade', 'import_grades']:
             permission_classes = [IsTeacher | IsPrincipal]
         elif self.action == 'destroy':
             permission_classes = [IsStudent | IsTeacher | IsPrincipal]
@@ -155,4 +133,35 @@ class SubmissionViewSet(viewsets.ModelViewSet):
         submission.save()
 
         serializer = self.get_serializer(submission)
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serializer.data)
+
+    def _grader_id(self):
+        # Principals may grade too, but have no teacher profile to record
+        return get_scope(self.request).profile_id if self.request.user.is_teacher else None
+
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser])
+    def bulk_grade(self, request):
+        """Grade many submissions: {"grades": [{submission_id, marks_obtained, feedback}]}"""
+        rows = request.data.get('grades') if isinstance(request.data, dict) else request.data
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            return Response({'error': 'grades must be a list of objects'}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = list(grading.grade(rows, self.get_queryset(), self._grader_id()))
+        graded = sum(result['status'] == 'graded' for result in results)
+        return Response({'graded': graded, 'failed': len(results) - graded, 'results': results})
+
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser])
+    def import_grades(self, request):
+        """Grade from an uploaded CSV ('file') with submission_id, marks_obtained and feedback columns"""
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'Upload a grades CSV as "file"'}, status=status.HTTP_400_BAD_REQUEST)
+
+        lines = io.TextIOWrapper(upload, encoding='utf-8-sig', newline='')
+        try:
+            result = grading.grade_csv(lines, self.get_queryset(), self._grader_id())
+        except UnicodeDecodeError:
+            return Response({'error': 'Grades file must be UTF-8 CSV'}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import AttendanceRecord, AttendanceSummary, AttendanceStatus
+from .models import AttendanceRecord, AttendanceSummary, AttendanceStatus, TeacherAttendance
 
 @admin.register(AttendanceStatus)
 class AttendanceStatusAdmin(admin.ModelAdmin):
@@ -19,4 +19,12 @@ class AttendanceSummaryAdmin(admin.ModelAdmin):
     list_display = ('student', 'month', 'year', 'total_days', 'present_days', 'absent_days', 'attendance_percentage')
     list_filter = ('month', 'year')
     search_fields = ('student__user__first_name', 'student__user__last_name')
-    ordering = ('-year', '-month', 'student__user__first_name')
\ No newline at end of file
+    ordering = ('-year', '-month', 'student__user__first_name')
+
+@admin.register(TeacherAttendance)
+class TeacherAttendanceAdmin(admin.ModelAdmin):
+    list_display = ('teacher', 'date', 'status', 'check_in_time', 'check_out_time', 'marked_by')
+    list_filter = ('status', 'date')
+    search_fields = ('teacher__user__first_name', 'teacher__user__last_name', 'teacher__employee_id')
+    date_hierarchy = 'date'
+    ordering = ('-date', 'teacher__user__first_name')
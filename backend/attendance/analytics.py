@@ -0,0 +1,261 @@
+"""Absenteeism analytics for a section over a date range.
+
+All of a section's records in the range are read in one values_list of
+(student, date, period, is_present) and rolled up with NumPy:
+
+- a student is absent on a day when none of their records that day is a
+  present status; attendance percentages count such days
+- absence streaks are runs of consecutive absent days among the days the
+  student was marked, so weekends and holidays do not break a streak
+- the heatmap counts absent records per weekday x period
+- students below the chronic threshold (75% by default) are flagged
+
+Results are cached per section for the rest of the day, under a version
+that is bumped whenever the section's attendance changes.
+
+chronic_absentees() runs the same per-student rollup over many sections at
+once, keyed on (section, student), for school-wide lists.
+"""
+import datetime
+import time
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import AttendanceRecord, StudentProfile
+
+try:
+    import numpy as np
+except ImportError:  # analytics are unavailable without numpy
+    np = None
+
+CHRONIC_THRESHOLD = 75
+WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+
+def _version_key(section_id):
+    return f'attendance:analytics:version:{section_id}'
+
+
+def invalidate(section_id):
+    try:
+        cache.incr(_version_key(section_id))
+    except ValueError:
+        cache.add(_version_key(section_id), int(time.time() * 1000), None)
+
+
+def _version(section_id):
+    version = cache.get(_version_key(section_id))
+    if version is None:
+        # Seed from the clock so a version lost to eviction never repeats
+        cache.add(_version_key(section_id), int(time.time() * 1000), None)
+        version = cache.get(_version_key(section_id))
+    return version
+
+
+def _group_starts(*keys):
+    """Mask of the positions where a run of equal keys begins, for sorted keys"""
+    starts = np.zeros(len(keys[0]), dtype=bool)
+    starts[:1] = True
+    for key in keys:
+        starts[1:] |= key[1:] != key[:-1]
+    return starts
+
+
+def _seconds_until_midnight():
+    now = timezone.localtime()
+    midnight = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time(), now.tzinfo)
+    return max(int((midnight - now).total_seconds()), 1)
+
+
+def _student_days(keys, record_keys, days, present):
+    """
+    Per key (a student, or a student in a section), from its records: days
+    marked, days present, attendance percentage and the longest and current
+    absence streaks. keys are distinct; record_keys, days (ordinals) and
+    present describe one record each.
+    """
+    # Position of each record's key in keys
+    order = np.argsort(keys)
+    student_index = order[np.searchsorted(keys[order], record_keys)]
+
+    # One entry per (key, day): present if any record that day is present
+    by_day = np.lexsort((days, student_index))
+    day_first = _group_starts(student_index[by_day], days[by_day])
+    day_student = student_index[by_day][day_first]
+    day_group = np.cumsum(day_first) - 1
+    day_present = np.bincount(day_group, weights=present[by_day], minlength=len(day_student)) > 0
+    day_absent = ~day_present
+
+    count = len(keys)
+    marked = np.bincount(day_student, minlength=count)
+    attended = np.bincount(day_student, weights=day_present, minlength=count).astype(np.int64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percentage = np.round(attended * 100.0 / marked, 2)
+
+    # Runs of absent days: a run starts at an absent day that opens a
+    # key's days or follows a present day
+    new_student = _group_starts(day_student)
+    previous_absent = np.zeros_like(day_absent)
+    previous_absent[1:] = day_absent[:-1]
+    run_start = day_absent & (new_student | ~previous_absent)
+    run_id = np.cumsum(run_start)
+    run_lengths = np.bincount(run_id[day_absent], minlength=run_id[-1] + 1 if len(run_id) else 0)
+    longest = np.zeros(count, dtype=np.int64)
+    np.maximum.at(longest, day_student[run_start], run_lengths[run_id[run_start]])
+
+    # The current streak is the run that includes the key's last marked day
+    last_day = np.zeros_like(new_student)
+    last_day[:-1] = new_student[1:]
+    last_day[-1:] = True
+    ending_absent = np.flatnonzero(last_day & day_absent)
+    current = np.zeros(count, dtype=np.int64)
+    current[day_student[ending_absent]] = run_lengths[run_id[ending_absent]]
+    return marked, attended, percentage, longest, current
+
+
+def section_analytics(section_id, start, end, threshold=CHRONIC_THRESHOLD):
+    """Cached analytics() for the section, kept until midnight or the next change"""
+    key = (
+        f'attendance:analytics:{section_id}:{_version(section_id)}:'
+        f'{timezone.localdate()}:{start}:{end}:{threshold}'
+    )
+    result = cache.get(key)
+    if result is None:
+        result = analytics(section_id, start, end, threshold)
+        cache.set(key, result, _seconds_until_midnight())
+    return result
+
+
+def analytics(section_id, start, end, threshold=CHRONIC_THRESHOLD):
+    rows = list(
+        AttendanceRecord.objects.filter(section_id=section_id, date__range=(start, end))
+        .values_list('student_id', 'date', 'period', 'status__is_present')
+    )
+    roster = list(
+        StudentProfile.objects.filter(section_id=section_id)
+        .order_by('roll_number', 'id')
+        .values_list('id', 'roll_number', 'user__first_name', 'user__last_name')
+    )
+    # Students with records in the section who have since moved still count
+    student_ids = np.array(
+        [row[0] for row in roster] + sorted({row[0] for row in rows} - {row[0] for row in roster}),
+        dtype=np.int64
+    )
+    names = {row[0]: (row[1], f'{row[2]} {row[3]}'.strip()) for row in roster}
+
+    if rows:
+        students, dates, periods, present = (np.array(column) for column in zip(*rows))
+        students = students.astype(np.int64)
+        days = np.fromiter((d.toordinal() for d in dates), dtype=np.int64, count=len(rows))
+        periods = periods.astype(np.int64)
+        present = present.astype(bool)
+    else:
+        students = days = periods = np.zeros(0, dtype=np.int64)
+        present = np.zeros(0, dtype=bool)
+
+    marked, attended, percentage, longest, current = _student_days(student_ids, students, days, present)
+    chronic = (marked > 0) & (percentage < threshold)
+
+    # Weekday x period heatmap over records; date.toordinal() is 1 on a Monday
+    weekday = (days - 1) % 7
+    period_values = np.unique(periods)
+    period_index = np.searchsorted(period_values, periods)
+    cells = weekday * len(period_values) + period_index
+    shape = (7, len(period_values))
+    totals = np.bincount(cells, minlength=7 * len(period_values)).reshape(shape)
+    absences = np.bincount(cells[~present], minlength=7 * len(period_values)).reshape(shape)
+    weekdays_seen = np.flatnonzero(totals.sum(axis=1))
+
+    def rates(absent, total):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            values = np.round(absent * 100.0 / total, 2)
+        return [None if np.isnan(value) else float(value) for value in values.ravel()]
+
+    return {
+        'section': section_id,
+        'start': str(start),
+        'end': str(end),
+        'threshold': threshold,
+        'students': {
+            'id': student_ids.tolist(),
+            'roll_number': [names.get(pk, ('', ''))[0] for pk in student_ids.tolist()],
+            'name': [names.get(pk, ('', ''))[1] for pk in student_ids.tolist()],
+            'marked_days': marked.tolist(),
+            'present_days': attended.tolist(),
+            'percentage': [None if np.isnan(value) else float(value) for value in percentage],
+            'longest_absence_streak': longest.tolist(),
+            'current_absence_streak': current.tolist(),
+            'chronic': chronic.tolist(),
+        },
+        'chronic_absentees': student_ids[chronic].tolist(),
+        'heatmap': {
+            'weekdays': [WEEKDAYS[day] for day in weekdays_seen],
+            'periods': period_values.tolist(),
+            'absences': absences[weekdays_seen].tolist(),
+            'records': totals[weekdays_seen].tolist(),
+        },
+        'by_period': {
+            'period': period_values.tolist(),
+            'absences': absences.sum(axis=0).tolist(),
+            'records': totals.sum(axis=0).tolist(),
+            'absence_rate': rates(absences.sum(axis=0), totals.sum(axis=0)),
+        },
+        'by_weekday': {
+            'weekday': [WEEKDAYS[day] for day in weekdays_seen],
+            'absences': absences.sum(axis=1)[weekdays_seen].tolist(),
+            'records': totals.sum(axis=1)[weekdays_seen].tolist(),
+            'absence_rate': rates(absences.sum(axis=1)[weekdays_seen], totals.sum(axis=1)[weekdays_seen]),
+        },
+    }
+
+
+def chronic_absentees(section_ids, start, end, threshold=CHRONIC_THRESHOLD):
+    """
+    Students below the threshold in any of the sections, read with one
+    query over their records and one over their rosters. Rows come in
+    roster order, students who have since moved last.
+    """
+    rows = list(
+        AttendanceRecord.objects.filter(section_id__in=section_ids, date__range=(start, end))
+        .values_list('section_id', 'student_id', 'date', 'status__is_present')
+    )
+    roster = list(
+        StudentProfile.objects.filter(section_id__in=section_ids)
+        .order_by('roll_number', 'id')
+        .values_list('section_id', 'id', 'roll_number', 'user__first_name', 'user__last_name')
+    )
+
+    # A student is counted separately in each section they have records in
+    def pair(section_id, student_id):
+        return (section_id << 32) | student_id
+
+    roster_keys = [pair(row[0], row[1]) for row in roster]
+    moved = sorted({pair(row[0], row[1]) for row in rows} - set(roster_keys))
+    keys = np.array(roster_keys + moved, dtype=np.int64)
+    names = {pair(row[0], row[1]): (row[2], f'{row[3]} {row[4]}'.strip()) for row in roster}
+
+    if rows:
+        record_sections, students, dates, present = (np.array(column) for column in zip(*rows))
+        record_keys = (record_sections.astype(np.int64) << 32) | students.astype(np.int64)
+        days = np.fromiter((d.toordinal() for d in dates), dtype=np.int64, count=len(rows))
+        present = present.astype(bool)
+    else:
+        record_keys = days = np.zeros(0, dtype=np.int64)
+        present = np.zeros(0, dtype=bool)
+
+    marked, attended, percentage, longest, current = _student_days(keys, record_keys, days, present)
+    chronic = np.flatnonzero((marked > 0) & (percentage < threshold))
+    return [
+        {
+            'section_id': int(keys[i]) >> 32,
+            'student_id': int(keys[i]) & 0xFFFFFFFF,
+            'roll_number': names.get(int(keys[i]), ('', ''))[0],
+            'student_name': names.get(int(keys[i]), ('', ''))[1],
+            'percentage': float(percentage[i]),
+            'marked_days': int(marked[i]),
+            'longest_absence_streak': int(longest[i]),
+            'current_absence_streak': int(current[i]),
+        }
+        for i in chronic
+    ]
@@ -0,0 +1,112 @@
+"""Monthly attendance registers, streamed.
+
+A register has one row per student and one column per day of the month.
+Students and their records are both read with iterator() in (section,
+student) order and merged as the cursors advance, so a row is complete as
+soon as the records move past its student and only that row is held in
+memory, whatever the size of the school.
+
+Rows are written as CSV directly into the response, or into an openpyxl
+write-only workbook for XLSX. openpyxl keeps write-only rows in temporary
+files, so memory stays flat there too, but the workbook can only be sent
+once it has been saved.
+"""
+import calendar
+import csv
+import datetime
+import tempfile
+
+from .models import AttendanceRecord, AttendanceStatus, StudentProfile
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # XLSX export is unavailable without openpyxl
+    Workbook = None
+
+CHUNK_SIZE = 2000
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def register_rows(sections, year, month):
+    """
+    Header and one row per student of the given sections (a queryset) for
+    the month. A day cell holds the status codes of that day's records in
+    period order, repeated codes collapsed ('P', 'P/A').
+    """
+    days = calendar.monthrange(year, month)[1]
+    first, last = datetime.date(year, month, 1), datetime.date(year, month, days)
+    codes = dict(AttendanceStatus.objects.values_list('id', 'short_code'))
+    present = set(AttendanceStatus.objects.filter(is_present=True).values_list('id', flat=True))
+    section_ids = sections.values('id')
+
+    yield (
+        ['Class', 'Section', 'Roll No', 'Student ID', 'Name']
+        + [str(day) for day in range(1, days + 1)]
+        + ['Days Marked', 'Days Present', 'Percentage']
+    )
+
+    students = (
+        StudentProfile.objects.filter(section_id__in=section_ids)
+        .order_by('section_id', 'id')
+        .values_list(
+            'id', 'section_id', 'section__class_assigned__name', 'section__name',
+            'roll_number', 'student_id', 'user__first_name', 'user__last_name'
+        )
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    # Keyed on the student's current section so both cursors share one order
+    records = (
+        AttendanceRecord.objects.filter(student__section_id__in=section_ids, date__range=(first, last))
+        .order_by('student__section_id', 'student_id', 'date', 'period', 'id')
+        .values_list('student__section_id', 'student_id', 'date', 'status_id')
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+
+    record = next(records, None)
+    for student_pk, section_id, class_name, section_name, roll_number, student_id, first_name, last_name in students:
+        key = (section_id, student_pk)
+        cells = [[] for _ in range(days)]
+        while record is not None and (record[0], record[1]) <= key:
+            if (record[0], record[1]) == key:
+                cells[record[2].day - 1].append(record[3])
+            record = next(records, None)
+
+        marked = [statuses for statuses in cells if statuses]
+        attended = sum(1 for statuses in marked if present.intersection(statuses))
+        yield (
+            [class_name, section_name, roll_number, student_id, f'{first_name} {last_name}'.strip()]
+            + ['/'.join(dict.fromkeys(codes.get(status_id, '') for status_id in statuses)) for statuses in cells]
+            + [len(marked), attended, round(attended * 100 / len(marked), 2) if marked else '']
+        )
+
+
+class Echo:
+    """Pseudo-buffer whose write() returns the value, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    writer = csv.writer(Echo())
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_xlsx(rows, title='Attendance', chunk_size=64 * 1024):
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title)
+    for row in rows:
+        sheet.append(row)
+    with tempfile.TemporaryFile() as handle:
+        workbook.save(handle)
+        handle.seek(0)
+        while True:
+            chunk = handle.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
@@ -0,0 +1,62 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import build_section, measure, rolled_back
+from attendance import analytics
+from attendance.models import AttendanceRecord, AttendanceStatus
+
+
+class Command(BaseCommand):
+    help = 'Measure queries and latency of section attendance analytics over a term'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[40, 200, 1000])
+        parser.add_argument('--periods', type=int, default=6)
+
+    def handle(self, *args, **options):
+        if analytics.np is None:
+            raise CommandError('Attendance analytics require numpy')
+        start, end = datetime.date(2024, 4, 1), datetime.date(2024, 6, 30)
+        days = [
+            start + datetime.timedelta(days=offset) for offset in range((end - start).days + 1)
+            if (start + datetime.timedelta(days=offset)).weekday() < 5
+        ]
+
+        self.stdout.write(f"{'students':>8} {'records':>8} {'queries':>8} {'cold ms':>9} {'cached ms':>9}")
+        for size in options['sizes']:
+            with rolled_back():
+                fixture = build_section(size)
+                present, _ = AttendanceStatus.objects.get_or_create(
+                    short_code='P', defaults={'name': 'Present', 'is_present': True}
+                )
+                absent, _ = AttendanceStatus.objects.get_or_create(
+                    short_code='A', defaults={'name': 'Absent', 'is_present': False}
+                )
+                # unique_together is (student, date, subject), so one subject per period
+                subjects = [fixture['subject']] + [
+                    type(fixture['subject']).objects.create(
+                        name=f"{fixture['subject'].name} {period}", code=f"{fixture['subject'].code[:7]}-{period}"
+                    )
+                    for period in range(2, options['periods'] + 1)
+                ]
+                AttendanceRecord.objects.bulk_create([
+                    AttendanceRecord(
+                        student=student, class_assigned=fixture['class'], section=fixture['section'],
+                        subject=subject, date=day, period=period, marked_by=fixture['teacher'],
+                        status=absent if (i * 7 + day.toordinal() + period) % 9 == 0 else present,
+                    )
+                    for i, student in enumerate(fixture['students'])
+                    for day in days
+                    for period, subject in enumerate(subjects, start=1)
+                ], batch_size=2000)
+
+                analytics.invalidate(fixture['section'].id)
+                with measure() as cold:
+                    analytics.section_analytics(fixture['section'].id, start, end)
+                with measure() as cached:
+                    analytics.section_analytics(fixture['section'].id, start, end)
+                records = size * len(days) * len(subjects)
+                self.stdout.write(
+                    f"{size:>8} {records:>8} {cold['queries']:>8} {cold['ms']:>9.1f} {cached['ms']:>9.1f}"
+                )
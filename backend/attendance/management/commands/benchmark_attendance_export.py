@@ -0,0 +1,77 @@
+import datetime
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.benchmark import build_section, measure, rolled_back
+from core.models import School, User
+from attendance.models import AttendanceRecord, AttendanceStatus
+from attendance.views import AttendanceRecordViewSet
+
+
+class Command(BaseCommand):
+    help = 'Measure peak memory of the streamed monthly register as the school grows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sections', nargs='+', type=int, default=[1, 5, 20])
+        parser.add_argument('--students', type=int, default=40)
+        parser.add_argument('--file-type', default='csv', choices=['csv', 'xlsx'])
+
+    def handle(self, *args, **options):
+        view = AttendanceRecordViewSet.as_view({'get': 'monthly_register'})
+        factory = APIRequestFactory()
+
+        self.stdout.write(f"{'sections':>8} {'records':>8} {'queries':>8} {'ms':>9} {'KiB':>9} {'peak KiB':>9}")
+        for count in options['sections']:
+            with rolled_back():
+                school, principal, records = self.build(count, options['students'])
+                request = factory.get('/api/attendance/attendance/monthly_register/', {
+                    'year': 2024, 'month': 7, 'file_type': options['file_type'],
+                })
+                force_authenticate(request, user=principal)
+
+                tracemalloc.start()
+                with measure() as stats:
+                    response = view(request)
+                    if response.status_code != 200:
+                        tracemalloc.stop()
+                        raise CommandError(response.data['error'])
+                    size = sum(len(chunk) for chunk in response.streaming_content)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                self.stdout.write(
+                    f"{count:>8} {records:>8} {stats['queries']:>8} {stats['ms']:>9.1f} "
+                    f"{size / 1024:>9.1f} {peak / 1024:>9.1f}"
+                )
+
+    def build(self, sections, students):
+        """A school with `sections` sections, each student marked on every weekday of July 2024"""
+        school = School.objects.create(name='Bench Export School')
+        principal = User.objects.create(username=f'bench-p-{school.pk}', role='PRINCIPAL')
+        School.objects.filter(pk=school.pk).update(principal=principal)
+        present, _ = AttendanceStatus.objects.get_or_create(
+            short_code='P', defaults={'name': 'Present', 'is_present': True}
+        )
+        absent, _ = AttendanceStatus.objects.get_or_create(
+            short_code='A', defaults={'name': 'Absent', 'is_present': False}
+        )
+        days = [
+            datetime.date(2024, 7, day) for day in range(1, 32)
+            if datetime.date(2024, 7, day).weekday() < 5
+        ]
+
+        total = 0
+        for _ in range(sections):
+            fixture = build_section(students, school=school)
+            AttendanceRecord.objects.bulk_create([
+                AttendanceRecord(
+                    student=student, class_assigned=fixture['class'], section=fixture['section'],
+                    subject=fixture['subject'], date=day, marked_by=fixture['teacher'],
+                    status=absent if (i + day.day) % 7 == 0 else present,
+                )
+                for i, student in enumerate(fixture['students'])
+                for day in days
+            ], batch_size=1000)
+            total += len(fixture['students']) * len(days)
+        return school, principal, total
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.benchmark import build_section, measure, rolled_back
+from attendance.models import AttendanceStatus
+from attendance.views import AttendanceRecordViewSet
+
+
+class Command(BaseCommand):
+    help = 'Measure queries and latency of attendance bulk_mark as the section grows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[40, 100, 200, 400])
+
+    def handle(self, *args, **options):
+        view = AttendanceRecordViewSet.as_view({'post': 'bulk_mark'})
+        factory = APIRequestFactory()
+
+        self.stdout.write(f"{'students':>8} {'pass':>10} {'queries':>8} {'ms':>9}  result")
+        for size in options['sizes']:
+            with rolled_back():
+                fixture = build_section(size)
+                present, _ = AttendanceStatus.objects.get_or_create(
+                    short_code='P', defaults={'name': 'Present', 'is_present': True}
+                )
+                absent, _ = AttendanceStatus.objects.get_or_create(
+                    short_code='A', defaults={'name': 'Absent', 'is_present': False}
+                )
+
+                def post(status_for):
+                    payload = {
+                        'date': '2024-07-01',
+                        'period': 1,
+                        'subject': fixture['subject'].id,
+                        'class_assigned': fixture['class'].id,
+                        'section': fixture['section'].id,
+                        'attendance_data': [
+                            {'student': s.id, 'status': status_for(i)}
+                            for i, s in enumerate(fixture['students'])
+                        ],
+                    }
+                    request = factory.post('/api/attendance/attendance/bulk_mark/', payload, format='json')
+                    force_authenticate(request, user=fixture['teacher_user'])
+                    with measure() as stats:
+                        response = view(request)
+                    return stats, response.data
+
+                passes = [
+                    ('create', lambda i: present.id),
+                    ('unchanged', lambda i: present.id),
+                    ('update', lambda i: absent.id if i % 2 else present.id),
+                ]
+                for label, status_for in passes:
+                    stats, data = post(status_for)
+                    self.stdout.write(
+                        f"{size:>8} {label:>10} {stats['queries']:>8} {stats['ms']:>9.1f}  "
+                        f"created={data['created']} updated={data['updated']} unchanged={data['unchanged']}"
+                    )
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import User
+from attendance.punches import BATCH_SIZE, ingest_punches
+
+
+class Command(BaseCommand):
+    help = 'Ingest a biometric punch CSV into TeacherAttendance (first in, last out per teacher per day)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV with employee_id and timestamp (or date and time) columns')
+        parser.add_argument('--marked-by', required=True, help='Username recorded as marking new rows')
+        parser.add_argument('--school-id', type=int, help='Only accept teachers of this school')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        marked_by = User.objects.filter(username=options['marked_by']).first()
+        if marked_by is None:
+            raise CommandError(f"No user named {options['marked_by']}")
+
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as lines:
+                result = ingest_punches(
+                    lines, marked_by, school_id=options['school_id'], batch_size=options['batch_size']
+                )
+        except (OSError, UnicodeDecodeError) as exc:
+            raise CommandError(f"Cannot read {options['path']}: {exc}")
+
+        self.stdout.write(
+            f"{result['rows']} rows ({result['duplicates']} duplicate, {result['invalid']} invalid) -> "
+            f"{result['teacher_days']} teacher-days: {result['created']} created, "
+            f"{result['updated']} updated, {result['unchanged']} unchanged"
+        )
+        if result['unknown_employees']:
+            self.stdout.write(self.style.WARNING(
+                f"Unknown employee ids: {', '.join(result['unknown_employees'])}"
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['rows_per_second']} rows/s ({result['seconds']}s)"
+        ))
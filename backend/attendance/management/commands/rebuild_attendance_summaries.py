@@ -0,0 +1,89 @@
+from datetime import date
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from attendance.models import AttendanceRecord, AttendanceSummary
+from attendance.summaries import STATUS_COLUMNS
+
+
+class Command(BaseCommand):
+    help = 'Recompute AttendanceSummary rows from AttendanceRecord for whole months'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, help='Only rebuild this year')
+        parser.add_argument('--month', type=int, help='Only rebuild this month (requires --year)')
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Summary rows written per bulk_create batch')
+
+    def handle(self, *args, **options):
+        year, month = options['year'], options['month']
+        if month and not year:
+            raise CommandError('--month requires --year')
+        if month and not 1 <= month <= 12:
+            raise CommandError('--month must be between 1 and 12')
+
+        if month:
+            months = [(year, month)]
+        else:
+            records = AttendanceRecord.objects.all()
+            if year:
+                records = records.filter(date__gte=date(year, 1, 1), date__lt=date(year + 1, 1, 1))
+            months = list(
+                records.annotate(y=ExtractYear('date'), m=ExtractMonth('date'))
+                .values_list('y', 'm').distinct().order_by('y', 'm')
+            )
+
+        for y, m in months:
+            written = self.rebuild_month(y, m, options['chunk_size'])
+            self.stdout.write(f'{y}-{m:02d}: {written} summaries')
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(months)} month(s)'))
+
+    def rebuild_month(self, year, month, chunk_size):
+        start = date(year, month, 1)
+        end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+
+        counters = {
+            column: Count('id', filter=Q(status__short_code=short_code))
+            for short_code, column in STATUS_COLUMNS.items()
+        }
+        rows = (
+            AttendanceRecord.objects.filter(date__gte=start, date__lt=end)
+            .values('student_id')
+            .annotate(total_days=Count('id'), **counters)
+            .order_by('student_id')
+        )
+
+        written = 0
+        with transaction.atomic():
+            AttendanceSummary.objects.filter(year=year, month=month).delete()
+
+            batch = []
+            for row in rows.iterator(chunk_size=chunk_size):
+                total = row['total_days']
+                batch.append(AttendanceSummary(
+                    student_id=row['student_id'],
+                    year=year,
+                    month=month,
+                    total_days=total,
+                    present_days=row['present_days'],
+                    absent_days=row['absent_days'],
+                    late_days=row['late_days'],
+                    excused_days=row['excused_days'],
+                    attendance_percentage=(
+                        round(Decimal(row['present_days'] * 100) / total, 2) if total else Decimal('0.00')
+                    )
+                ))
+                if len(batch) >= chunk_size:
+                    AttendanceSummary.objects.bulk_create(batch)
+                    written += len(batch)
+                    batch = []
+            if batch:
+                AttendanceSummary.objects.bulk_create(batch)
+                written += len(batch)
+
+        return written
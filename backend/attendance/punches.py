@@ -0,0 +1,153 @@
+"""Bulk ingest of biometric punch files into TeacherAttendance.
+
+A punch file is a CSV with an employee_id column and either a timestamp
+column ('2024-07-01 08:55:12') or separate date and time columns. The file
+is read row by row; repeated punches are dropped and the rest collapse into
+the first and last punch per teacher per day. Those are then upserted on
+(teacher, date) in batches, widening any check-in/check-out already stored,
+so a file can be ingested again, or in pieces through the day, without
+changing the result.
+"""
+import csv
+import datetime
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import TeacherAttendance, TeacherProfile
+
+BATCH_SIZE = 1000
+
+# Statuses set by hand that punches do not override
+KEPT_STATUSES = ('leave',)
+
+
+def parse_punch(row):
+    """(employee_id, datetime) for a CSV row; raises ValueError"""
+    employee_id = (row.get('employee_id') or '').strip()
+    if not employee_id:
+        raise ValueError('missing employee_id')
+    if row.get('timestamp'):
+        return employee_id, datetime.datetime.fromisoformat(row['timestamp'].strip())
+    return employee_id, datetime.datetime.combine(
+        datetime.date.fromisoformat(row['date'].strip()),
+        datetime.time.fromisoformat(row['time'].strip())
+    )
+
+
+def collapse_punches(lines):
+    """
+    Read punch rows from an iterable of CSV lines. Returns
+    ({(employee_id, date): [first, last]}, stats).
+    """
+    seen = set()
+    spans = {}
+    stats = {'rows': 0, 'duplicates': 0, 'invalid': 0}
+    for row in csv.DictReader(lines):
+        stats['rows'] += 1
+        try:
+            employee_id, punched_at = parse_punch(row)
+        except (KeyError, TypeError, ValueError):
+            stats['invalid'] += 1
+            continue
+        if (employee_id, punched_at) in seen:
+            stats['duplicates'] += 1
+            continue
+        seen.add((employee_id, punched_at))
+
+        span = spans.get((employee_id, punched_at.date()))
+        if span is None:
+            spans[(employee_id, punched_at.date())] = [punched_at.time(), punched_at.time()]
+        elif punched_at.time() < span[0]:
+            span[0] = punched_at.time()
+        elif punched_at.time() > span[1]:
+            span[1] = punched_at.time()
+    return spans, stats
+
+
+def status_for(check_in, check_out):
+    """'present', or 'half_day' when the time between punches is short"""
+    if check_out is None or check_out == check_in:
+        return 'present'
+    today = datetime.date.today()
+    worked = datetime.datetime.combine(today, check_out) - datetime.datetime.combine(today, check_in)
+    half_day = datetime.timedelta(hours=getattr(settings, 'TEACHER_HALF_DAY_HOURS', 4))
+    return 'half_day' if worked < half_day else 'present'
+
+
+def upsert_spans(spans, marked_by, school_id=None, batch_size=BATCH_SIZE):
+    """
+    Upsert TeacherAttendance for {(employee_id, date): [first, last]}, one
+    transaction per batch. Teachers outside school_id count as unknown.
+    """
+    result = {'created': 0, 'updated': 0, 'unchanged': 0, 'unknown_employees': set()}
+    keys = sorted(spans)
+    for offset in range(0, len(keys), batch_size):
+        batch = keys[offset:offset + batch_size]
+        teachers = TeacherProfile.objects.filter(employee_id__in={employee_id for employee_id, _ in batch})
+        if school_id is not None:
+            teachers = teachers.filter(school_id=school_id)
+        teacher_ids = dict(teachers.values_list('employee_id', 'id'))
+
+        wanted = {}
+        for employee_id, date in batch:
+            if employee_id not in teacher_ids:
+                result['unknown_employees'].add(employee_id)
+                continue
+            first, last = spans[(employee_id, date)]
+            wanted[(teacher_ids[employee_id], date)] = (first, last if last != first else None)
+
+        with transaction.atomic():
+            existing = {
+                (row.teacher_id, row.date): row
+                for row in TeacherAttendance.objects.select_for_update().filter(
+                    teacher_id__in={teacher_id for teacher_id, _ in wanted},
+                    date__in={date for _, date in wanted},
+                )
+            }
+            to_create = []
+            to_update = []
+            for (teacher_id, date), (check_in, check_out) in wanted.items():
+                row = existing.get((teacher_id, date))
+                if row is None:
+                    to_create.append(TeacherAttendance(
+                        teacher_id=teacher_id, date=date, check_in_time=check_in, check_out_time=check_out,
+                        status=status_for(check_in, check_out), marked_by=marked_by,
+                    ))
+                    continue
+
+                # Widen what is stored so batches of the same day merge
+                times = [t for t in (row.check_in_time, row.check_out_time, check_in, check_out) if t is not None]
+                check_in, check_out = min(times), max(times)
+                if check_out == check_in:
+                    check_out = None
+                status = row.status if row.status in KEPT_STATUSES else status_for(check_in, check_out)
+                if (row.check_in_time, row.check_out_time, row.status) == (check_in, check_out, status):
+                    result['unchanged'] += 1
+                    continue
+                row.check_in_time, row.check_out_time, row.status = check_in, check_out, status
+                to_update.append(row)
+
+            TeacherAttendance.objects.bulk_create(to_create)
+            TeacherAttendance.objects.bulk_update(to_update, ['check_in_time', 'check_out_time', 'status'])
+        result['created'] += len(to_create)
+        result['updated'] += len(to_update)
+
+    result['unknown_employees'] = sorted(result['unknown_employees'])
+    return result
+
+
+def ingest_punches(lines, marked_by, school_id=None, batch_size=BATCH_SIZE):
+    """Collapse and upsert a punch file. Returns counts and rows per second."""
+    started = time.perf_counter()
+    spans, stats = collapse_punches(lines)
+    result = upsert_spans(spans, marked_by, school_id=school_id, batch_size=batch_size)
+    seconds = time.perf_counter() - started
+    return {
+        **stats,
+        'teacher_days': len(spans),
+        **result,
+        'seconds': round(seconds, 3),
+        'rows_per_second': round(stats['rows'] / seconds) if seconds else None,
+    }
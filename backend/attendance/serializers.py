@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import AttendanceRecord, AttendanceStatus, AttendanceSummary
+from .models import AttendanceRecord, AttendanceStatus, AttendanceSummary, TeacherAttendance
 
 class AttendanceStatusSerializer(serializers.ModelSerializer):
     class Meta:
@@ -44,4 +44,16 @@ class BulkAttendanceSerializer(serializers.Serializer):
 class AttendanceSummarySerializer(serializers.ModelSerializer):
     class Meta:
         model = AttendanceSummary
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+class TeacherAttendanceSerializer(serializers.ModelSerializer):
+    teacher_name = serializers.CharField(source='teacher.full_name', read_only=True)
+    employee_id = serializers.CharField(source='teacher.employee_id', read_only=True)
+
+    class Meta:
+        model = TeacherAttendance
+        fields = [
+            'id', 'teacher', 'teacher_name', 'employee_id', 'date', 'status',
+            'check_in_time', 'check_out_time', 'remarks', 'marked_by', 'created_at'
+        ]
+        read_only_fields = ['marked_by', 'created_at']
@@ -0,0 +1,92 @@
+from django.db import transaction
+from django.utils import timezone
+from .models import AttendanceRecord
+from .summaries import apply_record_changes
+from .signals import attendance_bulk_marked
+
+# Columns written by a bulk mark, in addition to the unique_together key
+BULK_MARK_FIELDS = ['class_assigned_id', 'section_id', 'period', 'status_id', 'remarks', 'marked_by_id']
+
+
+def bulk_upsert_attendance(date, subject_id, class_id, section_id, period, entries, marked_by):
+    """
+    Upsert attendance for a set of students on (student, date, subject).
+
+    Existing rows are loaded in one query, then new rows go through a single
+    bulk_create and changed rows through a single bulk_update, so the number
+    of queries does not grow with the size of the section. AttendanceSummary
+    counters are adjusted in the same transaction.
+    Returns a dict with created/updated/unchanged counts and the touched records.
+    """
+    # Last entry wins if a student appears twice in the payload
+    wanted = {}
+    for rec in entries:
+        wanted[rec['student']] = {
+            'class_assigned_id': class_id,
+            'section_id': section_id,
+            'period': period,
+            'status_id': rec['status'],
+            'remarks': rec.get('remarks', '') or '',
+            'marked_by_id': marked_by.id,
+        }
+
+    with transaction.atomic():
+        existing = {
+            record.student_id: record
+            for record in AttendanceRecord.objects.select_for_update().filter(
+                date=date,
+                subject_id=subject_id,
+                student_id__in=list(wanted),
+            )
+        }
+
+        to_create = []
+        to_update = []
+        changed_fields = set()
+        unchanged = 0
+        now = timezone.now()
+
+        for student_id, values in wanted.items():
+            record = existing.get(student_id)
+            if record is None:
+                to_create.append(AttendanceRecord(
+                    student_id=student_id,
+                    date=date,
+                    subject_id=subject_id,
+                    **values
+                ))
+                continue
+
+            changed = [field for field, value in values.items() if getattr(record, field) != value]
+            if not changed:
+                unchanged += 1
+                continue
+
+            for field in changed:
+                setattr(record, field, values[field])
+            changed_fields.update(changed)
+            record.updated_at = now
+            to_update.append(record)
+
+        if to_create:
+            AttendanceRecord.objects.bulk_create(to_create)
+        if to_update:
+            # Only rewrite the columns that actually differ somewhere in the batch
+            fields = [field for field in BULK_MARK_FIELDS if field in changed_fields]
+            AttendanceRecord.objects.bulk_update(to_update, fields + ['updated_at'])
+
+        # bulk_create/bulk_update bypass post_save, so feed the summaries here
+        apply_record_changes(created=to_create, updated=to_update)
+
+    if to_create or to_update:
+        attendance_bulk_marked.send(
+            sender=AttendanceRecord, class_id=class_id, section_id=section_id, date=date
+        )
+
+    return {
+        'created': len(to_create),
+        'updated': len(to_update),
+        'unchanged': unchanged,
+        'created_records': to_create,
+        'updated_records': to_update,
+    }
@@ -1,43 +1,34 @@
-from django.db.models.signals import post_save
-from django.dispatch import receiver
-from .models import AttendanceRecord, AttendanceSummary
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver, Signal
+from .models import AttendanceRecord, AttendanceStatus
+from . import analytics, summaries
+
+# Sent by services.bulk_upsert_attendance, which bypasses post_save
+attendance_bulk_marked = Signal()
+
+@receiver(post_init, sender=AttendanceRecord)
+def remember_attendance_original(sender, instance, **kwargs):
+    summaries.remember_original(instance)
 
 @receiver(post_save, sender=AttendanceRecord)
 def update_attendance_summary(sender, instance, created, **kwargs):
-    month = instance.date.month
-    year = instance.date.year
-
-    summary, _ = AttendanceSummary.objects.get_or_create(
-        student=instance.student,
-        month=month,
-        year=year,
-        defaults={
-            'total_days': 0,
-            'present_days': 0,
-            'absent_days': 0,
-            'late_days': 0,
-            'excused_days': 0,
-            'attendance_percentage': 0
-        }
-    )
+    if created:
+        summaries.apply_record_changes(created=[instance])
+    else:
+        summaries.apply_record_changes(updated=[instance])
 
-    records = AttendanceRecord.objects.filter(
-        student=instance.student,
-        date__month=month,
-        date__year=year
-    )
+@receiver(post_delete, sender=AttendanceRecord)
+def remove_from_attendance_summary(sender, instance, **kwargs):
+    summaries.apply_record_changes(deleted=[instance])
 
-    summary.total_days = records.count()
-    summary.present_days = records.filter(status__short_code='P').count()
-    summary.absent_days = records.filter(status__short_code='A').count()
-    summary.late_days = records.filter(status__short_code='L').count()
-    summary.excused_days = records.filter(status__short_code='E').count()
+@receiver([post_save, post_delete], sender=AttendanceStatus)
+def reset_status_columns(sender, **kwargs):
+    summaries.clear_status_cache()
 
-    if summary.total_days > 0:
-        summary.attendance_percentage = round(
-            (summary.present_days / summary.total_days) * 100, 2
-        )
-    else:
-        summary.attendance_percentage = 0
+@receiver([post_save, post_delete], sender=AttendanceRecord)
+def invalidate_attendance_analytics(sender, instance, **kwargs):
+    analytics.invalidate(instance.section_id)
 
-    summary.save()
\ No newline at end of file
+@receiver(attendance_bulk_marked)
+def invalidate_bulk_attendance_analytics(sender, section_id, **kwargs):
+    analytics.invalidate(section_id)
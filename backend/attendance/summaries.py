@@ -0,0 +1,128 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import Case, DecimalField, ExpressionWrapper, F, Value, When
+from django.db.models.functions import Round
+
+from .models import AttendanceStatus, AttendanceSummary
+
+# AttendanceSummary counter fed by each status short code
+STATUS_COLUMNS = {
+    'P': 'present_days',
+    'A': 'absent_days',
+    'L': 'late_days',
+    'E': 'excused_days',
+}
+
+_status_columns = {}
+
+
+def clear_status_cache():
+    _status_columns.clear()
+
+
+def column_for_status(status_id):
+    """Summary column counted for an AttendanceStatus id (None if not tracked)"""
+    if status_id not in _status_columns:
+        _status_columns.clear()
+        for pk, short_code in AttendanceStatus.objects.values_list('id', 'short_code'):
+            _status_columns[pk] = STATUS_COLUMNS.get(short_code)
+    return _status_columns.get(status_id)
+
+
+def remember_original(instance):
+    """Keep the values a record was loaded with, so a later save can be diffed"""
+    values = instance.__dict__
+    if instance.pk is not None and all(name in values for name in ('student_id', 'date', 'status_id')):
+        instance._summary_original = (values['student_id'], values['date'], values['status_id'])
+    else:
+        instance._summary_original = None
+
+
+def _add(deltas, student_id, date, status_id, sign):
+    key = (student_id, date.year, date.month)
+    deltas[key]['total_days'] += sign
+    column = column_for_status(status_id)
+    if column:
+        deltas[key][column] += sign
+
+
+def record_deltas(created=(), updated=(), deleted=()):
+    """
+    Counter deltas for a set of record changes, keyed by (student_id, year, month).
+    Updated and deleted records must carry the values they were loaded with.
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    for record in created:
+        _add(deltas, record.student_id, record.date, record.status_id, 1)
+    for record in updated:
+        original = getattr(record, '_summary_original', None)
+        if original == (record.student_id, record.date, record.status_id):
+            continue
+        if original:
+            _add(deltas, *original, -1)
+        _add(deltas, record.student_id, record.date, record.status_id, 1)
+    for record in deleted:
+        original = getattr(record, '_summary_original', None)
+        if original:
+            _add(deltas, *original, -1)
+    return deltas
+
+
+def percentage_expression():
+    return Case(
+        When(total_days=0, then=Value(Decimal('0.00'))),
+        default=Round(
+            ExpressionWrapper(F('present_days') * 100.0 / F('total_days'), output_field=DecimalField()),
+            2
+        ),
+        output_field=DecimalField(max_digits=5, decimal_places=2)
+    )
+
+
+def apply_deltas(deltas):
+    """
+    Apply counter deltas to AttendanceSummary rows with F() updates.
+
+    Students sharing the same delta in the same month are updated together,
+    so a bulk mark of a whole section costs a handful of queries no matter
+    how many students it touches.
+    """
+    deltas = {
+        key: {column: n for column, n in delta.items() if n}
+        for key, delta in deltas.items()
+    }
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    AttendanceSummary.objects.bulk_create(
+        [
+            AttendanceSummary(student_id=student_id, year=year, month=month)
+            for student_id, year, month in deltas
+        ],
+        ignore_conflicts=True
+    )
+
+    groups = defaultdict(list)
+    months = defaultdict(list)
+    for (student_id, year, month), delta in deltas.items():
+        groups[(year, month, frozenset(delta.items()))].append(student_id)
+        months[(year, month)].append(student_id)
+
+    for (year, month, delta), student_ids in groups.items():
+        AttendanceSummary.objects.filter(
+            year=year, month=month, student_id__in=student_ids
+        ).update(**{column: F(column) + n for column, n in delta})
+
+    for (year, month), student_ids in months.items():
+        AttendanceSummary.objects.filter(
+            year=year, month=month, student_id__in=student_ids
+        ).update(attendance_percentage=percentage_expression())
+
+
+def apply_record_changes(created=(), updated=(), deleted=()):
+    apply_deltas(record_deltas(created, updated, deleted))
+    for record in list(created) + list(updated):
+        remember_original(record)
+
@@ -1,10 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import AttendanceRecordViewSet, AttendanceStatusViewSet
+from .views import AttendanceRecordViewSet, AttendanceStatusViewSet, AttendanceSummaryViewSet, TeacherAttendanceViewSet
 
 router = DefaultRouter()
 router.register(r'attendance', AttendanceRecordViewSet, basename='attendance')
 router.register(r'statuses', AttendanceStatusViewSet, basename='attendancestatus')
+router.register(r'summaries', AttendanceSummaryViewSet, basename='attendancesummary')
+router.register(r'teacher-attendance', TeacherAttendanceViewSet, basename='teacherattendance')
 
 urlpatterns = [
     path('', include(router.urls)),
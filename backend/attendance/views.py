@@ -1,17 +1,105 @@
+import datetime
+import io
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db import transaction
+from core.models import Section
+from core.scope import get_scope
+from academic.models import AcademicYear
 from .models import AttendanceRecord, StudentProfile
 from .serializers import AttendanceRecordSerializer, BulkAttendanceSerializer
 from .permissions import IsTeacherOrPrincipal, IsDeveloperOrPrincipal
-from .models import AttendanceStatus
-from .serializers import AttendanceStatusSerializer
+from .models import AttendanceStatus, AttendanceSummary, TeacherAttendance
+from .serializers import AttendanceStatusSerializer, AttendanceSummarySerializer, TeacherAttendanceSerializer
+from .services import bulk_upsert_attendance
+from .punches import ingest_punches
+from . import analytics, exports
 
 class AttendanceStatusViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = AttendanceStatus.objects.all().order_by('id')
     serializer_class = AttendanceStatusSerializer
 
+class AttendanceSummaryViewSet(viewsets.ReadOnlyModelViewSet):
+    """Per-student monthly counters maintained by attendance.summaries"""
+    queryset = AttendanceSummary.objects.all()
+    serializer_class = AttendanceSummarySerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+
+        if user.is_student:
+            queryset = queryset.filter(student__user=user)
+        elif user.is_parent:
+            queryset = queryset.filter(student__parents__user=user)
+
+        student_id = self.request.query_params.get('student_id')
+        year = self.request.query_params.get('year')
+        month = self.request.query_params.get('month')
+
+        if student_id:
+            queryset = queryset.filter(student_id=student_id)
+        if year:
+            queryset = queryset.filter(year=year)
+        if month:
+            queryset = queryset.filter(month=month)
+
+        return queryset.order_by('-year', '-month', 'student_id')
+
+class TeacherAttendanceViewSet(viewsets.ModelViewSet):
+    """Teacher attendance, marked by hand or ingested from punch files"""
+    queryset = TeacherAttendance.objects.all()
+    serializer_class = TeacherAttendanceSerializer
+
+    def get_permissions(self):
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'ingest']:
+            return [IsDeveloperOrPrincipal()]
+        return [(IsTeacherOrPrincipal | IsDeveloperOrPrincipal)()]
+
+    def get_queryset(self):
+        queryset = super().get_queryset().select_related('teacher__user')
+        user = self.request.user
+        scope = get_scope(self.request)
+
+        if user.role == 'TEACHER':
+            queryset = queryset.filter(teacher_id=scope.profile_id)
+        elif user.role == 'PRINCIPAL':
+            queryset = queryset.filter(teacher__school_id=scope.school_id)
+
+        teacher_id = self.request.query_params.get('teacher_id')
+        date_from = self.request.query_params.get('date_from')
+        date_to = self.request.query_params.get('date_to')
+        if teacher_id:
+            queryset = queryset.filter(teacher_id=teacher_id)
+        if date_from:
+            queryset = queryset.filter(date__gte=date_from)
+        if date_to:
+            queryset = queryset.filter(date__lte=date_to)
+        return queryset.order_by('-date', 'teacher_id')
+
+    def perform_create(self, serializer):
+        serializer.save(marked_by=self.request.user)
+
+    @action(detail=False, methods=['post'])
+    def ingest(self, request):
+        """Upsert attendance from an uploaded punch CSV ('file')"""
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'Upload a punch file as "file"'}, status=400)
+
+        school_id = get_scope(request).school_id if request.user.role == 'PRINCIPAL' else None
+        lines = io.TextIOWrapper(upload, encoding='utf-8-sig', newline='')
+        try:
+            result = ingest_punches(lines, marked_by=request.user, school_id=school_id)
+        except UnicodeDecodeError:
+            return Response({'error': 'Punch file must be UTF-8 CSV'}, status=400)
+        return Response(result)
+
 class AttendanceRecordViewSet(viewsets.ModelViewSet):
     queryset = AttendanceRecord.objects.all()
     serializer_class = AttendanceRecordSerializer
@@ -21,6 +109,10 @@ class AttendanceRecordViewSet(viewsets.ModelViewSet):
             return [IsDeveloperOrPrincipal()]
         elif self.action in ['create', 'bulk_mark']:
             return [IsTeacherOrPrincipal()]
+        elif self.action == 'monthly_register':
+            return [IsDeveloperOrPrincipal()]
+        elif self.action in ['absenteeism', 'chronic_absentees']:
+            return [(IsTeacherOrPrincipal | IsDeveloperOrPrincipal)()]
         elif self.action in ['list', 'retrieve']:
             return [permissions.IsAuthenticated()]
         return super().get_permissions()
@@ -35,30 +127,22 @@ class AttendanceRecordViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         data = serializer.validated_data
         
-        with transaction.atomic():
-            for rec in data['attendance_data']:
-                student_id = rec['student']
-                status_id = rec['status']
-                
-                # Add subject_id retrieval
-                subject_id = data.get('subject')
-                
-                # Create or update logic
-                obj, created = AttendanceRecord.objects.update_or_create(
-                    student_id=student_id,
-                    date=data['date'],
-                    subject_id=subject_id,
-                    defaults={
-                        'class_assigned_id': data['class_assigned'],
-                        'section_id': data['section'],
-                        'period': data['period'],
-                        'status_id': status_id,
-                        'remarks': rec.get('remarks', ''),
-                        'marked_by': request.user.teacherprofile
-                    }
-                )
-                
-        return Response({'status': 'attendance marked'}, status=status.HTTP_201_CREATED)
+        result = bulk_upsert_attendance(
+            date=data['date'],
+            subject_id=data.get('subject'),
+            class_id=data['class_assigned'],
+            section_id=data['section'],
+            period=data['period'],
+            entries=data['attendance_data'],
+            marked_by=request.user.teacherprofile
+        )
+
+        return Response({
+            'status': 'attendance marked',
+            'created': result['created'],
+            'updated': result['updated'],
+            'unchanged': result['unchanged']
+        }, status=status.HTTP_201_CREATED)
 
     @action(detail=False, methods=['get'])
     def class_report(self, request):
@@ -74,7 +158,11 @@ class AttendanceRecordViewSet(viewsets.ModelViewSet):
             class_assigned_id=class_id,
             section_id=section_id,
             date=date
-        ).select_related('student__user', 'status')
+        ).select_related('status')
+        section = Section.objects.select_related('class_assigned').filter(
+            id=section_id,
+            class_assigned_id=class_id
+        ).first()
         
         # Get all students in the class/section
         students = StudentProfile.objects.filter(
@@ -106,8 +194,8 @@ class AttendanceRecordViewSet(viewsets.ModelViewSet):
                 })
         return Response({
             'date': date,
-            'class_name': students.first().class_assigned.name if students.exists() else '',
-            'section_name': students.first().section.name if students.exists() else '',
+            'class_name': section.class_assigned.name if section else '',
+            'section_name': section.name if section else '',
             'students': report_data,
             'summary': {
                 'total_students': len(report_data),
@@ -116,4 +204,135 @@ class AttendanceRecordViewSet(viewsets.ModelViewSet):
                 'absent': len([s for s in report_data if s['status_code'] == 'A']),
                 'late': len([s for s in report_data if s['status_code'] == 'L'])
             }
-        })
\ No newline at end of file
+        })
+
+    @action(detail=False, methods=['get'])
+    def monthly_register(self, request):
+        """
+        Student x day attendance register for a month, streamed as CSV or
+        XLSX (file_type=csv|xlsx). Covers every section of the school unless
+        narrowed with class_id/section_id; developers may pass school_id.
+        """
+        today = timezone.localdate()
+        try:
+            year = int(request.query_params.get('year', today.year))
+            month = int(request.query_params.get('month', today.month))
+            if not 1 <= month <= 12 or not datetime.MINYEAR <= year <= datetime.MAXYEAR:
+                raise ValueError
+        except ValueError:
+            return Response({'error': 'Invalid year or month'}, status=400)
+        try:
+            filters = {
+                name: int(request.query_params[name])
+                for name in ('school_id', 'class_id', 'section_id') if request.query_params.get(name)
+            }
+        except ValueError:
+            return Response({'error': 'school_id, class_id and section_id must be integers'}, status=400)
+
+        file_type = request.query_params.get('file_type', 'csv')
+        if file_type not in exports.CONTENT_TYPES:
+            return Response({'error': 'file_type must be csv or xlsx'}, status=400)
+        if file_type == 'xlsx' and exports.Workbook is None:
+            return Response({'error': 'XLSX export requires openpyxl'}, status=501)
+
+        sections = Section.objects.all()
+        if request.user.role == 'PRINCIPAL':
+            sections = sections.filter(class_assigned__school_id=get_scope(request).school_id)
+        elif 'school_id' in filters:
+            sections = sections.filter(class_assigned__school_id=filters['school_id'])
+        if 'class_id' in filters:
+            sections = sections.filter(class_assigned_id=filters['class_id'])
+        if 'section_id' in filters:
+            sections = sections.filter(id=filters['section_id'])
+
+        rows = exports.register_rows(sections, year, month)
+        if file_type == 'xlsx':
+            content = exports.stream_xlsx(rows, title=f'{year}-{month:02d}')
+        else:
+            content = exports.stream_csv(rows)
+        response = StreamingHttpResponse(content, content_type=exports.CONTENT_TYPES[file_type])
+        response['Content-Disposition'] = f'attachment; filename="attendance-{year}-{month:02d}.{file_type}"'
+        return response
+
+    def _analytics_params(self, request):
+        """
+        (start, end, threshold) from the query string; the range defaults to
+        the current academic year up to today. Raises ValueError.
+        """
+        start = request.query_params.get('start')
+        end = request.query_params.get('end')
+        if not (start and end):
+            year = AcademicYear.objects.filter(is_current=True).first()
+            if year is None:
+                raise ValueError('start and end are required when no academic year is current')
+            start = start or str(year.start_date)
+            end = end or str(min(year.end_date, timezone.localdate()))
+        try:
+            start, end = parse_date(start), parse_date(end)
+        except ValueError:
+            start = end = None
+        if start is None or end is None or start > end:
+            raise ValueError('start and end must be dates (YYYY-MM-DD), start first')
+        threshold = request.query_params.get('threshold', analytics.CHRONIC_THRESHOLD)
+        try:
+            threshold = float(threshold)
+        except ValueError:
+            raise ValueError('threshold must be a number')
+        return start, end, threshold
+
+    @action(detail=False, methods=['get'])
+    def absenteeism(self, request):
+        """Absence streaks, heatmaps and chronic absentees for a section"""
+        if analytics.np is None:
+            return Response({'error': 'Attendance analytics require numpy'}, status=501)
+        try:
+            section_id = int(request.query_params['section_id'])
+        except (KeyError, ValueError):
+            return Response({'error': 'section_id is required and must be an integer'}, status=400)
+        try:
+            start, end, threshold = self._analytics_params(request)
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=400)
+
+        if request.user.role == 'TEACHER' and section_id not in get_scope(request).section_ids:
+            return Response({'error': 'Not assigned to this section'}, status=403)
+
+        return Response(analytics.section_analytics(section_id, start, end, threshold))
+
+    @action(detail=False, methods=['get'])
+    def chronic_absentees(self, request):
+        """Students below the attendance threshold in every section in scope"""
+        if analytics.np is None:
+            return Response({'error': 'Attendance analytics require numpy'}, status=501)
+        try:
+            start, end, threshold = self._analytics_params(request)
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=400)
+
+        scope = get_scope(request)
+        sections = Section.objects.select_related('class_assigned').order_by('class_assigned__name', 'name')
+        if request.user.role == 'TEACHER':
+            sections = sections.filter(id__in=scope.section_ids)
+        elif request.user.role == 'PRINCIPAL':
+            sections = sections.filter(class_assigned__school_id=scope.school_id)
+        else:
+            try:
+                sections = sections.filter(class_assigned__school_id=int(request.query_params['school_id']))
+            except (KeyError, ValueError):
+                return Response({'error': 'school_id is required and must be an integer'}, status=400)
+
+        sections = {section.id: (n, section) for n, section in enumerate(sections)}
+        results = sorted(
+            analytics.chronic_absentees(list(sections), start, end, threshold),
+            key=lambda row: sections[row['section_id']][0]
+        )
+        for row in results:
+            section = sections[row['section_id']][1]
+            row['class_name'] = section.class_assigned.name
+            row['section_name'] = section.name
+        return Response({
+            'start': str(start),
+            'end': str(end),
+            'threshold': threshold,
+            'students': results,
+        })
@@ -0,0 +1,177 @@
+"""JWT authentication that does not load core.User on every request.
+
+Tokens issued at login carry the user's role, school id and profile id. For
+read-only requests ClaimsJWTAuthentication builds the user from those claims;
+every other column is deferred and loaded on first access, so views that
+need the full model still get it. Requests that can change state get the
+full user. Either way the account is looked up in a small in-process LRU,
+so a deactivated or deleted account is refused once its entry expires.
+
+Refreshing a token (authentication.serializers.ClaimsTokenRefreshSerializer)
+re-derives the claims from the current user row, so role and scope changes
+reach the new tokens.
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.scope import UserScope
+
+# Claims added to the token at login, besides simplejwt's user id claim
+CLAIMS = ('username', 'role', 'school_id', 'profile_id')
+
+
+def token_claims(user):
+    """Claims describing `user`, computed once when the token is issued"""
+    scope = UserScope(user)
+    return {
+        'username': user.username,
+        'role': user.role,
+        'school_id': scope.school_id,
+        'profile_id': scope.profile_id,
+    }
+
+
+def tokens_for_user(user):
+    """RefreshToken (and through it the access token) carrying the user claims"""
+    refresh = RefreshToken.for_user(user)
+    for claim, value in token_claims(user).items():
+        refresh[claim] = value
+    return refresh
+
+
+class RecentUsers:
+    """
+    Thread-safe LRU of user rows keyed by id. Entries expire after `ttl`
+    seconds so changes made by other processes are picked up; changes made in
+    this process evict the entry through a post_save receiver.
+    """
+    def __init__(self, size=1024, ttl=30.0):
+        self.size = size
+        self.ttl = ttl
+        self._rows = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._rows.get(user_id)
+            if entry is None:
+                return None
+            stored_at, row = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._rows[user_id]
+                return None
+            self._rows.move_to_end(user_id)
+            return row
+
+    def put(self, user_id, row):
+        with self._lock:
+            self._rows[user_id] = (time.monotonic(), row)
+            self._rows.move_to_end(user_id)
+            while len(self._rows) > self.size:
+                self._rows.popitem(last=False)
+
+    def evict(self, user_id):
+        with self._lock:
+            self._rows.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._rows.clear()
+
+
+recent_users = RecentUsers(
+    size=getattr(settings, 'AUTH_USER_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'AUTH_USER_CACHE_TTL', 30.0),
+)
+
+
+def load_user_row(user_id):
+    """All concrete column values of a user, from the LRU or one SELECT"""
+    row = recent_users.get(user_id)
+    if row is None:
+        User = get_user_model()
+        attnames = [field.attname for field in User._meta.concrete_fields]
+        row = User.objects.filter(pk=user_id).values(*attnames).first()
+        if row is None:
+            return None
+        recent_users.put(user_id, row)
+    return row
+
+
+def build_user(values):
+    """User instance from a dict of column values; missing columns are deferred"""
+    User = get_user_model()
+    fields = [field.attname for field in User._meta.concrete_fields if field.attname in values]
+    return User.from_db(DEFAULT_DB_ALIAS, fields, [values[name] for name in fields])
+
+
+def _load_deferred(user, using=None, fields=None):
+    """
+    Stand-in for refresh_from_db() on claim-backed users: the first access
+    to a deferred column loads the whole row once instead of one query per
+    column.
+    """
+    deferred = user.get_deferred_fields()
+    if not deferred or fields is None or not set(fields) <= deferred:
+        return type(user).refresh_from_db(user, using=using, fields=fields)
+    row = load_user_row(user.pk)
+    if row is None:
+        return type(user).refresh_from_db(user, using=using, fields=fields)
+    for name in deferred:
+        user.__dict__[name] = row[name]
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Drop-in replacement for simplejwt's JWTAuthentication.
+
+    Every request checks that the account still exists and is active,
+    through the LRU (falling back to one SELECT). Safe methods then get a
+    user built from the token claims; other methods get the full user.
+    Tokens issued before the claims were added go through the stock lookup.
+    """
+    def authenticate(self, request):
+        self.read_only = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        claims = {claim: validated_token.get(claim) for claim in CLAIMS}
+        if 'role' not in validated_token:
+            return super().get_user(validated_token)
+
+        row = load_user_row(user_id)
+        if row is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if not row['is_active']:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        if getattr(self, 'read_only', False):
+            user = build_user({
+                'id': user_id,
+                'username': claims['username'],
+                'role': claims['role'],
+                'is_active': True,
+            })
+            user.refresh_from_db = partial(_load_deferred, user)
+        else:
+            user = build_user(row)
+
+        user.token_claims = claims
+        return user
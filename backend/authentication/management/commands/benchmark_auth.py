@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.benchmark import build_section, measure, rolled_back
+from authentication.jwt import ClaimsJWTAuthentication, recent_users, tokens_for_user
+
+
+class Command(BaseCommand):
+    help = 'Measure per-request queries and latency of JWT authentication'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        count = options['requests']
+
+        with rolled_back():
+            fixture = build_section(1)
+            user = fixture['teacher_user']
+            stock_token = str(RefreshToken.for_user(user).access_token)
+            claims_token = str(tokens_for_user(user).access_token)
+
+            cases = [
+                ('JWTAuthentication', JWTAuthentication, stock_token),
+                ('ClaimsJWTAuthentication', ClaimsJWTAuthentication, claims_token),
+                ('Claims, token w/o claims', ClaimsJWTAuthentication, stock_token),
+            ]
+
+            self.stdout.write(f"{'authentication':<26} {'method':>6} {'queries/req':>12} {'us/req':>9}")
+            for label, auth_class, token in cases:
+                for method in ('get', 'post'):
+                    recent_users.clear()
+                    request = getattr(factory, method)('/api/core/dashboard/stats/', HTTP_AUTHORIZATION=f'Bearer {token}')
+                    with measure() as stats:
+                        for _ in range(count):
+                            auth_class().authenticate(request)
+                    self.stdout.write(
+                        f"{label:<26} {method.upper():>6} {stats['queries'] / count:>12.3f} "
+                        f"{stats['ms'] * 1000 / count:>9.1f}"
+                    )
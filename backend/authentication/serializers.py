@@ -1,6 +1,10 @@
 from rest_framework import serializers
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 from core.models import User, TeacherProfile, StudentProfile, ParentProfile
+from .jwt import token_claims, tokens_for_user
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, min_length=8)
@@ -32,6 +36,11 @@ class UserLoginSerializer(TokenObtainPairSerializer):
     username = serializers.CharField()
     password = serializers.CharField(write_only=True)
 
+    @classmethod
+    def get_token(cls, user):
+        # Role, school and profile claims let ClaimsJWTAuthentication skip the user lookup
+        return tokens_for_user(user)
+
     def validate(self, attrs):
         print('b')
         username = attrs.get('username')
@@ -107,6 +116,34 @@ class UserLoginSerializer(TokenObtainPairSerializer):
         model = User
         fields = ['username', 'password']
 
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    TokenRefreshSerializer that reloads the user and stamps fresh claims on
+    the new tokens; inactive and deleted accounts cannot refresh.
+    """
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user = User.objects.filter(
+            **{api_settings.USER_ID_FIELD: refresh[api_settings.USER_ID_CLAIM]}
+        ).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        for claim, value in token_claims(user).items():
+            refresh[claim] = value
+
+        data = {'access': str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                try:
+                    refresh.blacklist()
+                except AttributeError:
+                    pass  # token_blacklist is not installed
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        return data
+
 class PasswordChangeSerializer(serializers.Serializer):
     old_password = serializers.CharField(required=True)
     new_password = serializers.CharField(required=True, min_length=8)
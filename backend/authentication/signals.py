@@ -0,0 +1,8 @@
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .jwt import recent_users
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def forget_recent_user(sender, instance, **kwargs):
+    recent_users.evict(instance.pk)
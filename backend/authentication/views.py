@@ -1,11 +1,12 @@
 from rest_framework import generics, status, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
 
-from .serializers import UserRegistrationSerializer, UserLoginSerializer, PasswordChangeSerializer, ProfileUpdateSerializer
+from .jwt import tokens_for_user
+from .serializers import ClaimsTokenRefreshSerializer, UserRegistrationSerializer, UserLoginSerializer, PasswordChangeSerializer, ProfileUpdateSerializer
 from core.models import User, TeacherProfile, StudentProfile, ParentProfile
 from core.serializers import UserSerializer
 
@@ -22,7 +23,7 @@ class RegisterView(generics.CreateAPIView):
         user = serializer.save()
 
         # Generate tokens
-        refresh = RefreshToken.for_user(user)
+        refresh = tokens_for_user(user)
 
         return Response({
             'user': UserSerializer(user).data,
@@ -52,6 +53,9 @@ class CustomTokenObtainPairView(TokenObtainPairView):
 
         return Response(serializer.validated_data, status=status.HTTP_200_OK)
 
+class ClaimsTokenRefreshView(TokenRefreshView):
+    serializer_class = ClaimsTokenRefreshSerializer
+
 class LogoutView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
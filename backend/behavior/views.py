@@ -5,6 +5,7 @@ from django.db.models import Q, Count, Sum
 from .models import BehaviorLog, BehaviorCategory
 from .serializers import BehaviorLogSerializer, BehaviorCategorySerializer
 from core.permissions import IsDeveloper, IsPrincipal, IsTeacher, IsStudent, IsParent
+from core.scope import get_scope
 
 class BehaviorCategoryViewSet(viewsets.ModelViewSet):
     queryset = BehaviorCategory.objects.all()
@@ -33,17 +34,14 @@ class BehaviorLogViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         queryset = super().get_queryset()
         user = self.request.user
+        scope = get_scope(self.request)
         
-        if user.is_student:
-            queryset = queryset.filter(student=user.studentprofile)
-        elif user.is_parent:
-            children = user.parentprofile.children.all()
-            queryset = queryset.filter(student__in=children)
+        if user.is_student or user.is_parent:
+            queryset = queryset.filter(student_id__in=scope.children_ids)
         elif user.is_teacher:
-            teacher_profile = user.teacherprofile
             queryset = queryset.filter(
-                Q(reported_by=teacher_profile) |
-                Q(student__section__in=teacher_profile.sections.all())
+                Q(reported_by_id=scope.profile_id) |
+                Q(student__section_id__in=scope.section_ids)
             )
         
         return queryset.order_by('-date_occurred', '-created_at')
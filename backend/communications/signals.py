@@ -0,0 +1,35 @@
+from django.db.models.signals import m2m_changed, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from core import unread
+from .models import Message, MessageRead
+
+@receiver(m2m_changed, sender=Message.recipients.through)
+def count_message_recipients(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # user.received_messages.add(...): one user, several messages
+        if action == 'post_add':
+            unread.bump(unread.MESSAGES, [instance.pk], len(pk_set))
+        elif action in ('post_remove', 'pre_clear'):
+            unread.forget(unread.MESSAGES, [instance.pk])
+        return
+
+    if action == 'post_add':
+        # Fan-out to the new recipients
+        unread.bump(unread.MESSAGES, list(pk_set))
+    elif action == 'post_remove':
+        unread.forget(unread.MESSAGES, list(pk_set))
+    elif action == 'pre_clear':
+        unread.forget(unread.MESSAGES, instance.recipients.values('pk'))
+
+@receiver(pre_delete, sender=Message)
+def forget_message_counters(sender, instance, **kwargs):
+    unread.forget(unread.MESSAGES, instance.recipients.values('pk'))
+
+@receiver(post_save, sender=MessageRead)
+def count_message_read(sender, instance, created, **kwargs):
+    if created:
+        unread.bump(unread.MESSAGES, [instance.user_id], -1)
+
+@receiver(post_delete, sender=MessageRead)
+def forget_message_read(sender, instance, **kwargs):
+    unread.forget(unread.MESSAGES, [instance.user_id])
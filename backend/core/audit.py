@@ -0,0 +1,128 @@
+"""Background writer for AuditLog entries.
+
+AuditLogMiddleware hands entries to an in-process queue instead of writing
+them on the request path. A daemon thread drains the queue and writes
+batches with bulk_create, either when a batch is full or when the flush
+interval elapses. Whatever is still queued is flushed at interpreter exit.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLogWriter:
+    def __init__(self, batch_size=100, flush_interval=1.0, queue_size=10000, enqueue_timeout=0.05):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.counters = {'enqueued': 0, 'flushed': 0, 'dropped': 0, 'failed': 0, 'batches': 0}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def submit(self, **fields):
+        """
+        Queue one AuditLog entry. When the queue is full the caller waits up
+        to enqueue_timeout seconds for room before the entry is dropped.
+        """
+        self._ensure_started()
+        try:
+            self.queue.put(fields, timeout=self.enqueue_timeout)
+        except queue.Full:
+            dropped = self._count('dropped')
+            if dropped == 1 or dropped % 1000 == 0:
+                logger.warning('Audit log queue full, %d entries dropped so far', dropped)
+            return False
+        self._count('enqueued')
+        return True
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        stats['queued'] = self.queue.qsize()
+        stats['running'] = bool(self._thread and self._thread.is_alive())
+        return stats
+
+    def flush(self):
+        """Write everything currently queued from the calling thread"""
+        while True:
+            batch = self._take(block=False)
+            if not batch:
+                return
+            self._write(batch)
+
+    def stop(self, timeout=5.0):
+        self._stopping.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout)
+        self.flush()
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+            return self.counters[name]
+
+    def _ensure_started(self):
+        # Threads do not survive fork, so pre-forking servers start one per worker
+        if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._stopping.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+            self._thread.start()
+
+    def _take(self, block=True):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                if block and timeout > 0:
+                    batch.append(self.queue.get(timeout=timeout))
+                else:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        try:
+            AuditLog.objects.bulk_create([AuditLog(**fields) for fields in batch])
+        except Exception:
+            self._count('failed', len(batch))
+            logger.exception('Failed to write %d audit log entries', len(batch))
+        else:
+            self._count('flushed', len(batch))
+            self._count('batches')
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = self._take()
+            if batch:
+                close_old_connections()
+                self._write(batch)
+        close_old_connections()
+
+
+audit_writer = AuditLogWriter(
+    batch_size=getattr(settings, 'AUDIT_LOG_BATCH_SIZE', 100),
+    flush_interval=getattr(settings, 'AUDIT_LOG_FLUSH_INTERVAL', 1.0),
+    queue_size=getattr(settings, 'AUDIT_LOG_QUEUE_SIZE', 10000),
+    enqueue_timeout=getattr(settings, 'AUDIT_LOG_ENQUEUE_TIMEOUT', 0.05),
+)
+atexit.register(audit_writer.stop)
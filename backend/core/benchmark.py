@@ -0,0 +1,80 @@
+"""Fixtures and timing helpers shared by the benchmark_* management commands.
+
+Benchmarks build their own data inside a transaction that is always rolled
+back, so they can be pointed at a development database without leaving rows
+behind.
+"""
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from .models import User, School, Class, Section, Subject, TeacherProfile, StudentProfile
+
+
+@contextmanager
+def rolled_back():
+    """Run the block in a transaction that is rolled back on exit"""
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+@contextmanager
+def measure():
+    """Collect wall time (ms) and executed queries for the block"""
+    result = {}
+    with CaptureQueriesContext(connection) as ctx:
+        started = time.perf_counter()
+        yield result
+        result['ms'] = (time.perf_counter() - started) * 1000
+    result['queries'] = len(ctx.captured_queries)
+
+
+def build_section(size, school=None):
+    """
+    Create a class with one section, a teacher assigned to it, a subject and
+    `size` students. Returns a dict with the created objects.
+    """
+    tag = uuid.uuid4().hex[:8]
+    school = school or School.objects.create(name=f'Bench School {tag}')
+    class_obj = Class.objects.create(name=f'Bench {tag}', school=school)
+    section = Section.objects.create(name='A', class_assigned=class_obj, max_students=size)
+    subject = Subject.objects.create(name=f'Bench {tag}', code=tag)
+
+    teacher_user = User.objects.create(username=f'bench-t-{tag}', role='TEACHER')
+    teacher = TeacherProfile.objects.create(user=teacher_user, employee_id=f'T{tag}', school=school)
+    teacher.sections.add(section)
+    teacher.subjects.add(subject)
+
+    users = User.objects.bulk_create([
+        User(username=f'bench-s-{tag}-{i}', role='STUDENT', first_name='Student', last_name=str(i))
+        for i in range(size)
+    ])
+    if users and users[0].pk is None:
+        # Backends without RETURNING support do not populate pks on bulk_create
+        users = list(User.objects.filter(username__startswith=f'bench-s-{tag}-'))
+    StudentProfile.objects.bulk_create([
+        StudentProfile(
+            user=user,
+            student_id=f'S{tag}-{i}',
+            school=school,
+            class_assigned=class_obj,
+            section=section,
+            roll_number=str(i + 1)
+        )
+        for i, user in enumerate(users)
+    ])
+    students = list(StudentProfile.objects.filter(section=section).order_by('id'))
+
+    return {
+        'school': school,
+        'class': class_obj,
+        'section': section,
+        'subject': subject,
+        'teacher': teacher,
+        'teacher_user': teacher_user,
+        'students': students,
+    }
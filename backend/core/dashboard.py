@@ -0,0 +1,229 @@
+"""Dashboard statistics: one aggregate query per role, cached per user.
+
+Cached stats are keyed on a global version and the user's school version.
+Signal handlers in core.signals bump those versions when attendance,
+notices or assignments change, which makes every dependent entry miss.
+"""
+import time
+from decimal import Decimal
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Exists, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import User, School, Class, TeacherProfile, StudentProfile
+
+GLOBAL_VERSION_KEY = 'dashboard:version'
+ALL_SCHOOLS = 'all'
+
+EMPTY_STATS = {
+    'total_students': 0,
+    'total_teachers': 0,
+    'total_classes': 0,
+    'total_notices': 0,
+    'pending_assignments': 0,
+    'attendance_percentage': Decimal('0.00'),
+}
+
+
+def _version_key(school_id):
+    return f'dashboard:version:{school_id}'
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so a version lost to eviction never repeats
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, int(time.time() * 1000), None)
+
+
+def invalidate_school(school_id=None):
+    """Drop cached stats for one school (and the developer-wide view)"""
+    if school_id is not None:
+        _bump(_version_key(school_id))
+    _bump(_version_key(ALL_SCHOOLS))
+
+
+def invalidate_all():
+    _bump(GLOBAL_VERSION_KEY)
+
+
+def _count(queryset):
+    """Scalar COUNT subquery, so several counts fit into one SELECT"""
+    return Coalesce(
+        Subquery(
+            queryset.order_by().annotate(_g=Value(1)).values('_g').annotate(n=Count('pk', distinct=True)).values('n')[:1],
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def _sum(queryset, field):
+    return Coalesce(
+        Subquery(
+            queryset.order_by().annotate(_g=Value(1)).values('_g').annotate(n=Sum(field)).values('n')[:1],
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def _scopes(user):
+    """Querysets behind each dashboard tile for the user's role"""
+    Notice = apps.get_model('notices', 'Notice')
+    Assignment = apps.get_model('assignments', 'Assignment')
+    AssignmentSubmission = apps.get_model('assignments', 'AssignmentSubmission')
+    AttendanceSummary = apps.get_model('attendance', 'AttendanceSummary')
+    from notices.audience import addressed_to
+
+    now = timezone.now()
+    today = timezone.localdate()
+    notices = Notice.objects.filter(is_live=True)
+    open_assignments = Assignment.objects.filter(status='assigned', due_date__gte=now)
+    summaries = AttendanceSummary.objects.filter(year=today.year, month=today.month)
+
+    if user.role == 'DEVELOPER':
+        return {
+            'school': Value(None, output_field=IntegerField()),
+            'students': StudentProfile.objects.all(),
+            'teachers': TeacherProfile.objects.all(),
+            'classes': Class.objects.all(),
+            'notices': notices,
+            'assignments': open_assignments,
+            'summaries': summaries,
+        }
+
+    if user.role == 'PRINCIPAL':
+        schools = School.objects.filter(principal_id=user.pk).values('pk')
+        return {
+            'school': Subquery(schools[:1]),
+            'students': StudentProfile.objects.filter(school__in=schools),
+            'teachers': TeacherProfile.objects.filter(school__in=schools),
+            'classes': Class.objects.filter(school__in=schools),
+            'notices': notices,
+            'assignments': open_assignments.filter(class_assigned__school__in=schools),
+            'summaries': summaries.filter(student__school__in=schools),
+        }
+
+    if user.role == 'TEACHER':
+        profile = TeacherProfile.objects.filter(user_id=user.pk)
+        sections = TeacherProfile.sections.through.objects.filter(
+            teacherprofile__user_id=user.pk
+        ).values('section_id')
+        return {
+            'school': Subquery(profile.values('school_id')[:1]),
+            'students': StudentProfile.objects.filter(section__in=sections),
+            'teachers': TeacherProfile.objects.filter(school__in=profile.values('school_id')),
+            'classes': TeacherProfile.sections.through.objects.filter(teacherprofile__user_id=user.pk),
+            'notices': notices.filter(id__in=addressed_to('TEACHER', [], sections).values('id')),
+            'assignments': open_assignments.filter(teacher__user_id=user.pk),
+            'summaries': summaries.filter(student__section__in=sections),
+        }
+
+    if user.role == 'STUDENT':
+        profile = StudentProfile.objects.filter(user_id=user.pk)
+        return {
+            'school': Subquery(profile.values('school_id')[:1]),
+            'students': StudentProfile.objects.filter(section__in=profile.values('section_id')),
+            'teachers': TeacherProfile.objects.filter(sections__in=profile.values('section_id')),
+            'classes': profile,
+            'notices': notices.filter(id__in=addressed_to(
+                'STUDENT', profile.values('class_assigned_id'), profile.values('section_id')
+            ).values('id')),
+            'assignments': open_assignments.filter(section__in=profile.values('section_id')).exclude(
+                Exists(AssignmentSubmission.objects.filter(assignment=OuterRef('pk'), student__user_id=user.pk))
+            ),
+            'summaries': summaries.filter(student__user_id=user.pk),
+        }
+
+    if user.role == 'PARENT':
+        children = StudentProfile.objects.filter(parents__user_id=user.pk)
+        return {
+            'school': Subquery(children.values('school_id')[:1]),
+            'students': children,
+            'teachers': TeacherProfile.objects.filter(sections__in=children.values('section_id')),
+            'classes': children,
+            'notices': notices.filter(id__in=addressed_to(
+                'PARENT', children.values('class_assigned_id'), children.values('section_id')
+            ).values('id')),
+            'assignments': open_assignments.filter(section__in=children.values('section_id')).exclude(
+                Exists(AssignmentSubmission.objects.filter(
+                    assignment=OuterRef('pk'),
+                    student__parents__user_id=user.pk,
+                    student__section=OuterRef('section')
+                ))
+            ),
+            'summaries': summaries.filter(student__parents__user_id=user.pk),
+        }
+
+    return None
+
+
+def compute_stats(user):
+    """Returns (school_id, stats) for the user, using a single SELECT"""
+    scopes = _scopes(user)
+    if scopes is None:
+        return None, dict(EMPTY_STATS)
+
+    row = User.objects.filter(pk=user.pk).annotate(
+        school_id=scopes['school'],
+        total_students=_count(scopes['students']),
+        total_teachers=_count(scopes['teachers']),
+        total_classes=_count(scopes['classes']),
+        total_notices=_count(scopes['notices']),
+        pending_assignments=_count(scopes['assignments']),
+        present_days=_sum(scopes['summaries'], 'present_days'),
+        total_days=_sum(scopes['summaries'], 'total_days'),
+    ).values(
+        'school_id', 'total_students', 'total_teachers', 'total_classes',
+        'total_notices', 'pending_assignments', 'present_days', 'total_days'
+    ).first()
+
+    if row is None:
+        return None, dict(EMPTY_STATS)
+
+    present_days = row.pop('present_days')
+    total_days = row.pop('total_days')
+    school_id = row.pop('school_id')
+    row['attendance_percentage'] = (
+        round(Decimal(present_days * 100) / total_days, 2) if total_days else Decimal('0.00')
+    )
+    return school_id, row
+
+
+def get_stats(user):
+    """Cached stats for the user; a hit touches only the cache"""
+    school_key = f'dashboard:school:{user.pk}'
+    school_id = cache.get(school_key)
+    versions = None
+
+    if school_id is not None:
+        versions = (_get_version(GLOBAL_VERSION_KEY), _get_version(_version_key(school_id)))
+        stats = cache.get(f'dashboard:stats:{user.pk}:{versions[0]}:{versions[1]}')
+        if stats is not None:
+            return stats
+
+    computed_school_id, stats = compute_stats(user)
+    computed_school_id = computed_school_id if computed_school_id is not None else ALL_SCHOOLS
+    if versions is None or computed_school_id != school_id:
+        versions = (_get_version(GLOBAL_VERSION_KEY), _get_version(_version_key(computed_school_id)))
+
+    from notices.scheduler import cache_timeout
+    # Notice counts change at publish/expiry transitions
+    timeout = cache_timeout(getattr(settings, 'DASHBOARD_STATS_TTL', 60))
+    cache.set(school_key, computed_school_id, timeout)
+    cache.set(f'dashboard:stats:{user.pk}:{versions[0]}:{versions[1]}', stats, timeout)
+    return stats
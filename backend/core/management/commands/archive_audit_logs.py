@@ -0,0 +1,101 @@
+import gzip
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Max
+from django.utils import timezone
+
+from core.models import AuditLog
+
+
+def month_start(year, month):
+    return timezone.make_aware(datetime(year, month, 1))
+
+
+def add_months(year, month, n):
+    index = year * 12 + (month - 1) + n
+    return index // 12, index % 12 + 1
+
+
+class Command(BaseCommand):
+    help = 'Move audit log months older than the retention window into gzipped JSONL archives'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-months', type=int,
+                            default=getattr(settings, 'AUDIT_LOG_RETENTION_MONTHS', 6),
+                            help='Whole months to keep in the database, counting the current one')
+        parser.add_argument('--archive-dir', default=getattr(settings, 'AUDIT_LOG_ARCHIVE_DIR', None))
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be archived')
+
+    def handle(self, *args, **options):
+        if options['keep_months'] < 1:
+            raise CommandError('--keep-months must be at least 1')
+        if not options['archive_dir']:
+            raise CommandError('No archive directory configured (AUDIT_LOG_ARCHIVE_DIR)')
+
+        archive_dir = Path(options['archive_dir'])
+        now = timezone.localtime()
+        cutoff = month_start(*add_months(now.year, now.month, 1 - options['keep_months']))
+
+        oldest = AuditLog.objects.order_by('timestamp').values_list('timestamp', flat=True).first()
+        if oldest is None or oldest >= cutoff:
+            self.stdout.write('Nothing to archive')
+            return
+
+        oldest = timezone.localtime(oldest)
+        year, month = oldest.year, oldest.month
+        while month_start(year, month) < cutoff:
+            start = month_start(year, month)
+            end = month_start(*add_months(year, month, 1))
+            self.archive_month(archive_dir, year, month, start, end, options)
+            year, month = add_months(year, month, 1)
+
+    def archive_month(self, archive_dir, year, month, start, end, options):
+        rows = AuditLog.objects.filter(timestamp__gte=start, timestamp__lt=end)
+        # Rows written after this point (with an older timestamp) wait for the next run
+        max_id = rows.aggregate(max_id=Max('id'))['max_id']
+        if max_id is None:
+            return
+        rows = rows.filter(id__lte=max_id)
+
+        if options['dry_run']:
+            self.stdout.write(f'{year}-{month:02d}: would archive {rows.count()} entries')
+            return
+
+        archive_dir.mkdir(parents=True, exist_ok=True)
+        path = archive_dir / f'audit_logs-{year}-{month:02d}.jsonl.gz'
+        part = 1
+        while path.exists():
+            # A month can be archived more than once if late rows arrive
+            part += 1
+            path = archive_dir / f'audit_logs-{year}-{month:02d}.{part}.jsonl.gz'
+
+        tmp_path = path.with_name(path.name + '.tmp')
+        written = 0
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as fh:
+            stream = rows.order_by('timestamp', 'id').values(
+                'id', 'user_id', 'action', 'model_name', 'object_id',
+                'timestamp', 'ip_address', 'details'
+            ).iterator(chunk_size=options['chunk_size'])
+            for row in stream:
+                fh.write(json.dumps(row, cls=DjangoJSONEncoder))
+                fh.write('\n')
+                written += 1
+        with open(tmp_path, 'rb') as fh:
+            os.fsync(fh.fileno())
+        os.replace(tmp_path, path)
+
+        deleted = 0
+        while True:
+            ids = list(rows.order_by('id').values_list('id', flat=True)[:options['chunk_size']])
+            if not ids:
+                break
+            deleted += AuditLog.objects.filter(id__in=ids).delete()[0]
+
+        self.stdout.write(f'{year}-{month:02d}: archived {written}, deleted {deleted} -> {path}')
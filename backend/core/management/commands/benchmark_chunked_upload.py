@@ -0,0 +1,137 @@
+import hashlib
+import os
+import tempfile
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.benchmark import build_section, rolled_back
+from core.views import ChunkedUploadViewSet
+from resources.models import Resource, ResourceCategory
+
+MB = 1024 * 1024
+
+
+class DroppingStream:
+    """Request body that fails part way through, like a dropped connection"""
+
+    def __init__(self, data, fail_after):
+        self.data = data
+        self.position = 0
+        self.fail_after = fail_after
+
+    def read(self, size=-1):
+        if self.position >= self.fail_after:
+            raise OSError('connection reset')
+        end = min(len(self.data), self.position + size, self.fail_after)
+        piece = self.data[self.position:end]
+        self.position = end
+        return piece
+
+
+class Command(BaseCommand):
+    help = (
+        'Upload a generated file to a Resource in chunks, dropping one chunk half way, '
+        'then resume, finalize and verify it; reports throughput and the memory held '
+        'while storing a chunk'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size-mb', type=int, default=256)
+        parser.add_argument('--chunk-mb', type=int, default=8)
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        views = {
+            name: ChunkedUploadViewSet.as_view(mapping)
+            for name, mapping in [
+                ('list', {'post': 'create'}),
+                ('detail', {'get': 'retrieve', 'put': 'update'}),
+                ('finalize', {'post': 'finalize'}),
+            ]
+        }
+        chunk_size = options['chunk_mb'] * MB
+
+        with tempfile.TemporaryDirectory() as media, rolled_back(), override_settings(
+            MEDIA_ROOT=media, CHUNKED_UPLOAD_DIR=os.path.join(media, 'parts')
+        ):
+            fixture = build_section(1)
+            resource = Resource.objects.create(
+                title='Lecture', resource_type='video', subject=fixture['subject'],
+                category=ResourceCategory.objects.create(name='Bench'), uploaded_by=fixture['teacher'],
+            )
+            user = fixture['teacher_user']
+
+            def call(name, request, **kwargs):
+                force_authenticate(request, user=user)
+                return views[name](request, **kwargs)
+
+            # Deterministic content, generated one chunk at a time
+            def chunk_bytes(index):
+                return hashlib.sha256(str(index).encode()).digest() * (chunk_size // 32)
+
+            size = options['size_mb'] * MB
+            chunks = size // chunk_size
+            digest = hashlib.sha256()
+            for index in range(chunks):
+                digest.update(chunk_bytes(index))
+
+            response = call('list', factory.post('/', {
+                'target': 'resource', 'target_id': resource.pk, 'filename': 'lecture.mp4',
+                'size': chunks * chunk_size, 'checksum': digest.hexdigest(),
+            }, format='json'))
+            if response.status_code != 201:
+                raise CommandError(f'create: {response.status_code} {response.data}')
+            upload_id = response.data['id']
+
+            peak = 0
+
+            def put(data, offset, stream=None):
+                nonlocal peak
+                request = factory.put(f'/?offset={offset}', data, content_type='application/octet-stream')
+                if stream is not None:
+                    request._stream = stream
+                # Only what the view allocates, not the request body the factory built
+                tracemalloc.start()
+                response = call('detail', request, pk=upload_id)
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+                return response
+
+            started = time.perf_counter()
+            offset = 0
+            for index in range(chunks):
+                data = chunk_bytes(index)
+                if index == chunks // 2:
+                    # The connection drops half way through this chunk
+                    response = put(data, offset, DroppingStream(data, len(data) // 2))
+                    offset = call('detail', factory.get('/'), pk=upload_id).data['offset']
+                    data = data[offset - index * chunk_size:]
+                    self.stdout.write(f'Chunk {index} dropped; resuming at offset {offset}')
+                response = put(data, offset)
+                if response.status_code != 200:
+                    raise CommandError(f'chunk {index}: {response.status_code} {response.data}')
+                offset = response.data['offset']
+            uploaded = time.perf_counter() - started
+
+            started = time.perf_counter()
+            response = call('finalize', factory.post('/', {}, format='json'), pk=upload_id)
+            finalized = time.perf_counter() - started
+            if response.status_code != 200 or response.data['status'] != 'complete':
+                raise CommandError(f'finalize: {response.status_code} {response.data}')
+
+            resource.refresh_from_db()
+            with resource.file.open('rb') as stored:
+                stored_digest = hashlib.file_digest(stored, 'sha256').hexdigest()
+            if stored_digest != digest.hexdigest() or resource.file_size != size:
+                raise CommandError('stored file does not match what was sent')
+
+            self.stdout.write(
+                f"{options['size_mb']}MB in {chunks} chunks of {options['chunk_mb']}MB: "
+                f"upload {uploaded:.2f}s ({options['size_mb'] / uploaded:.0f}MB/s), "
+                f"finalize {finalized:.2f}s; peak memory storing a chunk {peak / 1024:.0f}KB"
+            )
+            self.stdout.write(self.style.SUCCESS(f'Attached as {resource.file.name}, checksum verified'))
@@ -0,0 +1,108 @@
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.benchmark import measure, rolled_back
+from core.models import User, School, Class, Section, Subject, TeacherProfile, StudentProfile, ParentProfile
+from core.views import (
+    SchoolViewSet, ClassViewSet, SectionViewSet, TeacherProfileViewSet,
+    StudentProfileViewSet, ParentProfileViewSet
+)
+
+VIEWSETS = [
+    SchoolViewSet, ClassViewSet, SectionViewSet, TeacherProfileViewSet,
+    StudentProfileViewSet, ParentProfileViewSet,
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Serialize the core list querysets at several sizes and fail if the '
+        'number of queries grows with the number of rows'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[20, 200, 2000])
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        results = {viewset.__name__: [] for viewset in VIEWSETS}
+
+        self.stdout.write(f"{'viewset':<24} {'rows':>6} {'queries':>8} {'ms':>9}")
+        for size in options['sizes']:
+            with rolled_back():
+                developer = self.build(size)
+                for viewset in VIEWSETS:
+                    request = factory.get('/')
+                    force_authenticate(request, user=developer)
+                    view = viewset(request=Request(request), format_kwarg=None, action='list', kwargs={})
+                    view.request.user = developer
+                    with measure() as stats:
+                        data = view.get_serializer(view.get_queryset(), many=True).data
+                    results[viewset.__name__].append(stats['queries'])
+                    self.stdout.write(
+                        f"{viewset.__name__:<24} {len(data):>6} {stats['queries']:>8} {stats['ms']:>9.1f}"
+                    )
+
+        growing = [name for name, counts in results.items() if len(set(counts)) > 1]
+        if growing:
+            raise CommandError(f"Query count depends on row count for: {', '.join(growing)}")
+        self.stdout.write(self.style.SUCCESS('Query counts are independent of the number of rows'))
+
+    def users(self, tag, role, count):
+        prefix = f'bench-{role.lower()}-{tag}-'
+        User.objects.bulk_create([
+            User(username=f'{prefix}{i}', role=role, first_name=role.title(), last_name=str(i))
+            for i in range(count)
+        ])
+        return list(User.objects.filter(username__startswith=prefix).order_by('id'))
+
+    def build(self, size):
+        """`size` rows for every list, each pointing at distinct related rows"""
+        tag = uuid.uuid4().hex[:8]
+        developer = User.objects.create(username=f'bench-dev-{tag}', role='DEVELOPER')
+
+        School.objects.bulk_create([
+            School(name=f'Bench {tag} {i}', principal=principal)
+            for i, principal in enumerate(self.users(tag, 'PRINCIPAL', size))
+        ])
+        school = School.objects.filter(name__startswith=f'Bench {tag}').first()
+
+        Class.objects.bulk_create([Class(name=f'Bench {tag} {i}', school=school) for i in range(size)])
+        class_list = list(Class.objects.filter(name__startswith=f'Bench {tag}').order_by('id'))
+        teacher_users = self.users(tag, 'TEACHER', size)
+        Section.objects.bulk_create([
+            Section(name='A', class_assigned=class_obj, class_teacher=teacher)
+            for class_obj, teacher in zip(class_list, teacher_users)
+        ])
+        section_list = list(Section.objects.filter(class_assigned__in=class_list).order_by('id'))
+
+        subject = Subject.objects.create(name=f'Bench {tag}', code=tag)
+        TeacherProfile.objects.bulk_create([
+            TeacherProfile(user=user, employee_id=f'T{tag}-{i}', school=school)
+            for i, user in enumerate(teacher_users)
+        ])
+        teachers = TeacherProfile.objects.filter(user__in=teacher_users)
+        TeacherProfile.subjects.through.objects.bulk_create([
+            TeacherProfile.subjects.through(teacherprofile=teacher, subject=subject)
+            for teacher in teachers
+        ])
+
+        StudentProfile.objects.bulk_create([
+            StudentProfile(
+                user=user, student_id=f'S{tag}-{i}', school=school,
+                class_assigned=section.class_assigned, section=section
+            )
+            for i, (user, section) in enumerate(zip(self.users(tag, 'STUDENT', size), section_list))
+        ])
+        students = list(StudentProfile.objects.filter(section__in=section_list).order_by('id'))
+
+        parent_users = self.users(tag, 'PARENT', size)
+        ParentProfile.objects.bulk_create([ParentProfile(user=user) for user in parent_users])
+        ParentProfile.children.through.objects.bulk_create([
+            ParentProfile.children.through(parentprofile=parent, studentprofile=student)
+            for parent, student in zip(ParentProfile.objects.filter(user__in=parent_users).order_by('id'), students)
+        ])
+        return developer
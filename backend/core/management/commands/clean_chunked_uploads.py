@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.uploads import expire_uploads
+
+
+class Command(BaseCommand):
+    help = 'Delete unfinished chunked uploads, and their part files, that have received nothing for a while'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=settings.CHUNKED_UPLOAD_EXPIRY_HOURS,
+                            help='Hours since the last chunk')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be deleted')
+
+    def handle(self, *args, **options):
+        if options['hours'] < 1:
+            raise CommandError('--hours must be at least 1')
+        count = expire_uploads(options['hours'], dry_run=options['dry_run'])
+        prefix = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(f"{prefix} {count} uploads idle for over {options['hours']} hours")
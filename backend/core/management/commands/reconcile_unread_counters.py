@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from core import unread
+from core.models import UnreadCounter
+
+
+class Command(BaseCommand):
+    help = 'Recompute stored unread counters and fix the ones that drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', action='append', choices=unread.KINDS,
+                            help='Only reconcile this kind (repeatable)')
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='Counters checked per batch')
+
+    def handle(self, *args, **options):
+        kinds = options['kind'] or list(unread.KINDS)
+        counters = UnreadCounter.objects.filter(kind__in=kinds).select_related('user').order_by('id')
+
+        checked = fixed = 0
+        last_id = 0
+        while True:
+            chunk = list(counters.filter(id__gt=last_id)[:options['chunk_size']])
+            if not chunk:
+                break
+            drifted = []
+            for counter in chunk:
+                actual = unread.compute(counter.kind, counter.user)
+                if actual != counter.count:
+                    counter.count = actual
+                    drifted.append(counter)
+            if drifted:
+                UnreadCounter.objects.bulk_update(drifted, ['count'])
+            checked += len(chunk)
+            fixed += len(drifted)
+            last_id = chunk[-1].id
+
+        self.stdout.write(self.style.SUCCESS(f'Checked {checked} counters, fixed {fixed}'))
@@ -1,8 +1,11 @@
 
 import json
+from django.conf import settings
+from django.utils import timezone
 from django.utils.deprecation import MiddlewareMixin
 from django.http import JsonResponse
 from .models import AuditLog
+from .audit import audit_writer
 
 class AuditLogMiddleware(MiddlewareMixin):
     """Middleware to log user actions for audit purposes"""
@@ -50,20 +53,26 @@ class AuditLogMiddleware(MiddlewareMixin):
                 else:
                     ip_address = request.META.get('REMOTE_ADDR', '127.0.0.1')
                 
-                # Create audit log
-                AuditLog.objects.create(
-                    user=request.user,
-                    action=action,
-                    model_name=model_name,
-                    object_id=object_id,
-                    ip_address=ip_address,
-                    details={
+                entry = {
+                    'user_id': request.user.pk,
+                    'action': action,
+                    'model_name': model_name,
+                    'object_id': object_id,
+                    'ip_address': ip_address,
+                    'timestamp': timezone.now(),
+                    'details': {
                         'path': request.path,
                         'method': request.method,
                         'status_code': response.status_code,
                         'user_agent': request.META.get('HTTP_USER_AGENT', '')[:200]
                     }
-                )
+                }
+
+                # Queue for the background writer unless async auditing is disabled
+                if getattr(settings, 'AUDIT_LOG_ASYNC', True):
+                    audit_writer.submit(**entry)
+                else:
+                    AuditLog.objects.create(**entry)
         except Exception as e:
             # Don't let audit logging break the request
             pass
@@ -1,6 +1,8 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.core.validators import RegexValidator
+from django.utils import timezone
+import uuid
 
 class User(AbstractUser):
     ROLE_CHOICES = [
@@ -147,9 +149,71 @@ class AuditLog(models.Model):
     action = models.CharField(max_length=100)
     model_name = models.CharField(max_length=50)
     object_id = models.CharField(max_length=50)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the request is handled, not when the background writer flushes it
+    timestamp = models.DateTimeField(default=timezone.now)
     ip_address = models.GenericIPAddressField()
     details = models.JSONField(default=dict)
 
+    class Meta:
+        # Match AuditLogViewSet's filters, all ordered newest first
+        indexes = [
+            models.Index(fields=['-timestamp', '-id'], name='auditlog_ts_idx'),
+            models.Index(fields=['user', '-timestamp', '-id'], name='auditlog_user_ts_idx'),
+            models.Index(fields=['action', '-timestamp', '-id'], name='auditlog_action_ts_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.action} - {self.timestamp}"
+
+class UnreadCounter(models.Model):
+    """
+    Per-user unread badge count, kept up to date by core.unread. A missing
+    row means the count has not been computed yet (or was invalidated).
+    """
+    KIND_CHOICES = [
+        ('notices', 'Notices'),
+        ('messages', 'Messages'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='unread_counters')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['user', 'kind']
+
+    def __str__(self):
+        return f"{self.user.username} - {self.kind}: {self.count}"
+
+class ChunkedUpload(models.Model):
+    """
+    A file sent in chunks through core.uploads. Bytes accumulate in a part
+    file on disk; `offset` is how many of them are stored, so an interrupted
+    upload resumes from there. Finalizing attaches the file to its target.
+    """
+    TARGET_CHOICES = [
+        ('assignment_resource', 'Assignment resource'),
+        ('notice_attachment', 'Notice attachment'),
+        ('resource', 'Resource file'),
+    ]
+    STATUS_CHOICES = [
+        ('uploading', 'Uploading'),
+        ('complete', 'Complete'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chunked_uploads')
+    target = models.CharField(max_length=30, choices=TARGET_CHOICES)
+    target_id = models.PositiveBigIntegerField()
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    checksum = models.CharField(max_length=64, blank=True)  # expected SHA-256, hex
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='uploading')
+    attached_id = models.PositiveBigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
     def __str__(self):
-        return f"{self.user.username} - {self.action} - {self.timestamp}"
\ No newline at end of file
+        return f"{self.filename} ({self.offset}/{self.size})"
@@ -1,5 +1,6 @@
 
 from rest_framework.permissions import BasePermission
+from .scope import get_scope
 
 class IsDeveloper(BasePermission):
     """Permission for Developer role - full access"""
@@ -34,14 +35,15 @@ class IsOwnerOrTeacher(BasePermission):
             return True
         
         # Write permissions only to the owner or teacher/principal/developer
-        if hasattr(obj, 'student'):
-            return (obj.student.user == request.user or 
-                   request.user.role in ['TEACHER', 'PRINCIPAL', 'DEVELOPER'])
-        if hasattr(obj, 'user'):
-            return (obj.user == request.user or 
-                   request.user.role in ['TEACHER', 'PRINCIPAL', 'DEVELOPER'])
+        if request.user.role in ['TEACHER', 'PRINCIPAL', 'DEVELOPER']:
+            return True
+        if hasattr(obj, 'student_id'):
+            scope = get_scope(request)
+            return scope.role == 'STUDENT' and obj.student_id in scope.children_ids
+        if hasattr(obj, 'user_id'):
+            return obj.user_id == request.user.pk
         
-        return request.user.role in ['TEACHER', 'PRINCIPAL', 'DEVELOPER']
+        return False
 
 class CanViewStudentData(BasePermission):
     """Permission to view student data based on role"""
@@ -0,0 +1,53 @@
+"""Querysets behind the core list endpoints.
+
+Each one joins or prefetches everything its serializer reads and annotates
+the per-row counts, so listing N rows costs the same number of queries for
+any N. The serializers fall back to a COUNT when an instance was not loaded
+through these (e.g. the response of a create).
+"""
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import School, Class, Section, TeacherProfile, StudentProfile, ParentProfile
+
+
+def related_count(queryset, field):
+    """Correlated COUNT of `queryset` rows whose `field` points at the outer row"""
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef('pk')}).order_by()
+            .values(field).annotate(n=Count('pk')).values('n')[:1],
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def schools():
+    return School.objects.select_related('principal')
+
+
+def classes():
+    return Class.objects.select_related('school').annotate(
+        sections_count=related_count(Section.objects.all(), 'class_assigned')
+    )
+
+
+def sections():
+    return Section.objects.select_related('class_assigned', 'class_teacher').annotate(
+        students_count=related_count(StudentProfile.objects.all(), 'section')
+    )
+
+
+def teacher_profiles():
+    return TeacherProfile.objects.select_related('user', 'school').prefetch_related('subjects', 'sections')
+
+
+def student_profiles():
+    return StudentProfile.objects.select_related('user', 'school', 'class_assigned', 'section')
+
+
+def parent_profiles():
+    return ParentProfile.objects.select_related('user').prefetch_related(
+        Prefetch('children', queryset=student_profiles())
+    )
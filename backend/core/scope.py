@@ -0,0 +1,111 @@
+from django.utils.functional import cached_property
+
+from .models import School, TeacherProfile, StudentProfile, ParentProfile
+
+
+class UserScope:
+    """
+    Role, profile and visible section/class/child ids of the requesting user.
+
+    Views and permissions read these instead of walking user.teacherprofile,
+    user.studentprofile or user.parentprofile.children again. Everything is
+    loaded lazily and at most once per request; see get_scope().
+    """
+    PROFILE_MODELS = {
+        'TEACHER': TeacherProfile,
+        'STUDENT': StudentProfile,
+        'PARENT': ParentProfile,
+    }
+
+    def __init__(self, user):
+        self.user = user
+        self.user_id = user.pk
+        self.role = getattr(user, 'role', None)
+        # Set by authentication.jwt.ClaimsJWTAuthentication from the access token
+        self.claims = getattr(user, 'token_claims', None) or {}
+
+    @cached_property
+    def profile(self):
+        model = self.PROFILE_MODELS.get(self.role)
+        if model is None or self.user_id is None:
+            return None
+        return model.objects.filter(user_id=self.user_id).first()
+
+    @property
+    def profile_id(self):
+        if self.claims.get('profile_id') is not None:
+            return self.claims['profile_id']
+        return self.profile.pk if self.profile else None
+
+    @cached_property
+    def _students(self):
+        """(student_id, section_id, class_id, school_id) rows reachable through the profile"""
+        if self.role == 'STUDENT':
+            profile = self.profile
+            if profile is None:
+                return []
+            return [(profile.pk, profile.section_id, profile.class_assigned_id, profile.school_id)]
+        if self.role == 'PARENT':
+            return list(
+                StudentProfile.objects.filter(parents__user_id=self.user_id)
+                .values_list('id', 'section_id', 'class_assigned_id', 'school_id')
+            )
+        return []
+
+    @cached_property
+    def _teacher_sections(self):
+        """(section_id, class_id) rows for a teacher's assigned sections"""
+        if self.role != 'TEACHER':
+            return []
+        return list(
+            TeacherProfile.sections.through.objects.filter(teacherprofile__user_id=self.user_id)
+            .values_list('section_id', 'section__class_assigned_id')
+        )
+
+    @cached_property
+    def section_ids(self):
+        if self.role == 'TEACHER':
+            return sorted({section_id for section_id, _ in self._teacher_sections})
+        return sorted({row[1] for row in self._students if row[1] is not None})
+
+    @cached_property
+    def class_ids(self):
+        if self.role == 'TEACHER':
+            return sorted({class_id for _, class_id in self._teacher_sections})
+        return sorted({row[2] for row in self._students if row[2] is not None})
+
+    @cached_property
+    def children_ids(self):
+        """Student ids of a parent's children (or the student's own id)"""
+        return [row[0] for row in self._students]
+
+    @cached_property
+    def subject_ids(self):
+        if self.role != 'TEACHER':
+            return []
+        return list(
+            TeacherProfile.subjects.through.objects.filter(teacherprofile__user_id=self.user_id)
+            .values_list('subject_id', flat=True)
+        )
+
+    @cached_property
+    def school_id(self):
+        if self.claims.get('school_id') is not None:
+            return self.claims['school_id']
+        if self.role == 'PRINCIPAL':
+            return School.objects.filter(principal_id=self.user_id).values_list('id', flat=True).first()
+        if self.role == 'TEACHER':
+            return self.profile.school_id if self.profile else None
+        if self._students:
+            return self._students[0][3]
+        return None
+
+
+def get_scope(request):
+    """UserScope for the request's user, built once and kept on the request"""
+    http_request = getattr(request, '_request', request)
+    scope = getattr(http_request, 'user_scope', None)
+    if scope is None or scope.user_id != request.user.pk:
+        scope = UserScope(request.user)
+        http_request.user_scope = scope
+    return scope
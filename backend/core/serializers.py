@@ -1,7 +1,7 @@
 
 from rest_framework import serializers
 from django.contrib.auth import authenticate
-from .models import User, School, Class, Section, Subject, TeacherProfile, StudentProfile, ParentProfile, AuditLog
+from .models import User, School, Class, Section, Subject, TeacherProfile, StudentProfile, ParentProfile, AuditLog, ChunkedUpload
 
 class UserSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
@@ -40,7 +40,9 @@ class ClassSerializer(serializers.ModelSerializer):
         fields = '__all__'
     
     def get_sections_count(self, obj):
-        return obj.sections.count()
+        # Annotated by core.querysets.classes()
+        count = getattr(obj, 'sections_count', None)
+        return obj.sections.count() if count is None else count
 
 class SectionSerializer(serializers.ModelSerializer):
     class_name = serializers.CharField(source='class_assigned.name', read_only=True)
@@ -52,7 +54,9 @@ class SectionSerializer(serializers.ModelSerializer):
         fields = '__all__'
     
     def get_students_count(self, obj):
-        return obj.studentprofile_set.count()
+        # Annotated by core.querysets.sections()
+        count = getattr(obj, 'students_count', None)
+        return obj.studentprofile_set.count() if count is None else count
 
 class TeacherProfileSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
@@ -99,3 +103,12 @@ class DashboardStatsSerializer(serializers.Serializer):
     total_notices = serializers.IntegerField()
     pending_assignments = serializers.IntegerField()
     attendance_percentage = serializers.DecimalField(max_digits=5, decimal_places=2)
+
+class ChunkedUploadSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ChunkedUpload
+        fields = [
+            'id', 'target', 'target_id', 'filename', 'size', 'offset', 'checksum',
+            'status', 'attached_id', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
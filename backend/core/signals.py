@@ -0,0 +1,43 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from attendance.signals import attendance_bulk_marked
+from notices.signals import notice_visibility_changed
+from assignments.models import Assignment
+from .models import Class
+from . import dashboard
+
+_class_schools = {}
+
+
+def _school_for_class(class_id):
+    if class_id not in _class_schools:
+        _class_schools[class_id] = Class.objects.filter(pk=class_id).values_list('school_id', flat=True).first()
+    return _class_schools[class_id]
+
+
+@receiver([post_save, post_delete], sender='attendance.AttendanceRecord')
+def attendance_changed(sender, instance, **kwargs):
+    dashboard.invalidate_school(_school_for_class(instance.class_assigned_id))
+
+
+@receiver(attendance_bulk_marked)
+def attendance_bulk_changed(sender, class_id, **kwargs):
+    dashboard.invalidate_school(_school_for_class(class_id))
+
+
+@receiver([post_save, post_delete], sender=Assignment)
+def assignment_changed(sender, instance, **kwargs):
+    dashboard.invalidate_school(_school_for_class(instance.class_assigned_id))
+
+
+@receiver([post_save, post_delete], sender='assignments.AssignmentSubmission')
+def submission_changed(sender, instance, **kwargs):
+    class_id = Assignment.objects.filter(pk=instance.assignment_id).values_list('class_assigned_id', flat=True).first()
+    dashboard.invalidate_school(_school_for_class(class_id))
+
+
+@receiver(notice_visibility_changed)
+@receiver([post_save, post_delete], sender='notices.Notice')
+def notice_changed(sender, **kwargs):
+    # Notices are not tied to a school, so every dashboard is affected
+    dashboard.invalidate_all()
@@ -0,0 +1,95 @@
+"""Unread counters for notices and messages.
+
+Badge counts are read from UnreadCounter in one query. Counters are bumped
+when a notice goes live or a message gains recipients, decremented when a
+read receipt is inserted, and dropped (to be recomputed with one anti-join
+on the next read) whenever a change is too irregular to apply as a delta,
+such as an edited notice audience. reconcile_unread_counters repairs any
+drift left by races between those paths.
+"""
+from django.apps import apps
+from django.db import IntegrityError, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+
+from .models import UnreadCounter
+from .scope import UserScope
+
+NOTICES = 'notices'
+MESSAGES = 'messages'
+KINDS = (NOTICES, MESSAGES)
+
+
+def unread_queryset(kind, user):
+    """Objects of `kind` the user can see and has no read receipt for"""
+    if kind == NOTICES:
+        from notices.audience import visible_notices
+        return visible_notices(user, UserScope(user)).exclude(read_receipts__user_id=user.pk)
+    if kind == MESSAGES:
+        Message = apps.get_model('communications', 'Message')
+        return Message.objects.filter(recipients=user.pk).exclude(read_status__user_id=user.pk)
+    raise ValueError(f'Unknown unread counter kind: {kind}')
+
+
+def compute(kind, user):
+    return unread_queryset(kind, user).order_by().count()
+
+
+def counts(user):
+    """{kind: unread count} for the user, computing missing counters once"""
+    stored = dict(UnreadCounter.objects.filter(user_id=user.pk).values_list('kind', 'count'))
+    missing = [kind for kind in KINDS if kind not in stored]
+    if missing:
+        computed = {kind: compute(kind, user) for kind in missing}
+        UnreadCounter.objects.bulk_create(
+            [UnreadCounter(user_id=user.pk, kind=kind, count=count) for kind, count in computed.items()],
+            ignore_conflicts=True
+        )
+        stored.update(computed)
+    return {kind: stored[kind] for kind in KINDS}
+
+
+def bump(kind, user_ids, delta=1):
+    """
+    Add `delta` to the counters of `user_ids` (a list or a subquery). Users
+    without a counter row are skipped; theirs is computed when first read.
+    """
+    counters = UnreadCounter.objects.filter(kind=kind, user_id__in=user_ids)
+    if delta >= 0:
+        return counters.update(count=F('count') + delta)
+    return counters.update(count=Greatest(F('count') + delta, Value(0)))
+
+
+def forget(kind, user_ids):
+    """Drop counters so they are recomputed on the next read"""
+    return UnreadCounter.objects.filter(kind=kind, user_id__in=user_ids).delete()[0]
+
+
+def set_count(kind, user_id, count):
+    updated = UnreadCounter.objects.filter(kind=kind, user_id=user_id).update(count=count)
+    if not updated:
+        try:
+            with transaction.atomic():
+                UnreadCounter.objects.create(kind=kind, user_id=user_id, count=count)
+        except IntegrityError:
+            UnreadCounter.objects.filter(kind=kind, user_id=user_id).update(count=count)
+
+
+def mark_all_read(kind, user):
+    """
+    Insert read receipts for everything unread of `kind` and zero the
+    counter. Returns the number of receipts written.
+    """
+    unread_ids = list(unread_queryset(kind, user).order_by().values_list('pk', flat=True))
+    if kind == NOTICES:
+        Receipt = apps.get_model('notices', 'NoticeRead')
+        receipts = [Receipt(notice_id=pk, user_id=user.pk) for pk in unread_ids]
+    else:
+        Receipt = apps.get_model('communications', 'MessageRead')
+        receipts = [Receipt(message_id=pk, user_id=user.pk) for pk in unread_ids]
+
+    with transaction.atomic():
+        # A receipt written concurrently is simply skipped
+        Receipt.objects.bulk_create(receipts, ignore_conflicts=True, batch_size=1000)
+        set_count(kind, user.pk, 0)
+    return len(receipts)
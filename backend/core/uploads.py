@@ -0,0 +1,263 @@
+"""Chunked, resumable file uploads.
+
+Large files (lecture videos, mostly) do not fit the multipart endpoints,
+which take a whole file within FILE_UPLOAD_MAX_MEMORY_SIZE. Instead a client
+  1. creates an upload for a target object, filename and size,
+  2. PUTs the bytes in chunks, each at the offset stored so far,
+  3. finalizes it, which verifies the SHA-256 checksum and attaches the
+     file to the target.
+
+Chunks are streamed from the request straight into a part file under
+CHUNKED_UPLOAD_DIR in small pieces, so memory use does not depend on the
+chunk size. The stored offset only advances by what was actually written,
+after it reached the disk; a chunk cut short by a dropped connection keeps
+its received bytes and the client resumes from the offset the upload
+reports. On the default file system storage the finished part file is
+moved into place rather than copied.
+"""
+import datetime
+import hashlib
+import os
+import re
+from pathlib import Path
+from types import SimpleNamespace
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.db import transaction
+from django.http import UnreadablePostError
+from django.utils import timezone
+
+from .models import ChunkedUpload
+
+READ_SIZE = 64 * 1024
+HASH_READ_SIZE = 1024 * 1024
+SHA256 = re.compile(r'^[0-9a-f]{64}$')
+
+
+class UploadError(Exception):
+    """An upload request that cannot be honoured; `status` is the HTTP status to answer with"""
+
+    def __init__(self, message, status=400, **extra):
+        super().__init__(message)
+        self.status = status
+        self.extra = extra
+
+
+def _staff_or_owner(user, is_owner):
+    return user.is_principal or user.is_developer or (user.is_teacher and is_owner)
+
+
+def _attach_assignment_resource(upload, part):
+    AssignmentResource = apps.get_model('assignments', 'AssignmentResource')
+    resource = AssignmentResource(assignment_id=upload.target_id, filename=upload.filename, file_size=upload.size)
+    resource.file.save(upload.filename, part)
+    return resource.pk
+
+
+def _attach_notice_attachment(upload, part):
+    NoticeAttachment = apps.get_model('notices', 'NoticeAttachment')
+    attachment = NoticeAttachment(notice_id=upload.target_id)
+    attachment.file.save(upload.filename, part)
+    return attachment.pk
+
+
+def _attach_resource_file(upload, part):
+    Resource = apps.get_model('resources', 'Resource')
+    resource = Resource.objects.get(pk=upload.target_id)
+    resource.file_size = upload.size
+    resource.file.save(upload.filename, part)
+    return resource.pk
+
+
+# What each target attaches to: the object the file belongs to, who may
+# attach to it, the model and field the file ends up in, and how
+TARGETS = {
+    'assignment_resource': {
+        'parent': ('assignments', 'Assignment'),
+        'allowed': lambda user, profile_id, obj: _staff_or_owner(user, obj.teacher_id == profile_id),
+        'field': ('assignments', 'AssignmentResource', 'file'),
+        'max_size': 2 ** 31 - 1,  # AssignmentResource.file_size
+        'attach': _attach_assignment_resource,
+    },
+    'notice_attachment': {
+        'parent': ('notices', 'Notice'),
+        'allowed': lambda user, profile_id, obj: _staff_or_owner(user, obj.created_by_id == user.pk),
+        'field': ('notices', 'NoticeAttachment', 'file'),
+        'attach': _attach_notice_attachment,
+    },
+    'resource': {
+        'parent': ('resources', 'Resource'),
+        'allowed': lambda user, profile_id, obj: _staff_or_owner(user, obj.uploaded_by_id == profile_id),
+        'field': ('resources', 'Resource', 'file'),
+        'attach': _attach_resource_file,
+    },
+}
+
+
+def part_path(upload):
+    return Path(settings.CHUNKED_UPLOAD_DIR) / f'{upload.pk}.part'
+
+
+def _remove_part(upload):
+    try:
+        os.remove(part_path(upload))
+    except FileNotFoundError:
+        pass
+
+
+def create_upload(user, profile_id, target, target_id, filename, size, checksum=''):
+    """Validate and register a new upload. Raises UploadError."""
+    config = TARGETS.get(target)
+    if config is None:
+        raise UploadError(f"target must be one of {', '.join(TARGETS)}")
+    try:
+        target_id, size = int(target_id), int(size)
+    except (TypeError, ValueError):
+        raise UploadError('target_id and size must be integers')
+    filename = os.path.basename(str(filename or '').strip())
+    if not filename:
+        raise UploadError('filename is required')
+    checksum = str(checksum or '').lower()
+    if checksum and not SHA256.match(checksum):
+        raise UploadError('checksum must be a hex SHA-256 digest')
+    max_size = min(config.get('max_size', settings.CHUNKED_UPLOAD_MAX_SIZE), settings.CHUNKED_UPLOAD_MAX_SIZE)
+    if not 0 < size <= max_size:
+        raise UploadError(f'size must be between 1 and {max_size} bytes')
+
+    app_label, model_name, field_name = config['field']
+    field = apps.get_model(app_label, model_name)._meta.get_field(field_name)
+    try:
+        for validator in field.validators:
+            validator(SimpleNamespace(name=filename))
+    except ValidationError as exc:
+        raise UploadError(' '.join(exc.messages))
+
+    parent = apps.get_model(*config['parent']).objects.filter(pk=target_id).first()
+    if parent is None:
+        raise UploadError('Target not found', status=404)
+    if not config['allowed'](user, profile_id, parent):
+        raise UploadError('You cannot attach files to this target', status=403)
+
+    upload = ChunkedUpload.objects.create(
+        user=user, target=target, target_id=target_id, filename=filename, size=size, checksum=checksum
+    )
+    Path(settings.CHUNKED_UPLOAD_DIR).mkdir(parents=True, exist_ok=True)
+    part_path(upload).touch()
+    return upload
+
+
+def write_chunk(upload, offset, stream, length=None):
+    """
+    Append bytes read from `stream` (at most `length`) at `offset`, which
+    must be the upload's current offset. Returns the new offset. Raises
+    UploadError.
+    """
+    if upload.status != 'uploading':
+        raise UploadError(f'Upload is {upload.status}', status=409, offset=upload.offset)
+    if offset != upload.offset:
+        raise UploadError('Chunk does not start at the stored offset', status=409, offset=upload.offset)
+    remaining = upload.size - offset
+    if length is not None and length > remaining:
+        raise UploadError(f'Chunk is longer than the {remaining} bytes left', status=413, offset=upload.offset)
+
+    written = 0
+    limit = remaining if length is None else length
+    with open(part_path(upload), 'r+b') as part:
+        part.seek(offset)
+        try:
+            while written < limit:
+                piece = stream.read(min(READ_SIZE, limit - written)) if stream is not None else b''
+                if not piece:
+                    break
+                part.write(piece)
+                written += len(piece)
+        except (OSError, UnreadablePostError):
+            pass  # dropped connection: keep what arrived, the client resumes from the new offset
+        # Anything past the new offset is left over from an interrupted attempt
+        part.truncate(offset + written)
+        part.flush()
+        os.fsync(part.fileno())
+
+    # A concurrent chunk for the same offset may have landed first
+    if written and not ChunkedUpload.objects.filter(pk=upload.pk, offset=offset, status='uploading').update(
+        offset=offset + written, updated_at=timezone.now()
+    ):
+        upload.refresh_from_db(fields=['offset', 'status'])
+        raise UploadError('Chunk does not start at the stored offset', status=409, offset=upload.offset)
+    upload.offset = offset + written
+    return upload.offset
+
+
+class PartFile(File):
+    """Lets FileSystemStorage move the part file into place instead of copying it"""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def sha256_of(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as part:
+        for block in iter(lambda: part.read(HASH_READ_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def finalize(upload, checksum=''):
+    """
+    Verify a fully received upload and attach it to its target. Finalizing
+    a completed upload again returns it unchanged. Raises UploadError.
+    """
+    if upload.status == 'complete':
+        return upload
+    if upload.status != 'uploading':
+        raise UploadError(f'Upload is {upload.status}', status=409)
+    if upload.offset != upload.size:
+        raise UploadError(f'{upload.size - upload.offset} bytes are missing', status=409, offset=upload.offset)
+
+    expected = str(checksum or upload.checksum).lower()
+    if not expected:
+        raise UploadError('checksum is required, at creation or finalize')
+    actual = sha256_of(part_path(upload))
+    if actual != expected:
+        ChunkedUpload.objects.filter(pk=upload.pk).update(status='failed', updated_at=timezone.now())
+        upload.status = 'failed'
+        _remove_part(upload)
+        raise UploadError('Checksum mismatch; the upload must be restarted', status=422)
+
+    with transaction.atomic():
+        # Only one finalize may attach the file
+        if not ChunkedUpload.objects.filter(pk=upload.pk, status='uploading').update(status='complete'):
+            upload.refresh_from_db()
+            return upload
+        with open(part_path(upload), 'rb') as part:
+            upload.attached_id = TARGETS[upload.target]['attach'](upload, PartFile(part, name=upload.filename))
+        upload.status = 'complete'
+        upload.checksum = actual
+        upload.save(update_fields=['attached_id', 'status', 'checksum', 'updated_at'])
+    _remove_part(upload)  # left behind by storages that copy
+    return upload
+
+
+def abort(upload):
+    ChunkedUpload.objects.filter(pk=upload.pk).exclude(status='complete').update(
+        status='failed', updated_at=timezone.now()
+    )
+    _remove_part(upload)
+
+
+def expire_uploads(hours=None, dry_run=False):
+    """Drop unfinished uploads without a chunk for `hours`. Returns how many."""
+    hours = hours or settings.CHUNKED_UPLOAD_EXPIRY_HOURS
+    stale = ChunkedUpload.objects.exclude(status='complete').filter(
+        updated_at__lt=timezone.now() - datetime.timedelta(hours=hours)
+    )
+    uploads = list(stale)
+    if not dry_run:
+        for upload in uploads:
+            _remove_part(upload)
+        stale.filter(pk__in=[upload.pk for upload in uploads]).delete()
+    return len(uploads)
@@ -13,6 +13,8 @@ router.register(r'students', views.StudentProfileViewSet)
 router.register(r'parents', views.ParentProfileViewSet)
 router.register(r'audit-logs', views.AuditLogViewSet)
 router.register(r'dashboard', views.DashboardViewSet, basename='dashboard')
+router.register(r'unread', views.UnreadViewSet, basename='unread')
+router.register(r'uploads', views.ChunkedUploadViewSet, basename='upload')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -1,18 +1,26 @@
 
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db.models import Count, Q
 from django.utils import timezone
 from datetime import datetime, timedelta
 
-from .models import User, School, Class, Section, Subject, TeacherProfile, StudentProfile, ParentProfile, AuditLog
+from .models import User, School, Class, Section, Subject, TeacherProfile, StudentProfile, ParentProfile, AuditLog, ChunkedUpload
 from .serializers import (
     UserSerializer, SchoolSerializer, ClassSerializer, SectionSerializer, 
     SubjectSerializer, TeacherProfileSerializer, StudentProfileSerializer, 
-    ParentProfileSerializer, AuditLogSerializer, DashboardStatsSerializer
+    ParentProfileSerializer, AuditLogSerializer, DashboardStatsSerializer, ChunkedUploadSerializer
 )
 from .permissions import IsDeveloper, IsPrincipal, IsTeacher, CanManageUsers, CanViewStudentData
+from .dashboard import get_stats
+from .scope import get_scope
+from . import querysets, unread, uploads
+from .audit import audit_writer
+from .pagination import TimestampKeysetPagination
 
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
@@ -27,12 +35,12 @@ class UserViewSet(viewsets.ModelViewSet):
         return queryset
 
 class SchoolViewSet(viewsets.ModelViewSet):
-    queryset = School.objects.all()
+    queryset = querysets.schools()
     serializer_class = SchoolSerializer
     permission_classes = [IsDeveloper]
 
 class ClassViewSet(viewsets.ModelViewSet):
-    queryset = Class.objects.all()
+    queryset = querysets.classes()
     serializer_class = ClassSerializer
     permission_classes = [IsPrincipal | IsTeacher]
     
@@ -40,12 +48,12 @@ class ClassViewSet(viewsets.ModelViewSet):
     def sections(self, request, pk=None):
         """Get all sections for a class"""
         class_obj = self.get_object()
-        sections = class_obj.sections.all()
+        sections = querysets.sections().filter(class_assigned=class_obj)
         serializer = SectionSerializer(sections, many=True)
         return Response(serializer.data)
 
 class SectionViewSet(viewsets.ModelViewSet):
-    queryset = Section.objects.all()
+    queryset = querysets.sections()
     serializer_class = SectionSerializer
     permission_classes = [IsPrincipal | IsTeacher]
     
@@ -53,7 +61,7 @@ class SectionViewSet(viewsets.ModelViewSet):
     def students(self, request, pk=None):
         """Get all students in a section"""
         section = self.get_object()
-        students = StudentProfile.objects.filter(section=section)
+        students = querysets.student_profiles().filter(section=section)
         serializer = StudentProfileSerializer(students, many=True)
         return Response(serializer.data)
 
@@ -63,7 +71,7 @@ class SubjectViewSet(viewsets.ModelViewSet):
     permission_classes = [IsPrincipal | IsTeacher]
 
 class TeacherProfileViewSet(viewsets.ModelViewSet):
-    queryset = TeacherProfile.objects.all()
+    queryset = querysets.teacher_profiles()
     serializer_class = TeacherProfileSerializer
     permission_classes = [IsPrincipal]
     
@@ -82,7 +90,7 @@ class TeacherProfileViewSet(viewsets.ModelViewSet):
         return Response({'message': 'Schedule endpoint - to be implemented'})
 
 class StudentProfileViewSet(viewsets.ModelViewSet):
-    queryset = StudentProfile.objects.all()
+    queryset = querysets.student_profiles()
     serializer_class = StudentProfileSerializer
     permission_classes = [CanViewStudentData]
     
@@ -95,24 +103,16 @@ class StudentProfileViewSet(viewsets.ModelViewSet):
             return queryset.filter(user=user)
         elif user.role == 'PARENT':
             # Parents can see their children's profiles
-            try:
-                parent_profile = ParentProfile.objects.get(user=user)
-                return queryset.filter(id__in=parent_profile.children.values_list('id', flat=True))
-            except ParentProfile.DoesNotExist:
-                return queryset.none()
+            return queryset.filter(id__in=get_scope(self.request).children_ids)
         elif user.role == 'TEACHER':
             # Teachers can see students in their sections
-            try:
-                teacher_profile = TeacherProfile.objects.get(user=user)
-                return queryset.filter(section__in=teacher_profile.sections.all())
-            except TeacherProfile.DoesNotExist:
-                return queryset.none()
+            return queryset.filter(section_id__in=get_scope(self.request).section_ids)
         
         # Principal and Developer can see all
         return queryset
 
 class ParentProfileViewSet(viewsets.ModelViewSet):
-    queryset = ParentProfile.objects.all()
+    queryset = querysets.parent_profiles()
     serializer_class = ParentProfileSerializer
     permission_classes = [IsPrincipal]
     
@@ -124,9 +124,10 @@ class ParentProfileViewSet(viewsets.ModelViewSet):
         return queryset
 
 class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = AuditLog.objects.all().order_by('-timestamp')
+    queryset = AuditLog.objects.select_related('user').order_by('-timestamp', '-id')
     serializer_class = AuditLogSerializer
     permission_classes = [IsDeveloper]
+    pagination_class = TimestampKeysetPagination
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -152,6 +153,11 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
         
         return queryset
 
+    @action(detail=False, methods=['get'])
+    def writer_stats(self, request):
+        """Counters of the background audit log writer in this process"""
+        return Response(audit_writer.stats())
+
 class DashboardViewSet(viewsets.ViewSet):
     """Dashboard statistics for different user roles"""
     permission_classes = [permissions.IsAuthenticated]
@@ -159,100 +165,9 @@ class DashboardViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['get'])
     def stats(self, request):
         """Get dashboard statistics based on user role"""
-        user = request.user
-        stats = {}
-        
-        if user.role == 'DEVELOPER':
-            stats = self._get_developer_stats()
-        elif user.role == 'PRINCIPAL':
-            stats = self._get_principal_stats(user)
-        elif user.role == 'TEACHER':
-            stats = self._get_teacher_stats(user)
-        elif user.role == 'STUDENT':
-            stats = self._get_student_stats(user)
-        elif user.role == 'PARENT':
-            stats = self._get_parent_stats(user)
-        
+        stats = get_stats(request.user)
         serializer = DashboardStatsSerializer(stats)
         return Response(serializer.data)
-    
-    def _get_developer_stats(self):
-        return {
-            'total_students': StudentProfile.objects.count(),
-            'total_teachers': TeacherProfile.objects.count(),
-            'total_classes': Class.objects.count(),
-            'total_notices': 0,  # Will be updated when notices are implemented
-            'pending_assignments': 0,  # Will be updated when assignments are implemented
-            'attendance_percentage': 85.5  # Placeholder
-        }
-    
-    def _get_principal_stats(self, user):
-        # Similar to developer but school-specific
-        try:
-            school = School.objects.get(principal=user)
-            return {
-                'total_students': StudentProfile.objects.filter(school=school).count(),
-                'total_teachers': TeacherProfile.objects.filter(school=school).count(),
-                'total_classes': Class.objects.filter(school=school).count(),
-                'total_notices': 0,
-                'pending_assignments': 0,
-                'attendance_percentage': 87.2
-            }
-        except School.DoesNotExist:
-            return self._get_empty_stats()
-    
-    def _get_teacher_stats(self, user):
-        try:
-            teacher = TeacherProfile.objects.get(user=user)
-            return {
-                'total_students': StudentProfile.objects.filter(section__in=teacher.sections.all()).count(),
-                'total_teachers': TeacherProfile.objects.filter(school=teacher.school).count(),
-                'total_classes': teacher.sections.count(),
-                'total_notices': 0,
-                'pending_assignments': 0,
-                'attendance_percentage': 92.3
-            }
-        except TeacherProfile.DoesNotExist:
-            return self._get_empty_stats()
-    
-    def _get_student_stats(self, user):
-        try:
-            student = StudentProfile.objects.get(user=user)
-            return {
-                'total_students': StudentProfile.objects.filter(section=student.section).count(),
-                'total_teachers': TeacherProfile.objects.filter(sections=student.section).count(),
-                'total_classes': 1,
-                'total_notices': 0,
-                'pending_assignments': 0,
-                'attendance_percentage': 89.7
-            }
-        except StudentProfile.DoesNotExist:
-            return self._get_empty_stats()
-    
-    def _get_parent_stats(self, user):
-        try:
-            parent = ParentProfile.objects.get(user=user)
-            children_count = parent.children.count()
-            return {
-                'total_students': children_count,
-                'total_teachers': 0,
-                'total_classes': children_count,
-                'total_notices': 0,
-                'pending_assignments': 0,
-                'attendance_percentage': 88.5
-            }
-        except ParentProfile.DoesNotExist:
-            return self._get_empty_stats()
-    
-    def _get_empty_stats(self):
-        return {
-            'total_students': 0,
-            'total_teachers': 0,
-            'total_classes': 0,
-            'total_notices': 0,
-            'pending_assignments': 0,
-            'attendance_percentage': 0.0
-        }
 
     @action(detail=False, methods=['get'])
     def recent_activities(self, request):
@@ -275,3 +190,92 @@ class DashboardViewSet(viewsets.ViewSet):
             })
         
         return Response(activities)
+
+class UnreadViewSet(viewsets.ViewSet):
+    """Unread badge counts for notices and messages"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def list(self, request):
+        return Response(unread.counts(request.user))
+
+    @action(detail=False, methods=['post'])
+    def mark_all_read(self, request):
+        """Mark every unread notice or message as read"""
+        kind = request.data.get('kind')
+        if kind not in unread.KINDS:
+            return Response(
+                {'error': f"kind must be one of: {', '.join(unread.KINDS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        marked = unread.mark_all_read(kind, request.user)
+        return Response({'kind': kind, 'marked': marked, 'unread': 0})
+
+class ChunkedUploadViewSet(viewsets.ViewSet):
+    """
+    Resumable uploads of large files (see core.uploads): create, then PUT
+    the raw bytes in chunks with ?offset=, then finalize. GET reports the
+    stored offset to resume from.
+    """
+    permission_classes = [IsTeacher | IsPrincipal | IsDeveloper]
+
+    def _upload(self, pk):
+        try:
+            upload = ChunkedUpload.objects.filter(pk=pk, user=self.request.user).first()
+        except ValidationError:  # not a UUID
+            upload = None
+        if upload is None:
+            raise NotFound('Upload not found')
+        return upload
+
+    def _error(self, exc):
+        return Response({'error': str(exc), **exc.extra}, status=exc.status)
+
+    def create(self, request):
+        try:
+            upload = uploads.create_upload(
+                request.user, get_scope(request).profile_id,
+                request.data.get('target'), request.data.get('target_id'),
+                request.data.get('filename'), request.data.get('size'), request.data.get('checksum'),
+            )
+        except uploads.UploadError as exc:
+            return self._error(exc)
+        data = ChunkedUploadSerializer(upload).data
+        data['chunk_size'] = settings.CHUNKED_UPLOAD_CHUNK_SIZE
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    def retrieve(self, request, pk=None):
+        return Response(ChunkedUploadSerializer(self._upload(pk)).data)
+
+    def update(self, request, pk=None):
+        """Store the request body at ?offset= (the body is streamed, never parsed)"""
+        upload = self._upload(pk)
+        if not request.META.get('CONTENT_LENGTH'):
+            # Chunked transfer encoding has no length to check the chunk against
+            return Response({'error': 'Content-Length is required'}, status=status.HTTP_411_LENGTH_REQUIRED)
+        try:
+            offset = int(request.query_params.get('offset', ''))
+            length = int(request.META['CONTENT_LENGTH'])
+            if length < 0:
+                raise ValueError
+        except ValueError:
+            return Response(
+                {'error': 'offset and Content-Length must be integers'}, status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            offset = uploads.write_chunk(upload, offset, request.stream, length)
+        except uploads.UploadError as exc:
+            return self._error(exc)
+        return Response({'id': upload.pk, 'offset': offset, 'size': upload.size})
+
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, pk=None):
+        """Check the SHA-256 checksum and attach the file to its target"""
+        try:
+            upload = uploads.finalize(self._upload(pk), request.data.get('checksum'))
+        except uploads.UploadError as exc:
+            return self._error(exc)
+        return Response(ChunkedUploadSerializer(upload).data)
+
+    def destroy(self, request, pk=None):
+        uploads.abort(self._upload(pk))
+        return Response(status=status.HTTP_204_NO_CONTENT)
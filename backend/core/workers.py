@@ -0,0 +1,65 @@
+"""Thread pool shared by the batch worker commands.
+
+process_webhook_events and send_payment_reminders both claim rows in
+batches with SELECT ... FOR UPDATE SKIP LOCKED; run_workers() runs such a
+batch function on several threads until it is interrupted or, with `once`,
+until no work is left.
+"""
+import threading
+
+from django.core.management.base import CommandError
+from django.db import connection
+
+
+def worker_count(requested, stderr=None):
+    """Threads to run: one when the database cannot skip locked rows"""
+    if requested > 1 and not connection.features.has_select_for_update_skip_locked:
+        # Without SKIP LOCKED (e.g. SQLite) concurrent workers only contend for the lock
+        if stderr is not None:
+            stderr.write(f'{connection.vendor} cannot skip locked rows; running a single worker')
+        return 1
+    return requested
+
+
+def run_workers(batch, workers, interval, once=False):
+    """
+    Call `batch()`, which returns how many rows it claimed, in a loop on
+    `workers` threads. A thread that finds nothing waits `interval` seconds
+    before polling again, or exits with `once`. The first error stops every
+    thread and is raised as CommandError once they have finished. Returns
+    the number of rows claimed.
+    """
+    stop = threading.Event()
+    claimed = [0] * workers
+    errors = []
+
+    def work(n):
+        try:
+            while not stop.is_set():
+                count = batch()
+                claimed[n] += count
+                if not count:
+                    if once:
+                        return
+                    stop.wait(interval)
+        except Exception as exc:  # reported below rather than killing the thread silently
+            errors.append(repr(exc))
+            stop.set()
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(workers)]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(0.5)
+    except KeyboardInterrupt:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    if errors:
+        raise CommandError('; '.join(errors[:5]))
+    return sum(claimed)
@@ -0,0 +1,140 @@
+"""Fee record generation for an academic year.
+
+Each FeeStructure of the year is expanded into due dates according to its
+fee type's due_frequency, within the AcademicYear of the same name, and one
+pending FeeRecord is written per student of the structure's class per due
+date. Records go out in chunked bulk_create(ignore_conflicts=True) calls on
+the (student, fee_structure, due_date) constraint, so generation can be
+rerun after students join without duplicating what already exists.
+Optional fee types are skipped unless asked for.
+
+A run's cost follows the number of planned records, existing ones included,
+so callers that cannot wait (the API) pass max_records and leave larger
+runs to the generate_fee_records command.
+"""
+import calendar
+import datetime
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from academic.models import AcademicYear
+from .models import FeeRecord, FeeStructure, StudentProfile
+
+CHUNK_SIZE = 2000
+
+
+class TooManyRecords(Exception):
+    """A run would plan more records than the caller's max_records"""
+
+    def __init__(self, planned, limit):
+        super().__init__(f'{planned} records planned, more than the limit of {limit}')
+        self.planned = planned
+        self.limit = limit
+
+# Months between due dates per FeeType.due_frequency; None means once a year
+FREQUENCY_MONTHS = {
+    'monthly': 1,
+    'quarterly': 3,
+    'half_yearly': 6,
+    'yearly': None,
+    'one_time': None,
+}
+
+
+def due_dates(frequency, start, end, due_day=None):
+    """Due dates for a frequency between start and end, on due_day of each period's first month"""
+    due_day = due_day or getattr(settings, 'FEE_DUE_DAY', 10)
+    step = FREQUENCY_MONTHS[frequency]
+    dates = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        day = min(due_day, calendar.monthrange(year, month)[1])
+        due = max(datetime.date(year, month, day), start)
+        if due <= end:
+            dates.append(due)
+        if step is None:
+            break
+        month += step
+        year, month = year + (month - 1) // 12, (month - 1) % 12 + 1
+    return dates
+
+
+def plan(academic_year, class_ids=None, include_optional=False, due_day=None):
+    """
+    (structure, due dates) pairs for the year's fee structures. Raises
+    AcademicYear.DoesNotExist for an unknown year.
+    """
+    year = AcademicYear.objects.get(year=academic_year)
+    structures = FeeStructure.objects.filter(academic_year=academic_year).select_related('fee_type')
+    if class_ids is not None:
+        structures = structures.filter(class_assigned_id__in=class_ids)
+    if not include_optional:
+        structures = structures.filter(fee_type__is_mandatory=True)
+    return [
+        (structure, due_dates(structure.fee_type.due_frequency, year.start_date, year.end_date, due_day))
+        for structure in structures.order_by('id')
+    ]
+
+
+def generate(academic_year, class_ids=None, include_optional=False, due_day=None,
+             dry_run=False, chunk_size=CHUNK_SIZE, max_records=None):
+    """
+    Write (or with dry_run, count) the year's fee records. Returns run
+    statistics. Raises TooManyRecords, before writing anything, when more
+    than max_records are planned.
+    """
+    started = time.perf_counter()
+    schedule = plan(academic_year, class_ids, include_optional, due_day)
+    structure_ids = [structure.id for structure, _ in schedule]
+
+    students = defaultdict(list)
+    for student_id, class_id in StudentProfile.objects.filter(
+        class_assigned_id__in={structure.class_assigned_id for structure, _ in schedule}
+    ).order_by('id').values_list('id', 'class_assigned_id'):
+        students[class_id].append(student_id)
+
+    existing = FeeRecord.objects.filter(fee_structure_id__in=structure_ids)
+    before = existing.count()
+    stats = {
+        'academic_year': academic_year,
+        'structures': len(schedule),
+        'students': sum(len(ids) for ids in students.values()),
+        'planned': sum(len(dates) * len(students[s.class_assigned_id]) for s, dates in schedule),
+        'existing': before,
+        'created': 0,
+        'chunks': 0,
+    }
+    if dry_run:
+        stats['seconds'] = round(time.perf_counter() - started, 3)
+        return stats
+    if max_records is not None and stats['planned'] > max_records:
+        raise TooManyRecords(stats['planned'], max_records)
+
+    def records():
+        for structure, dates in schedule:
+            for due in dates:
+                for student_id in students[structure.class_assigned_id]:
+                    yield FeeRecord(
+                        student_id=student_id, fee_structure_id=structure.id,
+                        due_date=due, amount=structure.amount, status='pending',
+                    )
+
+    chunk = []
+    with transaction.atomic():
+        for record in records():
+            chunk.append(record)
+            if len(chunk) == chunk_size:
+                FeeRecord.objects.bulk_create(chunk, ignore_conflicts=True)
+                stats['chunks'] += 1
+                chunk = []
+        if chunk:
+            FeeRecord.objects.bulk_create(chunk, ignore_conflicts=True)
+            stats['chunks'] += 1
+        # ignore_conflicts hides which rows were skipped, so count instead
+        stats['created'] = existing.count() - before
+
+    stats['seconds'] = round(time.perf_counter() - started, 3)
+    return stats
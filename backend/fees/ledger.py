@@ -0,0 +1,131 @@
+"""Fee ledger reports, grouped in SQL.
+
+Every report is a single grouped query using the outstanding and overdue
+expressions behind FeeRecord.objects.ledger(), so billed, collected,
+outstanding and overdue totals come back per class, fee type or due month
+without loading the records. Cancelled records are left out.
+
+The school collection dashboard is built from a handful of those queries
+and cached for FEE_DASHBOARD_TTL seconds. Past that, the first request to
+notice rebuilds it while concurrent ones keep serving the previous copy, so
+many finance users refreshing at once cost one rebuild per interval.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, F, Min, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from .models import OUTSTANDING, FeeRecord, Payment, overdue_q
+
+GROUPS = {
+    'class': {'class_id': F('student__class_assigned_id'), 'class_name': F('student__class_assigned__name')},
+    'fee_type': {'fee_type_id': F('fee_structure__fee_type_id'), 'fee_type_name': F('fee_structure__fee_type__name')},
+    'month': {'month': TruncMonth('due_date')},
+}
+
+ZERO = Value(0, output_field=DecimalField(max_digits=12, decimal_places=2))
+
+
+def _sum(expression, **kwargs):
+    return Coalesce(Sum(expression, **kwargs), ZERO)
+
+
+def totals(today=None):
+    """Aggregates shared by the reports; overdue is evaluated at `today`"""
+    overdue = overdue_q(today)
+    return {
+        'records': Count('id'),
+        'billed': _sum('amount'),
+        'late_fees': _sum('late_fee'),
+        'collected': _sum('paid_amount'),
+        'outstanding': _sum(OUTSTANDING),
+        'overdue_records': Count('id', filter=overdue),
+        'overdue_amount': _sum(OUTSTANDING, filter=overdue),
+        'defaulters': Count('student_id', distinct=True, filter=overdue),
+    }
+
+
+def records_for_school(school_id=None):
+    records = FeeRecord.objects.exclude(status='cancelled')
+    if school_id is not None:
+        records = records.filter(student__school_id=school_id)
+    return records
+
+
+def collection_report(records, group_by, today=None):
+    """Rows of totals() per class, fee type or due month"""
+    columns = GROUPS[group_by]
+    return list(
+        records.order_by().values(**columns).annotate(**totals(today)).order_by(*columns)
+    )
+
+
+def defaulters(records, today=None, limit=None):
+    """Students with overdue fees, largest overdue balance first"""
+    rows = (
+        records.filter(overdue_q(today)).order_by()
+        .values(
+            'student_id',
+            admission_no=F('student__student_id'),
+            roll_number=F('student__roll_number'),
+            first_name=F('student__user__first_name'),
+            last_name=F('student__user__last_name'),
+            class_name=F('student__class_assigned__name'),
+            section_name=F('student__section__name'),
+        )
+        .annotate(
+            overdue_records=Count('id'),
+            overdue_amount=_sum(OUTSTANDING),
+            oldest_due_date=Min('due_date'),
+        )
+        .order_by('-overdue_amount', 'student_id')
+    )
+    return list(rows[:limit] if limit else rows)
+
+
+def collection_dashboard(school_id=None, today=None):
+    today = today or timezone.localdate()
+    records = records_for_school(school_id)
+    payments = Payment.objects.all()
+    if school_id is not None:
+        payments = payments.filter(fee_record__student__school_id=school_id)
+
+    summary = records.aggregate(**totals(today))
+    summary['collection_rate'] = (
+        round(float(summary['collected']) * 100 / float(summary['billed'] + summary['late_fees']), 2)
+        if summary['billed'] + summary['late_fees'] else 0
+    )
+    month_start = today.replace(day=1)
+    received = payments.aggregate(
+        today=_sum('amount', filter=Q(payment_date=today)),
+        this_month=_sum('amount', filter=Q(payment_date__gte=month_start, payment_date__lte=today)),
+    )
+    return {
+        'school': school_id,
+        'as_of': str(today),
+        'summary': summary,
+        'received': received,
+        'by_month': collection_report(records, 'month', today),
+        'by_class': collection_report(records, 'class', today),
+        'top_defaulters': defaulters(records, today, limit=10),
+    }
+
+
+def cached_dashboard(school_id=None):
+    """collection_dashboard(), rebuilt at most once per FEE_DASHBOARD_TTL"""
+    ttl = getattr(settings, 'FEE_DASHBOARD_TTL', 60)
+    key = f'fees:dashboard:{school_id}'
+    entry = cache.get(key)
+    if entry is not None and time.time() - entry['built_at'] < ttl:
+        return entry['data']
+    # One request rebuilds; the rest keep the stale copy meanwhile
+    if entry is not None and not cache.add(f'{key}:rebuilding', 1, ttl):
+        return entry['data']
+
+    data = collection_dashboard(school_id)
+    cache.set(key, {'built_at': time.time(), 'data': data}, ttl * 10)
+    cache.delete(f'{key}:rebuilding')
+    return data
@@ -0,0 +1,107 @@
+import datetime
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+
+from core.benchmark import build_section
+from core.models import User
+from fees.models import FeeRecord, FeeStructure, FeeType, Payment
+from fees.services import PaymentError, record_payment
+
+
+class Command(BaseCommand):
+    help = (
+        'Post payments to the same fee records from many threads at once, with some '
+        'duplicate transaction ids, and check that no update was lost or applied twice. '
+        'Data is committed (threads need their own connections) and deleted afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--payments', type=int, default=50, help='Payments posted per thread')
+        parser.add_argument('--records', type=int, default=4)
+
+    def handle(self, *args, **options):
+        fixture = build_section(1)
+        structure = FeeStructure.objects.create(
+            fee_type=FeeType.objects.create(name=f"Bench {fixture['class'].name}"),
+            class_assigned=fixture['class'], amount=Decimal('1000.00'), academic_year='bench'
+        )
+        # Half the posts are replays; the rest still add up to twice what is due,
+        # so some payments must be refused
+        due = Decimal(max(options['threads'] * options['payments'] // (4 * options['records']), 1))
+        records = [
+            FeeRecord.objects.create(
+                student=fixture['students'][0], fee_structure=structure,
+                due_date=datetime.date(2024, 4, 1) + datetime.timedelta(days=i), amount=due
+            )
+            for i in range(options['records'])
+        ]
+        cashier = fixture['teacher_user']
+        tag = uuid.uuid4().hex[:8]
+        outcomes = {'created': 0, 'replayed': 0, 'refused': 0, 'errors': []}
+        lock = threading.Lock()
+
+        def post(thread):
+            try:
+                for i in range(options['payments']):
+                    # Threads run in pairs posting the same payments, so one of each is a replay
+                    pair = thread - thread % 2
+                    record = records[(pair + i) % len(records)]
+                    transaction_id = f'bench-{tag}-{pair}-{i}'
+                    try:
+                        _, created = record_payment(
+                            record.pk, Decimal('1.00'), 'cash', datetime.date(2024, 4, 1), cashier,
+                            transaction_id=transaction_id
+                        )
+                        key = 'created' if created else 'replayed'
+                    except PaymentError:
+                        key = 'refused'
+                    with lock:
+                        outcomes[key] += 1
+            except Exception as exc:  # reported below rather than killing the thread silently
+                with lock:
+                    outcomes['errors'].append(repr(exc))
+            finally:
+                connection.close()
+
+        try:
+            threads = [threading.Thread(target=post, args=(n,)) for n in range(options['threads'])]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+
+            posted = options['threads'] * options['payments']
+            self.stdout.write(
+                f"{posted} posts in {elapsed:.2f}s ({posted / elapsed:.0f}/s): "
+                f"{outcomes['created']} created, {outcomes['replayed']} replayed, "
+                f"{outcomes['refused']} refused, {len(outcomes['errors'])} errors"
+            )
+
+            problems = list(outcomes['errors'][:5])
+            for record in records:
+                record.refresh_from_db()
+                paid = Payment.objects.filter(fee_record=record).aggregate(total=Sum('amount'))['total'] or 0
+                if record.paid_amount != paid:
+                    problems.append(f'record {record.pk}: paid_amount {record.paid_amount} != payments {paid}')
+                if record.paid_amount > record.amount + record.late_fee:
+                    problems.append(f'record {record.pk}: overpaid ({record.paid_amount} of {record.amount})')
+                if (record.status == 'paid') != (record.paid_amount == record.amount + record.late_fee):
+                    problems.append(f'record {record.pk}: status {record.status} at {record.paid_amount}')
+            if problems:
+                raise CommandError('; '.join(problems))
+            self.stdout.write(self.style.SUCCESS('No lost or duplicated updates'))
+        finally:
+            Payment.objects.filter(fee_record__in=records).delete()
+            fixture['school'].delete()
+            structure.fee_type.delete()
+            fixture['subject'].delete()
+            User.objects.filter(pk__in=[cashier.pk] + [s.user_id for s in fixture['students']]).delete()
@@ -0,0 +1,36 @@
+import datetime
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from academic.models import AcademicYear
+from core.benchmark import build_section, measure, rolled_back
+from fees.generation import generate
+from fees.models import FeeStructure, FeeType
+
+
+class Command(BaseCommand):
+    help = 'Time generating a year of monthly fee records, then a rerun that creates nothing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            fixture = build_section(options['students'])
+            year = AcademicYear.objects.create(
+                year='bench-yr', start_date=datetime.date(2024, 4, 1), end_date=datetime.date(2025, 3, 31)
+            )
+            FeeStructure.objects.create(
+                fee_type=FeeType.objects.create(name='Bench tuition', due_frequency='monthly'),
+                class_assigned=fixture['class'], amount=Decimal('1500.00'), academic_year=year.year
+            )
+
+            self.stdout.write(f"{'run':>6} {'queries':>8} {'ms':>9}  result")
+            for label, dry_run in (('dry', True), ('first', False), ('rerun', False)):
+                with measure() as stats:
+                    result = generate(year.year, dry_run=dry_run)
+                self.stdout.write(
+                    f"{label:>6} {stats['queries']:>8} {stats['ms']:>9.1f}  "
+                    f"planned={result['planned']} existing={result['existing']} created={result['created']}"
+                )
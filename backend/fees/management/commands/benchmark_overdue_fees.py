@@ -0,0 +1,56 @@
+import datetime
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import build_section, measure, rolled_back
+from fees.models import FeeRecord, FeeStructure, FeeType
+from fees.overdue import sweep
+
+
+class Command(BaseCommand):
+    help = 'Time the overdue sweep over a large fee ledger, and a rerun over the same ledger'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--records', type=int, default=100000)
+        parser.add_argument('--students', type=int, default=500)
+
+    def handle(self, *args, **options):
+        today = datetime.date(2024, 7, 1)
+        if options['records'] > options['students'] * 4 * 60:
+            raise CommandError('--records may be at most 240 per student (4 fee structures x 60 due dates)')
+        with rolled_back():
+            fixture = build_section(options['students'])
+            structures = [
+                FeeStructure.objects.create(
+                    fee_type=FeeType.objects.create(name=f'Bench {i}'), class_assigned=fixture['class'],
+                    amount=Decimal('1000.00'), academic_year='2024-2025', late_fee_percentage=Decimal(5 + i)
+                )
+                for i in range(4)
+            ]
+            students = fixture['students']
+            # Every record gets its own (student, structure, due date), as
+            # fee_record_unique_period requires
+            FeeRecord.objects.bulk_create([
+                FeeRecord(
+                    student=students[i // 60 % len(students)],
+                    fee_structure=structures[i // (60 * len(students))],
+                    due_date=today - datetime.timedelta(days=i % 60 - 30),
+                    amount=Decimal('1000.00'),
+                    paid_amount=Decimal('250.00') if i % 5 == 0 else Decimal('0.00'),
+                    status=('partial', 'pending', 'pending', 'paid', 'pending')[i % 5],
+                )
+                for i in range(options['records'])
+            ], batch_size=5000)
+
+            self.stdout.write(f"{'run':>6} {'queries':>8} {'ms':>9}  result")
+            for label in ('first', 'rerun'):
+                with measure() as stats:
+                    result = sweep(today)
+                self.stdout.write(
+                    f"{label:>6} {stats['queries']:>8} {stats['ms']:>9.1f}  "
+                    f"marked={result['marked_overdue']} late_fees={result['late_fees_applied']} "
+                    f"total={result['late_fee_total']}"
+                )
+                if label == 'rerun' and result['marked_overdue']:
+                    raise CommandError('Rerunning the sweep changed records again')
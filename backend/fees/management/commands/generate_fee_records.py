@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from academic.models import AcademicYear
+from fees.generation import CHUNK_SIZE, generate
+
+
+class Command(BaseCommand):
+    help = "Create each student's fee records for an academic year from the fee structures"
+
+    def add_arguments(self, parser):
+        parser.add_argument('academic_year', help='Academic year name, e.g. 2024-2025')
+        parser.add_argument('--class-id', type=int, action='append', dest='class_ids',
+                            help='Only this class (repeatable)')
+        parser.add_argument('--include-optional', action='store_true', help='Also non-mandatory fee types')
+        parser.add_argument('--due-day', type=int, help='Day of the month fees fall due (default FEE_DUE_DAY)')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Report counts without writing')
+
+    def handle(self, *args, **options):
+        if options['due_day'] is not None and not 1 <= options['due_day'] <= 31:
+            raise CommandError('--due-day must be between 1 and 31')
+        try:
+            stats = generate(
+                options['academic_year'],
+                class_ids=options['class_ids'],
+                include_optional=options['include_optional'],
+                due_day=options['due_day'],
+                dry_run=options['dry_run'],
+                chunk_size=options['chunk_size'],
+            )
+        except AcademicYear.DoesNotExist:
+            raise CommandError(f"No academic year named {options['academic_year']}")
+
+        summary = (
+            f"{stats['academic_year']}: {stats['structures']} fee structures, {stats['students']} students, "
+            f"{stats['planned']} records planned, {stats['existing']} already exist"
+        )
+        if options['dry_run']:
+            self.stdout.write(summary)
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"{summary}; created {stats['created']} in {stats['chunks']} chunks ({stats['seconds']}s)"
+            ))
@@ -0,0 +1,32 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from fees.overdue import CHUNK_SIZE, sweep
+
+
+class Command(BaseCommand):
+    help = 'Mark unpaid fee records past their due date as overdue and apply late fees'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Run as of this date (YYYY-MM-DD) instead of today')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change')
+
+    def handle(self, *args, **options):
+        today = None
+        if options['date']:
+            try:
+                today = datetime.date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError('--date must be YYYY-MM-DD')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+
+        stats = sweep(today, chunk_size=options['chunk_size'], dry_run=options['dry_run'])
+        prefix = 'Would mark' if options['dry_run'] else 'Marked'
+        self.stdout.write(
+            f"{stats['date']}: {prefix} {stats['marked_overdue']} of {stats['candidates']} records overdue, "
+            f"{stats['late_fees_applied']} late fees totalling {stats['late_fee_total']} "
+            f"in {stats['chunks']} chunks ({stats['seconds']}s)"
+        )
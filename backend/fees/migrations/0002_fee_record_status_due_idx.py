@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fees', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='feerecord',
+            index=models.Index(fields=['status', 'due_date'], name='fee_record_status_due_idx'),
+        ),
+    ]
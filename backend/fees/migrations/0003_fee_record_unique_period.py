@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:09
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def refuse_duplicate_periods(apps, schema_editor):
+    # Duplicates may carry payments, so they are left for an administrator
+    # to merge rather than dropped here
+    FeeRecord = apps.get_model('fees', 'FeeRecord')
+    duplicates = list(
+        FeeRecord.objects.values('student_id', 'fee_structure_id', 'due_date')
+        .annotate(records=Count('id')).filter(records__gt=1).order_by()[:10]
+    )
+    if duplicates:
+        examples = ', '.join(
+            f"student {row['student_id']} / fee structure {row['fee_structure_id']} / {row['due_date']}"
+            for row in duplicates
+        )
+        raise RuntimeError(
+            'Cannot add fee_record_unique_period: several fee records share a student, fee '
+            f'structure and due date ({examples}). Merge or delete them, then migrate again.'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fees', '0002_fee_record_status_due_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(refuse_duplicate_periods, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='feerecord',
+            constraint=models.UniqueConstraint(fields=('student', 'fee_structure', 'due_date'), name='fee_record_unique_period'),
+        ),
+    ]
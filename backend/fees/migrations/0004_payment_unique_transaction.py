@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:11
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def refuse_duplicate_transactions(apps, schema_editor):
+    # Payments are money received, so duplicates are left for an
+    # administrator to resolve rather than dropped here
+    Payment = apps.get_model('fees', 'Payment')
+    duplicates = list(
+        Payment.objects.exclude(transaction_id='').values('transaction_id')
+        .annotate(payments=Count('id')).filter(payments__gt=1).order_by()[:10]
+    )
+    if duplicates:
+        examples = ', '.join(repr(row['transaction_id']) for row in duplicates)
+        raise RuntimeError(
+            'Cannot add payment_unique_transaction: several payments share a transaction_id '
+            f'({examples}). Change or clear the duplicates, then migrate again.'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fees', '0003_fee_record_unique_period'),
+    ]
+
+    operations = [
+        migrations.RunPython(refuse_duplicate_transactions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='payment',
+            constraint=models.UniqueConstraint(condition=models.Q(('transaction_id', ''), _negated=True), fields=('transaction_id',), name='payment_unique_transaction'),
+        ),
+    ]
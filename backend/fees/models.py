@@ -1,5 +1,7 @@
 
 from django.db import models
+from django.db.models import Case, ExpressionWrapper, F, Q, Value, When
+from django.utils import timezone
 from decimal import Decimal
 from core.models import User, StudentProfile
 
@@ -32,6 +34,34 @@ class FeeStructure(models.Model):
     def __str__(self):
         return f"{self.fee_type.name} - {self.class_assigned.name} - {self.amount}"
 
+# Statuses for which nothing more is expected, so a past due date is not overdue
+SETTLED_STATUSES = ('paid', 'cancelled')
+
+def overdue_q(today=None):
+    """Q matching FeeRecords past their due date and not settled"""
+    return Q(due_date__lt=today or timezone.localdate()) & ~Q(status__in=SETTLED_STATUSES)
+
+OUTSTANDING = ExpressionWrapper(
+    F('amount') + F('late_fee') - F('paid_amount'),
+    output_field=models.DecimalField(max_digits=12, decimal_places=2)
+)
+
+class FeeRecordQuerySet(models.QuerySet):
+    def ledger(self, today=None):
+        """
+        Annotate `outstanding` and `overdue` in SQL, matching the
+        outstanding_amount and is_overdue properties, so the ledger can be
+        filtered, sorted and aggregated on them
+        """
+        return self.annotate(
+            outstanding=OUTSTANDING,
+            overdue=Case(
+                When(overdue_q(today), then=Value(True)),
+                default=Value(False),
+                output_field=models.BooleanField()
+            )
+        )
+
 class FeeRecord(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -55,14 +85,27 @@ class FeeRecord(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = FeeRecordQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # One record per student, fee structure and due period; generation relies on it
+            models.UniqueConstraint(
+                fields=['student', 'fee_structure', 'due_date'], name='fee_record_unique_period'
+            ),
+        ]
+        indexes = [
+            # Overdue sweeps select unsettled records by status and due date
+            models.Index(fields=['status', 'due_date'], name='fee_record_status_due_idx'),
+        ]
+
     @property
     def outstanding_amount(self):
         return self.amount + self.late_fee - self.paid_amount
 
     @property
     def is_overdue(self):
-        from django.utils import timezone
-        return timezone.now().date() > self.due_date and self.status != 'paid'
+        return timezone.localdate() > self.due_date and self.status not in SETTLED_STATUSES
 
     def __str__(self):
         return f"{self.student.full_name} - {self.fee_structure.fee_type.name} - {self.status}"
@@ -86,5 +129,13 @@ class Payment(models.Model):
     remarks = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            # transaction_id doubles as the idempotency key of a posted payment
+            models.UniqueConstraint(
+                fields=['transaction_id'], condition=~Q(transaction_id=''), name='payment_unique_transaction'
+            ),
+        ]
+
     def __str__(self):
         return f"{self.fee_record.student.full_name} - {self.amount} - {self.payment_date}"
@@ -0,0 +1,74 @@
+"""Nightly overdue sweep for FeeRecord.
+
+Pending and partially paid records past their due date are moved to
+'overdue', and those without a late fee yet are charged
+FeeStructure.late_fee_percentage of their amount. The candidates are found
+with one query on the (status, due_date) index, then updated in chunks of
+ids with UPDATE statements, the late fee computed in SQL from a subquery on
+the fee structure. Every chunk re-applies the selection predicate, so a
+payment recorded mid-run is not overwritten, and a record that already
+carries a late fee is never charged again: the sweep can be rerun safely.
+"""
+import time
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Round
+from django.utils import timezone
+
+from .models import FeeRecord, FeeStructure
+
+CHUNK_SIZE = 5000
+
+# Unsettled statuses a record moves out of when its due date passes
+OPEN_STATUSES = ('pending', 'partial')
+
+MONEY = DecimalField(max_digits=10, decimal_places=2)
+
+
+def newly_overdue(today):
+    return FeeRecord.objects.filter(status__in=OPEN_STATUSES, due_date__lt=today)
+
+
+def late_fee_for(percentage):
+    return Round(ExpressionWrapper(F('amount') * percentage / 100, output_field=MONEY), 2)
+
+
+def sweep(today=None, chunk_size=CHUNK_SIZE, dry_run=False):
+    """Mark overdue records and apply late fees as of `today`. Returns run statistics."""
+    today = today or timezone.localdate()
+    started = time.perf_counter()
+    ids = list(newly_overdue(today).order_by('id').values_list('id', flat=True))
+    stats = {
+        'date': str(today),
+        'candidates': len(ids),
+        'marked_overdue': 0,
+        'late_fees_applied': 0,
+        'late_fee_total': Decimal('0.00'),
+        'chunks': 0,
+    }
+
+    percentage = Subquery(
+        FeeStructure.objects.filter(pk=OuterRef('fee_structure_id')).values('late_fee_percentage')[:1]
+    )
+    for offset in range(0, len(ids), chunk_size):
+        chunk = newly_overdue(today).filter(id__in=ids[offset:offset + chunk_size])
+        uncharged = chunk.filter(late_fee=0)
+        with transaction.atomic():
+            charged = uncharged.aggregate(
+                count=Count('id'),
+                total=Sum(late_fee_for(F('fee_structure__late_fee_percentage'))),
+            )
+            if not dry_run:
+                uncharged.update(late_fee=late_fee_for(percentage))
+                marked = chunk.update(status='overdue', updated_at=timezone.now())
+            else:
+                marked = chunk.count()
+        stats['marked_overdue'] += marked
+        stats['late_fees_applied'] += charged['count']
+        stats['late_fee_total'] += charged['total'] or 0
+        stats['chunks'] += 1
+
+    stats['seconds'] = round(time.perf_counter() - started, 3)
+    return stats
@@ -0,0 +1,94 @@
+"""Recording payments against fee records.
+
+A payment is an INSERT of the Payment row followed by one conditional
+UPDATE of the fee record, both in a single transaction: paid_amount is
+incremented with F(), the new status is chosen in SQL, and the WHERE clause
+only matches while the payment still fits the outstanding balance. The
+database serialises concurrent payments on the row, so two cashiers
+posting at once can neither lose an update nor overpay, and nothing is read
+before writing.
+
+A non-empty transaction_id is unique across payments and acts as an
+idempotency key: posting the same payment again returns the original.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from .models import FeeRecord, Payment
+
+
+class PaymentError(Exception):
+    """A payment that cannot be applied; `status` is the HTTP status to answer with"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _rejection(fee_record_id, amount):
+    """Why a conditional update matched nothing"""
+    record = FeeRecord.objects.filter(pk=fee_record_id).first()
+    if record is None:
+        return PaymentError('Fee record not found', status=404)
+    if record.status == 'cancelled':
+        return PaymentError('Fee record is cancelled')
+    return PaymentError(
+        f'Payment amount ({amount}) cannot exceed outstanding amount ({record.outstanding_amount})'
+    )
+
+
+def record_payment(fee_record_id, amount, payment_method, payment_date, received_by,
+                   transaction_id='', reference_number='', remarks=''):
+    """
+    Apply a payment to a fee record. Returns (payment, created); created is
+    False when transaction_id matches an earlier payment of the same record.
+    Raises PaymentError.
+    """
+    if amount <= 0:
+        raise PaymentError('Payment amount must be positive')
+
+    if transaction_id:
+        original = Payment.objects.filter(transaction_id=transaction_id).first()
+        if original is not None:
+            return _replayed(original, fee_record_id), False
+
+    new_paid = F('paid_amount') + amount
+    total_due = F('amount') + F('late_fee')
+    try:
+        with transaction.atomic():
+            payment = Payment.objects.create(
+                fee_record_id=fee_record_id,
+                amount=amount,
+                payment_method=payment_method,
+                payment_date=payment_date,
+                transaction_id=transaction_id,
+                reference_number=reference_number,
+                remarks=remarks,
+                received_by=received_by,
+            )
+            # The right-hand sides all see the row as it was before the update
+            updated = FeeRecord.objects.filter(
+                pk=fee_record_id, paid_amount__lte=total_due - amount
+            ).exclude(status='cancelled').update(
+                paid_amount=new_paid,
+                status=Case(When(paid_amount__gte=total_due - amount, then=Value('paid')), default=Value('partial')),
+                payment_date=Case(When(paid_amount__gte=total_due - amount, then=Value(payment_date)),
+                                  default=F('payment_date')),
+                updated_at=timezone.now(),  # update() skips auto_now
+            )
+            if not updated:
+                raise _rejection(fee_record_id, amount)
+    except IntegrityError:
+        # Lost a race with the same transaction_id, or the record is gone
+        original = Payment.objects.filter(transaction_id=transaction_id).first() if transaction_id else None
+        if original is None:
+            raise _rejection(fee_record_id, amount)
+        return _replayed(original, fee_record_id), False
+    return payment, True
+
+
+def _replayed(original, fee_record_id):
+    if original.fee_record_id != int(fee_record_id):
+        raise PaymentError('transaction_id was already used for another fee record', status=409)
+    return original
@@ -1,16 +1,23 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError, PermissionDenied
 from rest_framework.response import Response
+from django.conf import settings
 from django.db.models import Q, Sum, Count
-from django.db import transaction
 from django.utils import timezone
 from decimal import Decimal
-from .models import FeeType, FeeStructure, FeeRecord, Payment
+from .models import FeeType, FeeStructure, FeeRecord, Payment, OUTSTANDING, overdue_q
 from .serializers import (
     FeeTypeSerializer, FeeStructureSerializer, FeeRecordSerializer, 
     PaymentSerializer, PaymentCreateSerializer
 )
 from core.permissions import IsDeveloper, IsPrincipal, IsTeacher, IsStudent, IsParent
+from academic.models import AcademicYear
+from core.models import Class
+from core.scope import get_scope
+from . import ledger
+from .generation import TooManyRecords, generate
+from .services import PaymentError, record_payment
 
 class FeeTypeViewSet(viewsets.ModelViewSet):
     queryset = FeeType.objects.all()
@@ -30,7 +37,7 @@ class FeeStructureViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'generate_records']:
             permission_classes = [IsDeveloper | IsPrincipal]
         else:
             permission_classes = [permissions.IsAuthenticated]
@@ -48,128 +55,206 @@ class FeeStructureViewSet(viewsets.ModelViewSet):
 
         return queryset
 
+    @action(detail=False, methods=['post'])
+    def generate_records(self, request):
+        """Create the fee records of an academic year for every student (dry_run to preview)"""
+        academic_year = request.data.get('academic_year')
+        if not academic_year:
+            return Response({'error': 'academic_year is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        class_ids = None
+        if request.data.get('class_id'):
+            try:
+                class_ids = [int(request.data['class_id'])]
+            except (TypeError, ValueError):
+                return Response({'error': 'class_id must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        if request.user.is_principal:
+            school_classes = Class.objects.filter(school_id=get_scope(request).school_id)
+            if class_ids is not None:
+                school_classes = school_classes.filter(id__in=class_ids)
+            class_ids = list(school_classes.values_list('id', flat=True))
+
+        try:
+            stats = generate(
+                academic_year,
+                class_ids=class_ids,
+                include_optional=str(request.data.get('include_optional', '')).lower() == 'true',
+                dry_run=str(request.data.get('dry_run', '')).lower() == 'true',
+                max_records=getattr(settings, 'FEE_GENERATION_MAX_RECORDS', 10000),
+            )
+        except AcademicYear.DoesNotExist:
+            return Response({'error': 'Academic year not found'}, status=status.HTTP_404_NOT_FOUND)
+        except TooManyRecords as exc:
+            return Response({
+                'error': f'{exc}; narrow it with class_id or run the generate_fee_records command',
+                'planned': exc.planned,
+                'limit': exc.limit,
+            }, status=status.HTTP_400_BAD_REQUEST)
+        return Response(stats, status=status.HTTP_200_OK if stats['created'] == 0 else status.HTTP_201_CREATED)
+
 class FeeRecordViewSet(viewsets.ModelViewSet):
     queryset = FeeRecord.objects.all()
     serializer_class = FeeRecordSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'report', 'defaulters', 'dashboard']:
             permission_classes = [IsDeveloper | IsPrincipal]
         else:
             permission_classes = [permissions.IsAuthenticated]
         return [permission() for permission in permission_classes]
 
     def get_queryset(self):
-        queryset = FeeRecord.objects.select_related(
-            'student', 'fee_structure__fee_type', 'student__class_assigned'
+        queryset = FeeRecord.objects.ledger().select_related(
+            'student__user', 'fee_structure__fee_type', 'student__class_assigned'
         ).prefetch_related('payments')
 
         user = self.request.user
 
-        if hasattr(user, 'student_profile'):
-            queryset = queryset.filter(student=user.student_profile)
-        elif hasattr(user, 'parent_profile'):
-            queryset = queryset.filter(student__parent=user.parent_profile)
-        elif user.user_type in ['principal', 'developer']:
-            # Can see all records
-            pass
-        else:
+        if user.is_student:
+            queryset = queryset.filter(student__user=user)
+        elif user.is_parent:
+            queryset = queryset.filter(student__parents__user=user)
+        elif user.is_principal:
+            queryset = queryset.filter(student__school_id=get_scope(self.request).school_id)
+        elif not user.is_developer:
             queryset = queryset.none()
 
         # Additional filtering
         status = self.request.query_params.get('status', None)
         student_id = self.request.query_params.get('student', None)
+        overdue = self.request.query_params.get('overdue', None)
+        min_outstanding = self.request.query_params.get('min_outstanding', None)
+        ordering = self.request.query_params.get('ordering', None)
 
         if status:
             queryset = queryset.filter(status=status)
-        if student_id and user.user_type in ['principal', 'developer']:
+        if student_id and (user.is_principal or user.is_developer):
             queryset = queryset.filter(student_id=student_id)
+        if overdue in ('true', 'false'):
+            queryset = queryset.filter(overdue=overdue == 'true')
+        if min_outstanding:
+            try:
+                queryset = queryset.filter(outstanding__gte=Decimal(min_outstanding))
+            except ArithmeticError:
+                pass
+        if ordering in ('outstanding', '-outstanding', 'due_date', '-due_date'):
+            queryset = queryset.order_by(ordering, 'id')
 
         return queryset
 
+    def _int_param(self, request, name):
+        """Integer query parameter, or None when absent; malformed values are a 400"""
+        value = request.query_params.get(name)
+        if not value:
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            raise ParseError(f'{name} must be an integer')
+
+    def _report_school(self, request):
+        """
+        School the finance reports cover: the principal's, or ?school_id= for
+        developers, who alone may leave it out to cover every school
+        """
+        if request.user.is_principal:
+            school_id = get_scope(request).school_id
+            if school_id is None:
+                raise PermissionDenied('Your account is not linked to a school')
+            return school_id
+        return self._int_param(request, 'school_id')
+
     @action(detail=True, methods=['post'])
     def make_payment(self, request, pk=None):
         """Make a payment for a fee record"""
-        fee_record = self.get_object()
-        serializer = PaymentCreateSerializer(data=request.data)
+        pk = self.get_object().pk  # 404s, non-numeric pks included
 
+        serializer = PaymentCreateSerializer(data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
         data = serializer.validated_data
-        amount = data['amount']
-
-        if amount <= 0:
-            return Response({'error': 'Payment amount must be positive'}, status=status.HTTP_400_BAD_REQUEST)
-
-        if amount > fee_record.outstanding_amount:
-            return Response({
-                'error': f'Payment amount ({amount}) cannot exceed outstanding amount ({fee_record.outstanding_amount})'
-            }, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            with transaction.atomic():
-                # Create payment record
-                payment = Payment.objects.create(
-                    fee_record=fee_record,
-                    amount=amount,
-                    payment_method=data['payment_method'],
-                    payment_date=data['payment_date'],
-                    transaction_id=data.get('transaction_id', ''),
-                    reference_number=data.get('reference_number', ''),
-                    remarks=data.get('remarks', ''),
-                    received_by=request.user
-                )
-
-                # Update fee record
-                fee_record.paid_amount += amount
-                if fee_record.paid_amount >= (fee_record.amount + fee_record.late_fee):
-                    fee_record.status = 'paid'
-                    fee_record.payment_date = data['payment_date']
-                elif fee_record.paid_amount > 0:
-                    fee_record.status = 'partial'
-                fee_record.save()
-
-                return Response({
-                    'message': 'Payment recorded successfully',
-                    'payment': PaymentSerializer(payment).data,
-                    'fee_record': FeeRecordSerializer(fee_record).data
-                }, status=status.HTTP_201_CREATED)
-
-        except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            payment, created = record_payment(
+                pk,
+                amount=data['amount'],
+                payment_method=data['payment_method'],
+                payment_date=data['payment_date'],
+                received_by=request.user,
+                transaction_id=data.get('transaction_id', ''),
+                reference_number=data.get('reference_number', ''),
+                remarks=data.get('remarks', ''),
+            )
+        except PaymentError as exc:
+            return Response({'error': str(exc)}, status=exc.status)
+
+        fee_record = self.get_queryset().get(pk=pk)
+        return Response({
+            'message': 'Payment recorded successfully' if created else 'Payment already recorded',
+            'payment': PaymentSerializer(payment).data,
+            'fee_record': FeeRecordSerializer(fee_record).data
+        }, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
 
     @action(detail=False, methods=['get'])
     def summary(self, request):
         """Get fee summary for current user"""
         user = request.user
 
-        if hasattr(user, 'student_profile'):
-            records = FeeRecord.objects.filter(student=user.student_profile)
-        elif hasattr(user, 'parent_profile'):
-            records = FeeRecord.objects.filter(student__parent=user.parent_profile)
+        if user.is_student:
+            records = FeeRecord.objects.filter(student__user=user)
+        elif user.is_parent:
+            records = FeeRecord.objects.filter(student__parents__user=user)
         else:
             return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
 
-        total_due = records.aggregate(
-            total=Sum('amount'), 
+        totals = records.aggregate(
+            total=Sum('amount'),
             paid=Sum('paid_amount'),
-            late_fee=Sum('late_fee')
+            late_fees=Sum('late_fee'),
+            outstanding=Sum(OUTSTANDING),
+            pending=Count('id', filter=Q(status='pending')),
+            overdue=Count('id', filter=overdue_q()),
         )
 
-        pending_count = records.filter(status='pending').count()
-        overdue_count = records.filter(status='overdue').count()
-
         return Response({
-            'total_amount': total_due['total'] or 0,
-            'paid_amount': total_due['paid'] or 0,
-            'late_fee': total_due['late_fee'] or 0,
-            'outstanding_amount': (total_due['total'] or 0) + (total_due['late_fee'] or 0) - (total_due['paid'] or 0),
-            'pending_records': pending_count,
-            'overdue_records': overdue_count
+            'total_amount': totals['total'] or 0,
+            'paid_amount': totals['paid'] or 0,
+            'late_fee': totals['late_fees'] or 0,
+            'outstanding_amount': totals['outstanding'] or 0,
+            'pending_records': totals['pending'],
+            'overdue_records': totals['overdue']
         })
 
+    @action(detail=False, methods=['get'])
+    def report(self, request):
+        """Collection totals grouped by class, fee_type or month (group_by)"""
+        group_by = request.query_params.get('group_by', 'class')
+        if group_by not in ledger.GROUPS:
+            return Response(
+                {'error': f"group_by must be one of {', '.join(ledger.GROUPS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        records = ledger.records_for_school(self._report_school(request))
+        academic_year = request.query_params.get('academic_year')
+        if academic_year:
+            records = records.filter(fee_structure__academic_year=academic_year)
+        return Response({'group_by': group_by, 'rows': ledger.collection_report(records, group_by)})
+
+    @action(detail=False, methods=['get'])
+    def defaulters(self, request):
+        """Students with overdue fees, largest overdue balance first"""
+        records = ledger.records_for_school(self._report_school(request))
+        class_id = self._int_param(request, 'class_id')
+        if class_id is not None:
+            records = records.filter(student__class_assigned_id=class_id)
+        return Response(ledger.defaulters(records))
+
+    @action(detail=False, methods=['get'])
+    def dashboard(self, request):
+        """School-wide collection dashboard, cached for FEE_DASHBOARD_TTL seconds"""
+        return Response(ledger.cached_dashboard(self._report_school(request)))
+
 class PaymentViewSet(viewsets.ModelViewSet):
     queryset = Payment.objects.all()
     serializer_class = PaymentSerializer
@@ -0,0 +1,165 @@
+"""Notice audience index and per-user visible notice ids.
+
+NoticeAudience rows are rebuilt from a notice's target fields whenever it is
+saved; unpublished notices have none. A user sees a notice when one of its
+rows matches their role, or a class/section they belong to (see
+audience_filter()).
+
+The ids a user can see are cached under a global version that is bumped on
+every notice change and at every publish/expiry transition (see
+notices.scheduler), and expire no later than the next transition, so
+processes that miss the scheduler's bump do not keep serving stale ids.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import StudentProfile, ParentProfile, TeacherProfile
+from .models import Notice, NoticeAudience
+
+VERSION_KEY = 'notices:visible:version'
+
+# Roles whose notices are addressed through the audience index; principals
+# and developers see every published notice
+AUDIENCE_ROLES = ('STUDENT', 'PARENT', 'TEACHER')
+ALL_NOTICES_ROLES = ('PRINCIPAL', 'DEVELOPER')
+
+TARGET_ROLES = {
+    'all': [NoticeAudience.ROLE_ALL],
+    'students': ['STUDENT'],
+    'teachers': ['TEACHER'],
+    'parents': ['PARENT'],
+}
+
+
+def audience_rows(notice):
+    """NoticeAudience rows for a notice, unsaved"""
+    if not notice.is_published:
+        return []
+    target = notice.target_audience
+    if target in TARGET_ROLES:
+        return [NoticeAudience(notice=notice, role=role) for role in TARGET_ROLES[target]]
+    if target == 'class' and notice.class_assigned_id:
+        return [NoticeAudience(notice=notice, class_assigned_id=notice.class_assigned_id)]
+    if target == 'section' and notice.section_id:
+        return [NoticeAudience(notice=notice, section_id=notice.section_id)]
+    return []
+
+
+def sync_audience(notices):
+    """Replace the audience rows of the given notices"""
+    notices = list(notices)
+    NoticeAudience.objects.filter(notice__in=[notice.pk for notice in notices]).delete()
+    NoticeAudience.objects.bulk_create([row for notice in notices for row in audience_rows(notice)])
+    invalidate()
+
+
+def invalidate():
+    from .scheduler import NEXT_TRANSITION_KEY
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, int(time.time() * 1000), None)
+    # A changed notice may move the next publish/expiry transition
+    cache.delete(NEXT_TRANSITION_KEY)
+
+
+def _version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Seed from the clock so a version lost to eviction never repeats
+        cache.add(VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def audience_filter(role, class_ids, section_ids):
+    """
+    Q over NoticeAudience for a role and the classes/sections it belongs to.
+    class_ids and section_ids may be lists or subqueries. Teachers are
+    addressed through their sections only, as on the dashboard.
+    """
+    query = Q(role__in=[NoticeAudience.ROLE_ALL, role])
+    if role in ('STUDENT', 'PARENT'):
+        query |= Q(class_assigned_id__in=class_ids)
+    query |= Q(section_id__in=section_ids)
+    return query
+
+
+def addressed_to(role, class_ids, section_ids):
+    """Published notices whose audience includes the role/classes/sections"""
+    audience = NoticeAudience.objects.filter(audience_filter(role, class_ids, section_ids))
+    return Notice.objects.filter(id__in=audience.values('notice_id'))
+
+
+def live_notices():
+    """Published notices inside their publish/expiry window"""
+    return Notice.objects.filter(is_live=True)
+
+
+def is_live(notice, now=None):
+    """Whether the notice's fields put it inside its publish window at `now`"""
+    now = now or timezone.now()
+    return (
+        notice.is_published
+        and (notice.publish_date is None or notice.publish_date <= now)
+        and (notice.expiry_date is None or notice.expiry_date >= now)
+    )
+
+
+def visible_notices(user, scope):
+    """Notices the user can currently see"""
+    if user.role in AUDIENCE_ROLES:
+        return Notice.objects.filter(id__in=visible_notice_ids(user, scope))
+    return live_notices()
+
+
+def audience_user_ids(notice_ids):
+    """
+    Subquery of the ids of users who can see any of the given notices,
+    resolved from their current NoticeAudience rows
+    """
+    rows = list(
+        NoticeAudience.objects.filter(notice_id__in=notice_ids)
+        .values_list('role', 'class_assigned_id', 'section_id')
+    )
+    roles = {role for role, _, _ in rows if role}
+    if NoticeAudience.ROLE_ALL in roles:
+        roles.update(AUDIENCE_ROLES)
+    class_ids = {class_id for _, class_id, _ in rows if class_id}
+    section_ids = {section_id for _, _, section_id in rows if section_id}
+
+    # One semi-join per profile type rather than joining them all at once
+    query = Q(role__in=sorted(roles) + list(ALL_NOTICES_ROLES))
+    if class_ids or section_ids:
+        query |= Q(id__in=StudentProfile.objects.filter(
+            Q(class_assigned_id__in=class_ids) | Q(section_id__in=section_ids)
+        ).values('user_id'))
+        query |= Q(id__in=ParentProfile.objects.filter(
+            Q(children__class_assigned_id__in=class_ids) | Q(children__section_id__in=section_ids)
+        ).values('user_id'))
+    if section_ids:
+        query |= Q(id__in=TeacherProfile.objects.filter(sections__in=section_ids).values('user_id'))
+    # Teachers also see the notices they wrote
+    query |= Q(role='TEACHER', id__in=Notice.objects.filter(id__in=notice_ids).values('created_by_id'))
+    return get_user_model().objects.filter(query).values('id')
+
+
+def visible_notice_ids(user, scope):
+    """Ids of the notices currently visible to a student, parent or teacher"""
+    key = f'notices:visible:{user.pk}:{_version()}'
+    ids = cache.get(key)
+    if ids is not None:
+        return ids
+
+    candidates = addressed_to(user.role, scope.class_ids, scope.section_ids)
+    if user.role == 'TEACHER':
+        candidates = Notice.objects.filter(Q(id__in=candidates.values('id')) | Q(created_by_id=user.pk))
+    ids = list(candidates.filter(is_live=True).values_list('id', flat=True))
+    from .scheduler import cache_timeout
+    cache.set(key, ids, cache_timeout(getattr(settings, 'NOTICE_VISIBILITY_TTL', 300)))
+    return ids
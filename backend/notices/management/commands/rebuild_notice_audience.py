@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from notices.audience import sync_audience
+from notices.models import Notice, NoticeAudience
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the NoticeAudience index from the target fields of every notice'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='Notices re-indexed per transaction')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        notices = Notice.objects.only(
+            'id', 'is_published', 'target_audience', 'class_assigned_id', 'section_id'
+        ).order_by('id')
+
+        total = 0
+        last_id = 0
+        while True:
+            chunk = list(notices.filter(id__gt=last_id)[:chunk_size])
+            if not chunk:
+                break
+            with transaction.atomic():
+                sync_audience(chunk)
+            total += len(chunk)
+            last_id = chunk[-1].id
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {total} notices into {NoticeAudience.objects.count()} audience rows'
+        ))
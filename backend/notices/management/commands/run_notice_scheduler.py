@@ -0,0 +1,52 @@
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from notices.scheduler import apply_transitions, next_transition
+
+
+class Command(BaseCommand):
+    help = (
+        'Publish and expire notices at their publish_date/expiry_date. Runs '
+        'until interrupted, sleeping until the next transition.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Apply the transitions that are due and exit (e.g. from cron)')
+        parser.add_argument('--poll-interval', type=float,
+                            default=getattr(settings, 'NOTICE_SCHEDULER_POLL_INTERVAL', 30),
+                            help='Longest sleep between checks, in seconds')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            self.tick()
+            return
+
+        stopping = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: stopping.set())
+
+        while not stopping.is_set():
+            close_old_connections()
+            self.tick()
+            stopping.wait(self.sleep_for(options['poll_interval']))
+
+    def tick(self):
+        went_live, expired = apply_transitions()
+        if went_live or expired:
+            self.stdout.write(
+                f'{timezone.now().isoformat()} published {len(went_live)}, expired {len(expired)}'
+            )
+
+    def sleep_for(self, poll_interval):
+        now = timezone.now()
+        at = next_transition(now)
+        if at is None:
+            return poll_interval
+        # A notice stays live through its expiry_date, so wake just after it
+        return max(0.0, min(poll_interval, (at - now).total_seconds() + 0.001))
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_auditlog_indexes'),
+        ('notices', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoticeAudience',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(blank=True, max_length=20, null=True)),
+                ('class_assigned', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='core.class')),
+                ('notice', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='audience', to='notices.notice')),
+                ('section', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='core.section')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['role', 'notice'], name='notice_audience_role_idx'), models.Index(fields=['class_assigned', 'notice'], name='notice_audience_class_idx'), models.Index(fields=['section', 'notice'], name='notice_audience_section_idx')],
+            },
+        ),
+    ]
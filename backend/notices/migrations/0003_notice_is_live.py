@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:58
+
+from django.db import migrations, models
+from django.db.models import Q
+from django.utils import timezone
+
+
+def set_live_notices(apps, schema_editor):
+    Notice = apps.get_model('notices', 'Notice')
+    now = timezone.now()
+    Notice.objects.filter(
+        Q(publish_date__isnull=True) | Q(publish_date__lte=now),
+        Q(expiry_date__isnull=True) | Q(expiry_date__gte=now),
+        is_published=True
+    ).update(is_live=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notices', '0002_notice_audience'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notice',
+            name='is_live',
+            field=models.BooleanField(db_index=True, default=False, editable=False),
+        ),
+        migrations.RunPython(set_live_notices, migrations.RunPython.noop),
+    ]
@@ -43,6 +43,9 @@ class Notice(models.Model):
     is_published = models.BooleanField(default=False)
     publish_date = models.DateTimeField(null=True, blank=True)
     expiry_date = models.DateTimeField(null=True, blank=True)
+    # Published and inside the publish/expiry window. Set on save and flipped
+    # at publish_date/expiry_date by the run_notice_scheduler worker
+    is_live = models.BooleanField(default=False, db_index=True, editable=False)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -52,11 +55,31 @@ class Notice(models.Model):
 
     @property
     def is_active(self):
-        from django.utils import timezone
-        now = timezone.now()
-        if self.expiry_date:
-            return self.is_published and now <= self.expiry_date
-        return self.is_published
+        return self.is_live
+
+class NoticeAudience(models.Model):
+    """
+    Who a published notice is addressed to, one row per role, class or
+    section. Maintained by notices.audience from the notice's target fields
+    so visibility is an indexed lookup instead of per-request OR filters.
+    """
+    ROLE_ALL = 'ALL'
+
+    notice = models.ForeignKey(Notice, on_delete=models.CASCADE, related_name='audience')
+    role = models.CharField(max_length=20, null=True, blank=True)
+    class_assigned = models.ForeignKey(Class, on_delete=models.CASCADE, null=True, blank=True)
+    section = models.ForeignKey(Section, on_delete=models.CASCADE, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['role', 'notice'], name='notice_audience_role_idx'),
+            models.Index(fields=['class_assigned', 'notice'], name='notice_audience_class_idx'),
+            models.Index(fields=['section', 'notice'], name='notice_audience_section_idx'),
+        ]
+
+    def __str__(self):
+        target = self.role or self.class_assigned_id or self.section_id
+        return f"{self.notice_id} -> {target}"
 
 class NoticeRead(models.Model):
     notice = models.ForeignKey(Notice, on_delete=models.CASCADE, related_name='read_receipts')
@@ -0,0 +1,118 @@
+"""Publish/expiry transitions for Notice.is_live.
+
+Saving a notice sets is_live from its publish window. Notices whose window
+opens or closes later are flipped here, at those times, by the
+run_notice_scheduler worker. Visibility queries only filter on is_live, and
+caches keyed on notice visibility are invalidated at the transitions
+instead of carrying a timestamp predicate.
+
+That invalidation only reaches the scheduler's own cache when the cache is
+per process, so such entries are also kept no longer than cache_timeout(),
+which ends them at the next transition (looked up once per transition, not
+per entry).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from core import unread
+from .models import Notice, NoticeRead
+from .signals import notice_visibility_changed
+from . import audience
+
+NEXT_TRANSITION_KEY = 'notices:next_transition'
+
+# Seconds the scheduler has to apply a transition once it is due
+TRANSITION_GRACE = 5
+
+
+def due_to_go_live(now):
+    return Notice.objects.filter(
+        Q(publish_date__isnull=True) | Q(publish_date__lte=now),
+        Q(expiry_date__isnull=True) | Q(expiry_date__gte=now),
+        is_published=True,
+        is_live=False,
+    )
+
+
+def due_to_expire(now):
+    return Notice.objects.filter(is_live=True).filter(
+        Q(expiry_date__lt=now) | Q(publish_date__gt=now) | Q(is_published=False)
+    )
+
+
+def apply_transitions(now=None):
+    """
+    Flip every notice whose is_live is stale at `now`. Returns
+    (went_live_ids, expired_ids).
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        went_live = list(due_to_go_live(now).select_for_update().values_list('id', flat=True))
+        expired = list(due_to_expire(now).select_for_update().values_list('id', flat=True))
+        if not went_live and not expired:
+            return [], []
+
+        Notice.objects.filter(id__in=went_live).update(is_live=True)
+        Notice.objects.filter(id__in=expired).update(is_live=False)
+
+        # update() skips post_save, so apply the unread fan-out here
+        for notice_id in went_live:
+            unread.bump(unread.NOTICES, audience.audience_user_ids([notice_id]))
+        for notice_id in expired:
+            unread_by = audience.audience_user_ids([notice_id]).exclude(
+                id__in=NoticeRead.objects.filter(notice_id=notice_id).values('user_id')
+            )
+            unread.bump(unread.NOTICES, unread_by, -1)
+
+        audience.invalidate()
+    notice_visibility_changed.send(sender=Notice, went_live=went_live, expired=expired)
+    return went_live, expired
+
+
+def next_transition(now=None):
+    """Earliest future time at which some notice's is_live changes, or None"""
+    now = now or timezone.now()
+    times = [
+        Notice.objects.filter(is_published=True, is_live=False, publish_date__gt=now)
+        .aggregate(at=Min('publish_date'))['at'],
+        Notice.objects.filter(is_live=True, expiry_date__gte=now)
+        .aggregate(at=Min('expiry_date'))['at'],
+    ]
+    times = [at for at in times if at is not None]
+    return min(times) if times else None
+
+
+def upcoming_transition(now=None):
+    """
+    next_transition(), computed once and shared through the cache until it
+    has passed by TRANSITION_GRACE seconds. Notice changes drop it (see
+    audience.invalidate()); it is recomputed at least every
+    NOTICE_SCHEDULER_POLL_INTERVAL seconds for changes made elsewhere.
+    """
+    now = now or timezone.now()
+    entry = cache.get(NEXT_TRANSITION_KEY)  # (at,), since at may be None
+    if entry is None or (entry[0] is not None and (now - entry[0]).total_seconds() > TRANSITION_GRACE):
+        entry = (next_transition(now),)
+        cache.set(NEXT_TRANSITION_KEY, entry, getattr(settings, 'NOTICE_SCHEDULER_POLL_INTERVAL', 30))
+    return entry[0]
+
+
+def cache_timeout(timeout, now=None):
+    """
+    `timeout` cut short at the next transition, for cache entries that
+    depend on which notices are live. Just after a transition, entries end
+    with the scheduler's grace period; if the scheduler has not applied the
+    transition by then, entries go back to the plain timeout.
+    """
+    now = now or timezone.now()
+    at = upcoming_transition(now)
+    if at is None:
+        return timeout
+    seconds = (at - now).total_seconds()
+    if seconds < 0:
+        seconds += TRANSITION_GRACE
+    # A notice stays live through its expiry_date, so expire just after it
+    return max(1, min(timeout, int(seconds) + 1))
@@ -0,0 +1,70 @@
+from django.db.models.signals import post_init, pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver, Signal
+from core import unread
+from .models import Notice, NoticeRead
+from . import audience
+
+# Sent by scheduler.apply_transitions, which flips is_live with update()
+notice_visibility_changed = Signal()
+
+# Fields that decide who can see a notice, and when
+AUDIENCE_FIELDS = (
+    'is_published', 'publish_date', 'expiry_date', 'is_live',
+    'target_audience', 'class_assigned_id', 'section_id',
+)
+
+
+def _audience_state(instance):
+    return tuple(instance.__dict__.get(field) for field in AUDIENCE_FIELDS)
+
+
+@receiver(post_init, sender=Notice)
+def remember_notice_audience(sender, instance, **kwargs):
+    instance._audience_original = _audience_state(instance)
+
+
+@receiver(pre_save, sender=Notice)
+def set_notice_live(sender, instance, **kwargs):
+    instance.is_live = audience.is_live(instance)
+
+
+@receiver(post_save, sender=Notice)
+def update_notice_audience(sender, instance, created, **kwargs):
+    state = _audience_state(instance)
+    if not created and state == instance._audience_original:
+        return
+    instance._audience_original = state
+
+    if created:
+        audience.sync_audience([instance])
+        if instance.is_live:
+            # Fan-out: one UPDATE over the counters of everyone who can see it
+            unread.bump(unread.NOTICES, audience.audience_user_ids([instance.pk]))
+        return
+
+    # Who gains or loses the notice is irregular here, so recompute their counts
+    unread.forget(unread.NOTICES, audience.audience_user_ids([instance.pk]))
+    audience.sync_audience([instance])
+    unread.forget(unread.NOTICES, audience.audience_user_ids([instance.pk]))
+
+
+@receiver(pre_delete, sender=Notice)
+def forget_notice_counters(sender, instance, **kwargs):
+    unread.forget(unread.NOTICES, audience.audience_user_ids([instance.pk]))
+
+
+@receiver(post_delete, sender=Notice)
+def forget_notice_audience(sender, instance, **kwargs):
+    # Audience rows go with the notice through the cascade
+    audience.invalidate()
+
+
+@receiver(post_save, sender=NoticeRead)
+def count_notice_read(sender, instance, created, **kwargs):
+    if created:
+        unread.bump(unread.NOTICES, [instance.user_id], -1)
+
+
+@receiver(post_delete, sender=NoticeRead)
+def forget_notice_read(sender, instance, **kwargs):
+    unread.forget(unread.NOTICES, [instance.user_id])
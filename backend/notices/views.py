@@ -5,9 +5,11 @@ from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.db.models import Q
 from django.utils import timezone
-from .models import Notice, NoticeCategory, NoticeAttachment
+from .models import Notice, NoticeCategory, NoticeAttachment, NoticeRead
 from .serializers import NoticeSerializer, NoticeCategorySerializer, NoticeAttachmentSerializer
 from core.permissions import IsDeveloper, IsPrincipal, IsTeacher, IsStudent, IsParent
+from core.scope import get_scope
+from .audience import visible_notices
 
 class NoticeCategoryViewSet(viewsets.ModelViewSet):
     queryset = NoticeCategory.objects.all()
@@ -35,49 +37,25 @@ class NoticeViewSet(viewsets.ModelViewSet):
         return [permission() for permission in permission_classes]
 
     def get_queryset(self):
-        queryset = super().get_queryset().filter(
-            is_published=True,
-            publish_date__lte=timezone.now()
-        )
+        queryset = super().get_queryset().select_related(
+            'category', 'created_by', 'class_assigned', 'section__class_assigned'
+        ).prefetch_related('attachments')
+        # Audience roles go through the cached NoticeAudience ids, principals
+        # and developers see every live notice
+        queryset = queryset.filter(pk__in=visible_notices(self.request.user, get_scope(self.request)))
         
-        user = self.request.user
-        
-        if user.is_student:
-            student_profile = user.studentprofile
-            queryset = queryset.filter(
-                Q(is_global=True) |
-                Q(target_roles__contains=['STUDENT']) |
-                Q(target_classes=student_profile.class_assigned) |
-                Q(target_sections=student_profile.section)
-            )
-        elif user.is_parent:
-            children = user.parentprofile.children.all()
-            child_classes = [child.class_assigned for child in children]
-            child_sections = [child.section for child in children]
-            
-            queryset = queryset.filter(
-                Q(is_global=True) |
-                Q(target_roles__contains=['PARENT']) |
-                Q(target_classes__in=child_classes) |
-                Q(target_sections__in=child_sections)
-            )
-        elif user.is_teacher:
-            teacher_profile = user.teacherprofile
-            queryset = queryset.filter(
-                Q(is_global=True) |
-                Q(target_roles__contains=['TEACHER']) |
-                Q(target_sections__in=teacher_profile.sections.all()) |
-                Q(created_by=user)
-            )
-        elif user.is_principal or user.is_developer:
-            # Principals and developers can see all notices
-            pass
-        
-        return queryset.distinct().order_by('-created_at')
+        return queryset.order_by('-created_at')
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
+    @action(detail=True, methods=['post'])
+    def mark_read(self, request, pk=None):
+        """Record that the user has read this notice"""
+        notice = self.get_object()
+        _, created = NoticeRead.objects.get_or_create(notice=notice, user=request.user)
+        return Response({'status': 'read', 'created': created})
+
     @action(detail=True, methods=['post'], parser_classes=[MultiPartParser, FormParser])
     def upload_attachment(self, request, pk=None):
         """Upload attachment for notice"""
@@ -87,12 +65,7 @@ class NoticeViewSet(viewsets.ModelViewSet):
         if not file:
             return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
         
-        attachment = NoticeAttachment.objects.create(
-            notice=notice,
-            file=file,
-            filename=file.name,
-            file_size=file.size
-        )
+        attachment = NoticeAttachment.objects.create(notice=notice, file=file)
         
         serializer = NoticeAttachmentSerializer(attachment)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
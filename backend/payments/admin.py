@@ -1,6 +1,6 @@
 
 from django.contrib import admin
-from .models import PaymentGateway, PaymentTransaction, PaymentPlan, StudentPaymentPlan, PaymentReminder
+from .models import PaymentGateway, PaymentTransaction, PaymentPlan, StudentPaymentPlan, PaymentReminder, WebhookEvent
 
 @admin.register(PaymentGateway)
 class PaymentGatewayAdmin(admin.ModelAdmin):
@@ -15,6 +15,13 @@ class PaymentTransactionAdmin(admin.ModelAdmin):
     search_fields = ['transaction_id', 'student__user__username', 'student__roll_number']
     readonly_fields = ['transaction_id', 'created_at', 'updated_at']
 
+@admin.register(PaymentReminder)
+class PaymentReminderAdmin(admin.ModelAdmin):
+    list_display = ['transaction', 'reminder_date', 'is_sent', 'sent_at']
+    list_filter = ['is_sent', 'reminder_date']
+    search_fields = ['transaction__transaction_id', 'transaction__student__user__username']
+    readonly_fields = ['sent_at', 'created_at']
+
 @admin.register(PaymentPlan)
 class PaymentPlanAdmin(admin.ModelAdmin):
     list_display = ['name', 'school', 'plan_type', 'amount', 'is_active']
@@ -26,3 +33,14 @@ class StudentPaymentPlanAdmin(admin.ModelAdmin):
     list_display = ['student', 'payment_plan', 'start_date', 'end_date', 'is_active']
     list_filter = ['is_active', 'payment_plan__plan_type']
     search_fields = ['student__user__username', 'student__roll_number']
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    list_display = ['event_id', 'gateway', 'event_type', 'gateway_transaction_id', 'outcome', 'received_at']
+    list_filter = ['gateway__name', 'event_type', 'outcome__outcome']
+    search_fields = ['event_id', 'gateway_transaction_id']
+    readonly_fields = ['gateway', 'event_id', 'event_type', 'gateway_transaction_id', 'payload', 'signature', 'received_at']
+    list_select_related = ['gateway', 'outcome']
+
+    def outcome(self, obj):
+        return getattr(obj, 'outcome', None) and obj.outcome.outcome
@@ -0,0 +1,104 @@
+"""A local stand-in for payment gateways' webhook delivery.
+
+FakeGateway produces signed callbacks in the razorpay, stripe or generic
+format for a set of PaymentTransactions, the way a real gateway delivers
+them: each payment goes through a lifecycle of events, some deliveries are
+repeated and nearby deliveries arrive out of order. It is used by
+benchmark_webhooks and is handy for replaying traffic against a dev server.
+"""
+import json
+import random
+import time
+import uuid
+
+from .webhooks import EVENT_STATUS, _digest, signature_header
+
+# Event sequences per outcome, and the transaction status each must end in
+SCENARIOS = {
+    'completed': ['processing', 'completed'],
+    'failed': ['processing', 'failed'],
+    'retried': ['processing', 'failed', 'completed'],
+    'refunded': ['processing', 'completed', 'refunded'],
+    'cancelled': ['processing', 'cancelled'],
+}
+FINAL_STATUS = {
+    'completed': 'completed',
+    'failed': 'failed',
+    'retried': 'completed',
+    'refunded': 'refunded',
+    'cancelled': 'cancelled',
+}
+
+
+class FakeGateway:
+    def __init__(self, name, secret, seed=None):
+        self.name = name
+        self.secret = secret
+        self.random = random.Random(seed)
+        self.event_types = {
+            status: event_type
+            for event_type, status in EVENT_STATUS.get(name, EVENT_STATUS[None]).items()
+        }
+
+    def scenarios(self):
+        # Razorpay has no cancellation event
+        return [s for s in SCENARIOS if all(status in self.event_types for status in SCENARIOS[s])]
+
+    def body(self, reference, gateway_transaction_id, status, event_id):
+        event_type = self.event_types[status]
+        if self.name == 'razorpay':
+            payment = {'id': gateway_transaction_id, 'notes': {'transaction_id': reference}}
+            entities = {'payment': {'entity': payment}}
+            if status == 'refunded':
+                entities['refund'] = {'entity': {'id': f'rfnd_{event_id}', 'payment_id': gateway_transaction_id}}
+            return {'event': event_type, 'payload': entities}
+        if self.name == 'stripe':
+            obj = {'id': gateway_transaction_id, 'metadata': {'transaction_id': reference}}
+            if status == 'refunded':
+                obj = {'id': f'ch_{event_id}', 'payment_intent': gateway_transaction_id,
+                       'metadata': {'transaction_id': reference}}
+            return {'id': f'evt_{event_id}', 'type': event_type, 'data': {'object': obj}}
+        return {'id': event_id, 'type': event_type,
+                'data': {'gateway_transaction_id': gateway_transaction_id, 'reference': reference}}
+
+    def sign(self, body, event_id):
+        """Request headers a gateway would send with `body` (bytes)"""
+        header = signature_header(self.name)
+        if self.name == 'stripe':
+            timestamp = str(int(time.time()))
+            headers = {header: f"t={timestamp},v1={_digest(self.secret, timestamp.encode() + b'.' + body)}"}
+        else:
+            headers = {header: _digest(self.secret, body)}
+        if self.name == 'razorpay':
+            headers['X-Razorpay-Event-Id'] = event_id
+        return headers
+
+    def deliveries(self, transactions, duplicate_rate=0.1, reorder_window=8):
+        """
+        Signed (body, headers) deliveries for `transactions` (objects with a
+        transaction_id), and the status each transaction should end in.
+        """
+        deliveries = []
+        expected = {}
+        scenarios = self.scenarios()
+        for transaction in transactions:
+            scenario = self.random.choice(scenarios)
+            expected[transaction.pk] = FINAL_STATUS[scenario]
+            gateway_transaction_id = f'pay_{uuid.uuid4().hex[:16]}'
+            for status in SCENARIOS[scenario]:
+                event_id = uuid.uuid4().hex
+                body = json.dumps(
+                    self.body(str(transaction.transaction_id), gateway_transaction_id, status, event_id)
+                ).encode()
+                delivery = (body, self.sign(body, event_id))
+                deliveries.append(delivery)
+                if self.random.random() < duplicate_rate:
+                    deliveries.append(delivery)
+
+        # Shuffle within small windows: events of one payment interleave with
+        # others' and sometimes overtake each other, as on a busy gateway
+        for start in range(0, len(deliveries), reorder_window):
+            window = deliveries[start:start + reorder_window]
+            self.random.shuffle(window)
+            deliveries[start:start + reorder_window] = window
+        return deliveries, expected
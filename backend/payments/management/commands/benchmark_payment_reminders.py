@@ -0,0 +1,104 @@
+import datetime
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.benchmark import build_section, measure, rolled_back
+from core.models import ParentProfile, User
+from payments.models import PaymentGateway, PaymentReminder, PaymentTransaction
+from payments.reminders import TokenBucket, dispatch_batch
+
+
+class RecordingBackend:
+    def __init__(self):
+        self.messages = []
+
+    def send_messages(self, messages):
+        self.messages += messages
+        return len(messages)
+
+
+class Command(BaseCommand):
+    help = (
+        'Dispatch due payment reminders in batches through an in-memory backend and '
+        'report throughput, queries per batch and the achieved send rate'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reminders', type=int, default=5000)
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--rate', type=float, default=2000, help='Token bucket rate (messages/s)')
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            fixture = build_section(50)
+            parents = User.objects.bulk_create([
+                User(username=f"{student.user.username}-parent", role='PARENT',
+                     email=f"{student.user.username}@example.com")
+                for student in fixture['students']
+            ])
+            for parent, student in zip(ParentProfile.objects.bulk_create(
+                [ParentProfile(user=user) for user in User.objects.filter(pk__in=[p.pk for p in parents])]
+            ), fixture['students']):
+                parent.children.add(student)
+
+            gateway = PaymentGateway.objects.create(
+                name='razorpay', school=fixture['school'], api_key='bench', secret_key='bench'
+            )
+            # One in ten transactions is already paid and one in ten reminders is not due yet
+            PaymentTransaction.objects.bulk_create([
+                PaymentTransaction(
+                    student=fixture['students'][i % 50], gateway=gateway, payment_type='tuition_fee',
+                    amount=1500, due_date=datetime.date(2024, 4, 10),
+                    status='completed' if i % 10 == 0 else 'pending'
+                )
+                for i in range(options['reminders'])
+            ])
+            now = timezone.now()
+            transactions = PaymentTransaction.objects.filter(gateway=gateway).order_by('id')
+            PaymentReminder.objects.bulk_create([
+                PaymentReminder(
+                    transaction=payment, message='Please pay at the school office or online.',
+                    reminder_date=now + datetime.timedelta(days=1 if i % 10 == 5 else -1)
+                )
+                for i, payment in enumerate(transactions)
+            ])
+            due = set(PaymentReminder.objects.filter(
+                transaction__gateway=gateway, transaction__status='pending', reminder_date__lte=now
+            ).values_list('pk', flat=True))
+
+            backend = RecordingBackend()
+            bucket = TokenBucket(options['rate'])
+            queries = []
+            started = time.perf_counter()
+            while True:
+                with measure() as stats:
+                    claimed, _ = dispatch_batch(backend, bucket, options['batch_size'], now)
+                if not claimed:
+                    break
+                queries.append(stats['queries'])
+            elapsed = time.perf_counter() - started
+
+            sent = len(backend.messages)
+            self.stdout.write(
+                f"{sent} reminders in {len(queries)} batches, {elapsed:.2f}s "
+                f"({sent / elapsed:.0f}/s against a limit of {options['rate']:.0f}/s), "
+                f"{max(queries, default=0)} queries per batch"
+            )
+
+            problems = []
+            counts = Counter(message['reminder_id'] for message in backend.messages)
+            if set(counts) != due:
+                problems.append(f'{len(set(counts) ^ due)} reminders sent that should not be, or missed')
+            if any(count > 1 for count in counts.values()):
+                problems.append('some reminders were sent more than once')
+            unmarked = PaymentReminder.objects.filter(pk__in=due, is_sent=False).count()
+            if unmarked:
+                problems.append(f'{unmarked} sent reminders not marked sent')
+            if sent / elapsed > options['rate'] * 1.1 + bucket.capacity / elapsed:
+                problems.append('rate limit exceeded')
+            if problems:
+                raise CommandError('; '.join(problems))
+            self.stdout.write(self.style.SUCCESS('Every due reminder was sent exactly once'))
@@ -0,0 +1,109 @@
+import datetime
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIRequestFactory
+
+from core.benchmark import build_section, rolled_back
+from payments.fake_gateway import FakeGateway
+from payments.models import PaymentGateway, PaymentTransaction, WebhookEvent, WebhookEventOutcome
+from payments.views import WebhookView
+from payments.webhooks import process_batch
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay signed webhook traffic from a fake gateway (duplicates and out-of-order '
+        'deliveries included) through the webhook endpoint, report ingest latency, '
+        'apply the stored events and check every transaction ends in the right status'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--transactions', type=int, default=1000, help='Transactions per gateway')
+        parser.add_argument('--gateways', nargs='+', default=['razorpay', 'stripe', 'paytm'])
+        parser.add_argument('--duplicate-rate', type=float, default=0.1)
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        view = WebhookView.as_view()
+        factory = APIRequestFactory()
+
+        with rolled_back():
+            fixture = build_section(20)
+            deliveries, expected = [], {}
+            for n, name in enumerate(options['gateways']):
+                gateway = PaymentGateway.objects.create(
+                    name=name, school=fixture['school'], api_key='bench', secret_key=f'bench-secret-{name}'
+                )
+                PaymentTransaction.objects.bulk_create([
+                    PaymentTransaction(
+                        student=fixture['students'][i % len(fixture['students'])], gateway=gateway,
+                        payment_type='tuition_fee', amount=1000, due_date=datetime.date(2024, 4, 10)
+                    )
+                    for i in range(options['transactions'])
+                ])
+                fake = FakeGateway(name, gateway.secret_key, seed=options['seed'] + n)
+                gateway_deliveries, gateway_expected = fake.deliveries(
+                    PaymentTransaction.objects.filter(gateway=gateway), options['duplicate_rate']
+                )
+                deliveries += [(gateway.pk, body, headers) for body, headers in gateway_deliveries]
+                expected.update(gateway_expected)
+
+            latencies = []
+            responses = Counter()
+            started = time.perf_counter()
+            for gateway_id, body, headers in deliveries:
+                meta = {f"HTTP_{key.upper().replace('-', '_')}": value for key, value in headers.items()}
+                request = factory.post(
+                    f'/api/payments/webhooks/{gateway_id}/', body, content_type='application/json', **meta
+                )
+                sent = time.perf_counter()
+                response = view(request, gateway_id=gateway_id)
+                latencies.append((time.perf_counter() - sent) * 1000)
+                responses[response.status_code] += 1
+            ingest_seconds = time.perf_counter() - started
+
+            latencies.sort()
+            self.stdout.write(
+                f'Ingest: {len(deliveries)} deliveries in {ingest_seconds:.2f}s '
+                f'({len(deliveries) / ingest_seconds:.0f}/s), '
+                f'p50 {percentile(latencies, 0.5):.2f}ms p95 {percentile(latencies, 0.95):.2f}ms '
+                f'p99 {percentile(latencies, 0.99):.2f}ms, responses {dict(responses)}'
+            )
+
+            started = time.perf_counter()
+            processed = 0
+            while True:
+                count = process_batch(options['batch_size'])
+                if not count:
+                    break
+                processed += count
+            apply_seconds = time.perf_counter() - started
+            outcomes = Counter(WebhookEventOutcome.objects.values_list('outcome', flat=True))
+            self.stdout.write(
+                f'Apply: {processed} events in {apply_seconds:.2f}s '
+                f'({processed / max(apply_seconds, 1e-9):.0f}/s), outcomes {dict(outcomes)}'
+            )
+
+            problems = []
+            if set(responses) != {200}:
+                problems.append(f'non-200 responses {dict(responses)}')
+            stored = WebhookEvent.objects.count()
+            unique = len({(gateway_id, body) for gateway_id, body, _ in deliveries})
+            if stored != unique:
+                problems.append(f'{stored} events stored for {unique} distinct deliveries')
+            statuses = dict(PaymentTransaction.objects.filter(pk__in=expected).values_list('pk', 'status'))
+            wrong = [pk for pk, status in expected.items() if statuses[pk] != status]
+            if wrong:
+                problems.append(f'{len(wrong)} of {len(expected)} transactions in the wrong status')
+            if problems:
+                raise CommandError('; '.join(problems))
+            self.stdout.write(self.style.SUCCESS(
+                f'All {len(expected)} transactions reached their expected status'
+            ))
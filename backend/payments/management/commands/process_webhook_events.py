@@ -0,0 +1,33 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.workers import run_workers, worker_count
+from payments.webhooks import process_batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Apply stored payment gateway webhook events to their transactions. Workers '
+        'claim separate batches, so several can run side by side or in other processes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--once', action='store_true', help='Exit once no events are pending')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--workers and --batch-size must be at least 1')
+        workers = worker_count(options['workers'], self.stderr)
+        started = time.perf_counter()
+        processed = run_workers(
+            lambda: process_batch(options['batch_size']), workers,
+            getattr(settings, 'PAYMENT_WEBHOOK_POLL_INTERVAL', 1), once=options['once'],
+        )
+        self.stdout.write(
+            f'Processed {processed} events with {workers} workers '
+            f'in {time.perf_counter() - started:.2f}s'
+        )
@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.workers import run_workers, worker_count
+from payments.reminders import TokenBucket, dispatch_batch, get_backend
+
+
+class Command(BaseCommand):
+    help = (
+        'Send due payment reminders. Workers claim separate batches, so several can run '
+        'side by side or in other processes; the rate limit applies per process.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--rate', type=float, help='Messages per second (default PAYMENT_REMINDER_RATE)')
+        parser.add_argument('--backend', help='Dotted path of the backend (default PAYMENT_REMINDER_BACKEND)')
+        parser.add_argument('--once', action='store_true', help='Exit once no reminders are due')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--workers and --batch-size must be at least 1')
+        rate = options['rate'] or getattr(settings, 'PAYMENT_REMINDER_RATE', 10)
+        if rate <= 0:
+            raise CommandError('--rate must be positive')
+        workers = worker_count(options['workers'], self.stderr)
+        backend = get_backend(options['backend'])
+        bucket = TokenBucket(rate)
+
+        def batch():
+            # A batch either sends every reminder it claimed or raises
+            return dispatch_batch(backend, bucket, options['batch_size'])[0]
+
+        started = time.perf_counter()
+        sent = run_workers(
+            batch, workers, getattr(settings, 'PAYMENT_REMINDER_POLL_INTERVAL', 5), once=options['once']
+        )
+        self.stdout.write(
+            f'Sent {sent} reminders with {workers} workers '
+            f'in {time.perf_counter() - started:.2f}s'
+        )
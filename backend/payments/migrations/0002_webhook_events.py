@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.CharField(blank=True, max_length=200)),
+                ('event_type', models.CharField(blank=True, max_length=100)),
+                ('gateway_transaction_id', models.CharField(blank=True, max_length=200)),
+                ('payload', models.TextField()),
+                ('signature', models.CharField(blank=True, max_length=500)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='paymentgateway',
+            name='webhook_secret',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AlterField(
+            model_name='paymenttransaction',
+            name='gateway_transaction_id',
+            field=models.CharField(blank=True, db_index=True, max_length=200),
+        ),
+        migrations.CreateModel(
+            name='WebhookEventOutcome',
+            fields=[
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='outcome', serialize=False, to='payments.webhookevent')),
+                ('outcome', models.CharField(choices=[('applied', 'Applied'), ('skipped', 'Skipped'), ('unmatched', 'Unmatched'), ('ignored', 'Ignored'), ('invalid', 'Invalid')], max_length=20)),
+                ('detail', models.TextField(blank=True)),
+                ('processed_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='webhookevent',
+            name='gateway',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='webhook_events', to='payments.paymentgateway'),
+        ),
+        migrations.AddConstraint(
+            model_name='webhookevent',
+            constraint=models.UniqueConstraint(condition=models.Q(('event_id', ''), _negated=True), fields=('gateway', 'event_id'), name='webhook_event_unique_delivery'),
+        ),
+    ]
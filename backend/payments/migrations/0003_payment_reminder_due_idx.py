@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0002_webhook_events'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='paymentreminder',
+            index=models.Index(fields=['is_sent', 'reminder_date'], name='payment_reminder_due_idx'),
+        ),
+    ]
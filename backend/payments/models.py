@@ -1,5 +1,6 @@
 
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth import get_user_model
 from core.models import School, StudentProfile
 import uuid
@@ -18,6 +19,8 @@ class PaymentGateway(models.Model):
     is_active = models.BooleanField(default=True)
     api_key = models.CharField(max_length=200)
     secret_key = models.CharField(max_length=200)
+    # Signs webhook callbacks; secret_key is used when left blank
+    webhook_secret = models.CharField(max_length=200, blank=True)
     school = models.ForeignKey(School, on_delete=models.CASCADE, related_name='payment_gateways')
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -47,7 +50,7 @@ class PaymentTransaction(models.Model):
     
     transaction_id = models.UUIDField(default=uuid.uuid4, unique=True)
     student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name='payments')
-    gateway_transaction_id = models.CharField(max_length=200, blank=True)
+    gateway_transaction_id = models.CharField(max_length=200, blank=True, db_index=True)
     payment_type = models.CharField(max_length=20, choices=PAYMENT_TYPE_CHOICES)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     currency = models.CharField(max_length=3, default='INR')
@@ -100,3 +103,45 @@ class PaymentReminder(models.Model):
     is_sent = models.BooleanField(default=False)
     sent_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # The dispatcher's claim query: unsent reminders that are due
+            models.Index(fields=['is_sent', 'reminder_date'], name='payment_reminder_due_idx'),
+        ]
+
+class WebhookEvent(models.Model):
+    """A gateway callback exactly as received; rows are only ever inserted"""
+    gateway = models.ForeignKey(PaymentGateway, on_delete=models.CASCADE, related_name='webhook_events')
+    event_id = models.CharField(max_length=200, blank=True)
+    event_type = models.CharField(max_length=100, blank=True)
+    gateway_transaction_id = models.CharField(max_length=200, blank=True)
+    payload = models.TextField()
+    signature = models.CharField(max_length=500, blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # Gateways redeliver; the same event is stored once
+            models.UniqueConstraint(
+                fields=['gateway', 'event_id'], condition=~Q(event_id=''), name='webhook_event_unique_delivery'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.gateway.name} {self.event_type} {self.event_id}"
+
+class WebhookEventOutcome(models.Model):
+    """Result of applying a WebhookEvent; events without one are pending"""
+    OUTCOME_CHOICES = [
+        ('applied', 'Applied'),
+        ('skipped', 'Skipped'),  # duplicate, or older than the transaction's status
+        ('unmatched', 'Unmatched'),
+        ('ignored', 'Ignored'),  # event type that does not change a transaction
+        ('invalid', 'Invalid'),
+    ]
+
+    event = models.OneToOneField(WebhookEvent, on_delete=models.CASCADE, primary_key=True, related_name='outcome')
+    outcome = models.CharField(max_length=20, choices=OUTCOME_CHOICES)
+    detail = models.TextField(blank=True)
+    processed_at = models.DateTimeField(auto_now_add=True)
@@ -0,0 +1,170 @@
+"""Payment reminder dispatch.
+
+Workers (send_payment_reminders) claim due, unsent reminders in batches with
+SELECT ... FOR UPDATE SKIP LOCKED, so parallel workers never pick the same
+reminder. The subject and body templates are loaded once per batch and
+rendered for every reminder in it; PaymentReminder.message is included in
+the body. Messages go out through the backend named by
+PAYMENT_REMINDER_BACKEND, no faster than a shared token bucket allows, and
+the reminders that went out are marked sent with one UPDATE before the row
+locks are released.
+
+Only reminders of transactions still awaiting payment are claimed; those of
+settled transactions are never sent.
+"""
+import json
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.template.loader import get_template
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import PaymentReminder
+
+UNPAID_STATUSES = ('pending', 'processing', 'failed')
+
+
+class TokenBucket:
+    """Allows `rate` tokens per second with bursts of up to `capacity`; thread safe"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(int(rate), 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self, count=1):
+        """Block until `count` tokens (at most capacity) are available"""
+        count = min(count, self.capacity)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= count:
+                    self.tokens -= count
+                    return count
+                wait = (count - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class ConsoleBackend:
+    """Writes messages to stdout; the default, for development"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.lock = threading.Lock()
+
+    def send_messages(self, messages):
+        with self.lock:
+            for message in messages:
+                self.stream.write(
+                    f"To: {', '.join(message['to'] + message['phones'])}\n"
+                    f"Subject: {message['subject']}\n\n{message['body']}\n{'-' * 70}\n"
+                )
+            self.stream.flush()
+        return len(messages)
+
+
+class FileBackend:
+    """Appends messages as JSON lines to PAYMENT_REMINDER_FILE_PATH"""
+
+    def __init__(self, path=None):
+        self.path = path or getattr(settings, 'PAYMENT_REMINDER_FILE_PATH', 'payment_reminders.jsonl')
+        self.lock = threading.Lock()
+
+    def send_messages(self, messages):
+        with self.lock, open(self.path, 'a', encoding='utf-8') as out:
+            for message in messages:
+                out.write(json.dumps(message) + '\n')
+        return len(messages)
+
+
+class EmailBackend:
+    """Sends through Django's EMAIL_BACKEND over one connection per call"""
+
+    def send_messages(self, messages):
+        emails = [
+            EmailMessage(message['subject'], message['body'], to=message['to'])
+            for message in messages if message['to']
+        ]
+        get_connection().send_messages(emails)
+        return len(messages)
+
+
+def get_backend(path=None):
+    path = path or getattr(settings, 'PAYMENT_REMINDER_BACKEND', 'payments.reminders.ConsoleBackend')
+    return import_string(path)()
+
+
+def due_reminders(now=None):
+    return PaymentReminder.objects.filter(
+        is_sent=False, reminder_date__lte=now or timezone.now(), transaction__status__in=UNPAID_STATUSES
+    )
+
+
+def _message(reminder, subject_template, body_template):
+    payment = reminder.transaction
+    student = payment.student
+    recipients = [student.user] + [parent.user for parent in student.parents.all()]
+    context = {
+        'student_name': student.full_name.strip() or student.user.username,
+        'amount': payment.amount,
+        'currency': payment.currency,
+        'payment_type': payment.get_payment_type_display(),
+        'description': payment.description,
+        'due_date': payment.due_date,
+        'reference': payment.transaction_id,
+        'school': student.school.name,
+        'message': reminder.message,
+    }
+    return {
+        'reminder_id': reminder.pk,
+        'to': [user.email for user in recipients if user.email],
+        'phones': [user.phone for user in recipients if user.phone],
+        'subject': ' '.join(subject_template.render(context).split()),
+        'body': body_template.render(context).strip() + '\n',
+    }
+
+
+def dispatch_batch(backend, bucket=None, batch_size=100, now=None):
+    """
+    Send up to batch_size due reminders. Returns (claimed, sent); if the
+    backend fails, what went out before the failure is still marked sent
+    and the error is raised afterwards.
+    """
+    with transaction.atomic():
+        reminders = list(
+            due_reminders(now).select_for_update(skip_locked=True, of=('self',))
+            .select_related('transaction__student__user', 'transaction__student__school')
+            .prefetch_related('transaction__student__parents__user')
+            .order_by('reminder_date', 'id')[:batch_size]
+        )
+        if not reminders:
+            return 0, 0
+        subject_template = get_template('payments/reminder_subject.txt')
+        body_template = get_template('payments/reminder_body.txt')
+        messages = [_message(reminder, subject_template, body_template) for reminder in reminders]
+
+        sent = []
+        error = None
+        try:
+            while len(sent) < len(messages):
+                count = bucket.take(len(messages) - len(sent)) if bucket else len(messages)
+                chunk = messages[len(sent):len(sent) + count]
+                backend.send_messages(chunk)
+                sent += chunk
+        except Exception as exc:
+            error = exc
+        PaymentReminder.objects.filter(pk__in=[m['reminder_id'] for m in sent]).update(
+            is_sent=True, sent_at=timezone.now()
+        )
+    if error is not None:
+        raise error
+    return len(reminders), len(sent)
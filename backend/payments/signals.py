@@ -0,0 +1,8 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import PaymentGateway
+from . import webhooks
+
+@receiver([post_save, post_delete], sender=PaymentGateway)
+def reset_webhook_gateways(sender, **kwargs):
+    webhooks.clear_gateway_cache()
@@ -1,4 +1,3 @@
-
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from . import views
@@ -7,5 +6,6 @@ router = DefaultRouter()
 # Add payment viewsets here when created
 
 urlpatterns = [
+    path('webhooks/<int:gateway_id>/', views.WebhookView.as_view(), name='payment-webhook'),
     path('', include(router.urls)),
 ]
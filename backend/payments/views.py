@@ -1,7 +1,25 @@
-from rest_framework import viewsets
+from rest_framework import permissions, viewsets
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import webhooks
 
 @api_view(['GET'])
 def payments_status(request):
-    return Response({'status': 'Payments module is working'})
\ No newline at end of file
+    return Response({'status': 'Payments module is working'})
+
+class WebhookView(APIView):
+    """
+    Receives gateway callbacks. Gateways authenticate by signing the body,
+    so no user authentication applies; the event is stored and acknowledged
+    and process_webhook_events applies it later.
+    """
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request, gateway_id):
+        status_code, message = webhooks.ingest(gateway_id, request.body, request.headers)
+        if status_code != 200:
+            return Response({'error': message}, status=status_code)
+        return Response({'status': message})
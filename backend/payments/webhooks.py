@@ -0,0 +1,260 @@
+"""Payment gateway webhooks.
+
+Ingest (the webhook view) does as little as possible so that bursts of
+callbacks are acknowledged quickly: the gateway is looked up from an
+in-process cache (entries expire after PAYMENT_GATEWAY_CACHE_TTL seconds, so
+secret rotations and deactivations made elsewhere are picked up), the
+signature is checked, and the raw body is inserted
+into the append-only WebhookEvent table. A redelivered event (same gateway
+event id) is acknowledged without being stored twice.
+
+Workers (process_webhook_events) claim pending events in batches and apply
+them to PaymentTransaction with conditional UPDATEs keyed on
+gateway_transaction_id. A transaction only moves forward (see
+ALLOWED_FROM), so duplicate and out-of-order events are skipped, and
+applying an event twice changes nothing. Each event gets one
+WebhookEventOutcome row; an event that fails to apply is recorded as
+invalid rather than holding up the events queued behind it.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.apps import apps
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+STRIPE_TOLERANCE = 300  # seconds a Stripe signature timestamp may be off by
+
+# Statuses a PaymentTransaction may move to each status from. A refund
+# implies a capture, so it may arrive (out of order) before the capture does
+ALLOWED_FROM = {
+    'processing': ['pending'],
+    'completed': ['pending', 'processing', 'failed'],
+    'failed': ['pending', 'processing'],
+    'cancelled': ['pending', 'processing'],
+    'refunded': ['pending', 'processing', 'completed'],
+}
+
+EVENT_STATUS = {
+    'razorpay': {
+        'payment.authorized': 'processing',
+        'payment.captured': 'completed',
+        'payment.failed': 'failed',
+        'refund.processed': 'refunded',
+    },
+    'stripe': {
+        'payment_intent.processing': 'processing',
+        'payment_intent.succeeded': 'completed',
+        'payment_intent.payment_failed': 'failed',
+        'payment_intent.canceled': 'cancelled',
+        'charge.refunded': 'refunded',
+    },
+    # Other gateways post the generic format: {"id", "type", "data": {...}}
+    None: {
+        'payment.processing': 'processing',
+        'payment.completed': 'completed',
+        'payment.failed': 'failed',
+        'payment.cancelled': 'cancelled',
+        'payment.refunded': 'refunded',
+    },
+}
+
+# Active gateways only, so posts to unknown ids cannot grow it; at most
+# GATEWAY_CACHE_SIZE entries, least recently used evicted first
+GATEWAY_CACHE_SIZE = 256
+_gateways = OrderedDict()
+_gateways_lock = threading.Lock()
+
+
+def clear_gateway_cache():
+    with _gateways_lock:
+        _gateways.clear()
+
+
+def gateway_config(gateway_id):
+    """(name, webhook secret) of an active gateway, or None"""
+    with _gateways_lock:
+        entry = _gateways.get(gateway_id)
+        if entry is not None and time.monotonic() - entry[0] <= getattr(settings, 'PAYMENT_GATEWAY_CACHE_TTL', 10):
+            _gateways.move_to_end(gateway_id)
+            return entry[1]
+
+    PaymentGateway = apps.get_model('payments', 'PaymentGateway')
+    row = PaymentGateway.objects.filter(pk=gateway_id, is_active=True).values_list(
+        'name', 'webhook_secret', 'secret_key'
+    ).first()
+    with _gateways_lock:
+        if row is None:
+            _gateways.pop(gateway_id, None)
+            return None
+        config = (row[0], row[1] or row[2])
+        _gateways[gateway_id] = (time.monotonic(), config)
+        _gateways.move_to_end(gateway_id)
+        while len(_gateways) > GATEWAY_CACHE_SIZE:
+            _gateways.popitem(last=False)
+    return config
+
+
+def _digest(secret, message):
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+def signature_header(gateway_name):
+    return {
+        'razorpay': 'X-Razorpay-Signature',
+        'stripe': 'Stripe-Signature',
+    }.get(gateway_name, 'X-Webhook-Signature')
+
+
+def verify_signature(gateway_name, secret, body, signature, now=None):
+    if not secret or not signature:
+        return False
+    if gateway_name == 'stripe':
+        # t=<timestamp>,v1=<signature>[,v1=...]
+        parts = [part.split('=', 1) for part in signature.split(',') if '=' in part]
+        timestamps = [value for key, value in parts if key == 't']
+        if not timestamps or not timestamps[0].isdigit():
+            return False
+        if abs((now or time.time()) - int(timestamps[0])) > STRIPE_TOLERANCE:
+            return False
+        expected = _digest(secret, timestamps[0].encode() + b'.' + body)
+        return any(hmac.compare_digest(expected, value) for key, value in parts if key == 'v1')
+    return hmac.compare_digest(_digest(secret, body), signature)
+
+
+def parse_event(gateway_name, payload, headers=None):
+    """
+    Normalise a decoded webhook body to a dict with event_id, event_type,
+    gateway_transaction_id and reference (our PaymentTransaction.transaction_id)
+    """
+    headers = headers or {}
+    if gateway_name == 'razorpay':
+        entities = payload.get('payload') or {}
+        payment = (entities.get('payment') or {}).get('entity') or {}
+        refund = (entities.get('refund') or {}).get('entity') or {}
+        return {
+            'event_id': headers.get('X-Razorpay-Event-Id', ''),
+            'event_type': payload.get('event', ''),
+            'gateway_transaction_id': payment.get('id') or refund.get('payment_id') or '',
+            'reference': (payment.get('notes') or {}).get('transaction_id', ''),
+        }
+    if gateway_name == 'stripe':
+        obj = (payload.get('data') or {}).get('object') or {}
+        return {
+            'event_id': payload.get('id', ''),
+            'event_type': payload.get('type', ''),
+            'gateway_transaction_id': obj.get('payment_intent') or obj.get('id') or '',
+            'reference': (obj.get('metadata') or {}).get('transaction_id', ''),
+        }
+    data = payload.get('data') or {}
+    return {
+        'event_id': payload.get('id', ''),
+        'event_type': payload.get('type', ''),
+        'gateway_transaction_id': data.get('gateway_transaction_id', ''),
+        'reference': data.get('reference', ''),
+    }
+
+
+def ingest(gateway_id, body, headers):
+    """
+    Verify and store a callback. Returns (http_status, message); only 2xx
+    tells the gateway to stop retrying.
+    """
+    config = gateway_config(gateway_id)
+    if config is None:
+        return 404, 'Unknown gateway'
+    name, secret = config
+    signature = headers.get(signature_header(name), '')
+    if not verify_signature(name, secret, body, signature):
+        return 400, 'Invalid signature'
+    try:
+        payload = json.loads(body)
+        event = parse_event(name, payload, headers)
+    except (ValueError, AttributeError):
+        return 400, 'Malformed payload'
+
+    WebhookEvent = apps.get_model('payments', 'WebhookEvent')
+    try:
+        with transaction.atomic():
+            WebhookEvent.objects.create(
+                gateway_id=gateway_id,
+                event_id=str(event['event_id'])[:200],
+                event_type=str(event['event_type'])[:100],
+                gateway_transaction_id=str(event['gateway_transaction_id'])[:200],
+                payload=body.decode('utf-8', errors='replace'),
+                signature=signature[:500],
+            )
+    except IntegrityError:
+        return 200, 'Duplicate delivery'
+    return 200, 'Received'
+
+
+def apply_event(event, gateway_name):
+    """Apply one WebhookEvent to its PaymentTransaction. Returns (outcome, detail)."""
+    PaymentTransaction = apps.get_model('payments', 'PaymentTransaction')
+    try:
+        info = parse_event(gateway_name, json.loads(event.payload))
+    except (ValueError, AttributeError):
+        return 'invalid', 'Malformed payload'
+
+    status = EVENT_STATUS.get(gateway_name, EVENT_STATUS[None]).get(info['event_type'])
+    if status is None:
+        return 'ignored', f"Unhandled event type {info['event_type']!r}"
+
+    # Truncated as ingest stores it
+    gateway_transaction_id = str(info['gateway_transaction_id'])[:200]
+    match = Q(gateway_transaction_id=gateway_transaction_id) if gateway_transaction_id else Q(pk__in=[])
+    try:
+        # First event for a payment links our transaction to the gateway's id
+        match |= Q(transaction_id=uuid.UUID(str(info['reference'])), gateway_transaction_id='')
+    except ValueError:
+        pass
+    transactions = PaymentTransaction.objects.filter(match, gateway_id=event.gateway_id)
+
+    now = timezone.now()
+    changes = {'status': status, 'updated_at': now}
+    if gateway_transaction_id:
+        changes['gateway_transaction_id'] = gateway_transaction_id
+    if status == 'completed':
+        changes['paid_date'] = Coalesce('paid_date', now)
+    if transactions.filter(status__in=ALLOWED_FROM[status]).update(**changes):
+        return 'applied', ''
+
+    current = transactions.values_list('status', flat=True).first()
+    if current is None:
+        return 'unmatched', 'No transaction for this payment'
+    return 'skipped', f'Transaction is already {current}'
+
+
+def process_batch(batch_size=100):
+    """Apply up to batch_size pending events. Returns how many were processed."""
+    WebhookEvent = apps.get_model('payments', 'WebhookEvent')
+    WebhookEventOutcome = apps.get_model('payments', 'WebhookEventOutcome')
+    with transaction.atomic():
+        # Concurrent workers skip each other's claimed rows
+        events = list(
+            WebhookEvent.objects.select_for_update(skip_locked=True, of=('self',))
+            .filter(outcome__isnull=True).select_related('gateway').order_by('id')[:batch_size]
+        )
+        outcomes = []
+        for event in events:
+            try:
+                with transaction.atomic():
+                    outcome, detail = apply_event(event, event.gateway.name)
+            except Exception as exc:
+                logger.exception('Could not apply webhook event %s', event.pk)
+                outcome, detail = 'invalid', f'{type(exc).__name__}: {exc}'
+            outcomes.append(WebhookEventOutcome(event=event, outcome=outcome, detail=detail))
+        WebhookEventOutcome.objects.bulk_create(outcomes, ignore_conflicts=True)
+    return len(events)
@@ -8,6 +8,7 @@ from django.http import FileResponse
 from .models import Resource, ResourceCategory
 from .serializers import ResourceSerializer, ResourceCategorySerializer
 from core.permissions import IsDeveloper, IsPrincipal, IsTeacher, IsStudent, IsParent
+from core.scope import get_scope
 
 class ResourceCategoryViewSet(viewsets.ModelViewSet):
     queryset = ResourceCategory.objects.all()
@@ -37,31 +38,20 @@ class ResourceViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         queryset = super().get_queryset()
         user = self.request.user
+        scope = get_scope(self.request)
         
-        if user.is_student:
-            student_profile = user.studentprofile
+        if user.is_student or user.is_parent:
             queryset = queryset.filter(
                 Q(is_public=True) |
-                Q(class_assigned=student_profile.class_assigned) |
-                Q(section=student_profile.section)
-            )
-        elif user.is_parent:
-            children = user.parentprofile.children.all()
-            child_classes = [child.class_assigned for child in children]
-            child_sections = [child.section for child in children]
-            
-            queryset = queryset.filter(
-                Q(is_public=True) |
-                Q(class_assigned__in=child_classes) |
-                Q(section__in=child_sections)
+                Q(class_assigned_id__in=scope.class_ids) |
+                Q(section_id__in=scope.section_ids)
             )
         elif user.is_teacher:
-            teacher_profile = user.teacherprofile
             queryset = queryset.filter(
-                Q(uploaded_by=teacher_profile) |
+                Q(uploaded_by_id=scope.profile_id) |
                 Q(is_public=True) |
-                Q(subject__in=teacher_profile.subjects.all()) |
-                Q(section__in=teacher_profile.sections.all())
+                Q(subject_id__in=scope.subject_ids) |
+                Q(section_id__in=scope.section_ids)
             )
         
         # Filter by subject, class, section if provided
@@ -132,7 +132,7 @@ AUTH_USER_MODEL = 'core.User'
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'authentication.jwt.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -172,6 +172,11 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
 }
 
+# authentication.jwt.ClaimsJWTAuthentication keeps recently loaded users in
+# a per-process LRU for state-changing requests
+AUTH_USER_CACHE_SIZE = 1024
+AUTH_USER_CACHE_TTL = 30  # seconds
+
 # CORS Configuration
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
@@ -201,6 +206,14 @@ RAZORPAY_API_SECRET = os.getenv('RAZORPAY_API_SECRET', '')
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 
+# Chunked uploads (core.uploads): part files are kept outside MEDIA_ROOT
+# until finalized, and unfinished ones are removed by clean_chunked_uploads
+# after CHUNKED_UPLOAD_EXPIRY_HOURS without a new chunk
+CHUNKED_UPLOAD_DIR = BASE_DIR / 'upload_parts'
+CHUNKED_UPLOAD_MAX_SIZE = 2 * 1024 * 1024 * 1024  # 2GB
+CHUNKED_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # suggested to clients
+CHUNKED_UPLOAD_EXPIRY_HOURS = 24
+
 # Celery Configuration (for background tasks)
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379')
 CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://localhost:6379')
@@ -208,6 +221,74 @@ CELERY_ACCEPT_CONTENT = ['application/json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 
+# Cache Configuration
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'school-lms',
+    }
+}
+
+# academic.grading keeps the grade scale per process for this many seconds
+GRADE_SCALE_CACHE_TTL = 30
+
+# Dashboard stats are cached per user for this many seconds
+DASHBOARD_STATS_TTL = 60
+
+# Fee collection dashboard is rebuilt at most once per this many seconds
+FEE_DASHBOARD_TTL = 60
+
+# Day of the month generated fee records fall due on (clamped to month length)
+FEE_DUE_DAY = 10
+
+# Largest run (planned records) the generate_records endpoint does in the
+# request; bigger ones go through the generate_fee_records command
+FEE_GENERATION_MAX_RECORDS = 10000
+
+# Teachers whose first and last punch are closer than this (hours) are
+# recorded as half day by the punch file ingest
+TEACHER_HALF_DAY_HOURS = 4
+
+# Seconds the webhook view keeps a gateway's secret and active flag per
+# process; edits made in other processes take effect after this long
+PAYMENT_GATEWAY_CACHE_TTL = 10
+
+# Seconds process_webhook_events waits before polling again once no
+# gateway events are pending
+PAYMENT_WEBHOOK_POLL_INTERVAL = 1
+
+# Where send_payment_reminders delivers messages (console, file or email
+# backend from payments.reminders, or any class with send_messages) and how
+# many messages per second it may send across all its workers
+PAYMENT_REMINDER_BACKEND = 'payments.reminders.ConsoleBackend'
+PAYMENT_REMINDER_FILE_PATH = BASE_DIR / 'payment_reminders.jsonl'
+PAYMENT_REMINDER_RATE = 10
+
+# Seconds send_payment_reminders waits before polling again once no
+# reminders are due
+PAYMENT_REMINDER_POLL_INTERVAL = 5
+
+# Upper bound (seconds) on how long a user's visible notice ids are cached;
+# entries also end at the next publish/expiry transition and are invalidated
+# by every notice change
+NOTICE_VISIBILITY_TTL = 300
+
+# run_notice_scheduler sleeps until the next publish/expiry time, but wakes
+# at least this often (seconds) to pick up notices scheduled meanwhile
+NOTICE_SCHEDULER_POLL_INTERVAL = 30
+
+# Audit log writer (core.audit): entries are queued and written in batches
+AUDIT_LOG_ASYNC = True
+AUDIT_LOG_BATCH_SIZE = 100
+AUDIT_LOG_FLUSH_INTERVAL = 1.0  # seconds
+AUDIT_LOG_QUEUE_SIZE = 10000
+AUDIT_LOG_ENQUEUE_TIMEOUT = 0.05  # seconds to wait for room before dropping
+
+# Months of audit log kept in the database; older months are moved to
+# compressed JSONL files by the archive_audit_logs command
+AUDIT_LOG_RETENTION_MONTHS = 6
+AUDIT_LOG_ARCHIVE_DIR = BASE_DIR / 'archives' / 'audit_logs'
+
 # Logging Configuration
 LOGGING = {
     'version': 1,
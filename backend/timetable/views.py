@@ -1,5 +1,6 @@
 from rest_framework import viewsets, permissions
 from core.permissions import IsDeveloper, IsPrincipal, IsTeacher, IsStudent, IsParent
+from core.scope import get_scope
 from .models import TimeSlot, Timetable
 from .serializers import TimeSlotSerializer, TimetableSerializer
 from django.db.models import Q
@@ -29,28 +30,18 @@ class TimetableViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         queryset = super().get_queryset()
         user = self.request.user
+        scope = get_scope(self.request)
 
-        if hasattr(user, 'studentprofile'):
-            student_profile = user.studentprofile
+        if user.is_student or user.is_parent:
             queryset = queryset.filter(
-                class_assigned=student_profile.class_assigned,
-                section=student_profile.section,
+                class_assigned_id__in=scope.class_ids,
+                section_id__in=scope.section_ids,
                 is_active=True
             )
-        elif hasattr(user, 'parentprofile'):
-            children = user.parentprofile.children.all()
-            child_classes = [child.class_assigned for child in children]
-            child_sections = [child.section for child in children]
+        elif user.is_teacher:
             queryset = queryset.filter(
-                class_assigned__in=child_classes,
-                section__in=child_sections,
-                is_active=True
+                Q(section_id__in=scope.section_ids) |
+                Q(teacher_id=scope.profile_id)
             )
-        elif hasattr(user, 'teacherprofile'):
-            teacher_profile = user.teacherprofile
-            queryset = queryset.filter(
-                Q(section__in=teacher_profile.sections.all()) |
-                Q(teacher=teacher_profile)
-            ).distinct()
         # Principals, developers, and others see all
         return queryset.order_by('-created_at')
\ No newline at end of file